@@ -0,0 +1,90 @@
+"""Response shapes of this API on top of the shared weather core
+
+Fetching, caching, batching and decoding live in the weather core
+(weather-dashboard/backend/weather_service.py), which the Flask backend runs
+on as well. The functions here only rename its fields to this API's format.
+"""
+
+import os
+import sys
+from datetime import date
+from typing import Any, Dict, List
+
+CORE_PATH = os.getenv(
+    "WEATHER_CORE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "weather-dashboard", "backend"),
+)
+if CORE_PATH not in sys.path:
+    sys.path.append(CORE_PATH)
+
+import weather_service as core  # noqa: E402
+
+HOURLY_FIELDS = ["temperature_2m", "precipitation_probability", "precipitation", "weather_code", "is_day"]
+
+
+def _minutes(timestamp: str) -> str:
+    """Local ISO time to the minute, like the upstream's JSON times"""
+    return timestamp[:16] if timestamp else timestamp
+
+
+def _column(forecast, name: str, hours: int) -> List[Any]:
+    """First hours values of a core Forecast column as plain Python values, [] if it is missing"""
+    return forecast.as_list(name)[:hours] if name in forecast else []
+
+
+def fetch_current_weather(latitude: float, longitude: float) -> Dict[str, Any]:
+    """Fetch current weather data for a specific location"""
+
+    current = core.get_current_weather(latitude, longitude)
+
+    return {
+        "temperature": current.get("temperature_2m"),
+        "humidity": current.get("relative_humidity_2m"),
+        "precipitation": current.get("precipitation"),
+        "weatherCode": current.get("weather_code"),
+        "windSpeed": current.get("wind_speed_10m"),
+        "windDirection": current.get("wind_direction_10m"),
+        "isDay": current.get("is_day") == 1,
+        "time": _minutes(current.get("timestamp"))
+    }
+
+
+def fetch_hourly_forecast(latitude: float, longitude: float, hours: int = 24) -> Dict[str, Any]:
+    """Fetch hourly forecast data for a specific location"""
+
+    # From the current hour on, like the upstream's forecast_hours
+    hourly = core.get_hourly_forecast(latitude, longitude, hours, HOURLY_FIELDS, start="now")
+
+    return {
+        "time": _column(hourly, "timestamps", hours),
+        "temperature": _column(hourly, "temperature_2m", hours),
+        "precipitation": _column(hourly, "precipitation", hours),
+        "weatherCode": _column(hourly, "weather_code", hours),
+        "isDay": [is_day == 1 for is_day in _column(hourly, "is_day", hours)]
+    }
+
+
+def fetch_historical_weather(
+    latitude: float,
+    longitude: float,
+    start_date: date,
+    end_date: date
+) -> Dict[str, Any]:
+    """Fetch historical weather data for a specific location and date range"""
+
+    daily = core.get_historical_weather(latitude, longitude, start_date, end_date)
+
+    return {
+        "latitude": daily.get("latitude"),
+        "longitude": daily.get("longitude"),
+        "timezone": daily.get("timezone"),
+        "dates": daily.get("time", []),
+        "temperatureMax": daily.get("temperature_2m_max", []),
+        "temperatureMin": daily.get("temperature_2m_min", []),
+        "temperatureMean": daily.get("temperature_2m_mean", []),
+        "precipitationSum": daily.get("precipitation_sum", []),
+        "rainSum": daily.get("rain_sum", []),
+        "snowfallSum": daily.get("snowfall_sum", []),
+        "precipitationHours": daily.get("precipitation_hours", []),
+        "weatherCode": daily.get("weather_code", [])
+    }
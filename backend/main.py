@@ -1,13 +1,16 @@
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from datetime import date, datetime, timedelta
 from typing import List, Optional
+import math
 import time
-from weather_service import (
+from adapters import (
     fetch_current_weather,
     fetch_hourly_forecast,
     fetch_historical_weather
 )
+from openmeteo_requests import CircuitOpenError, RateLimitError
 
 app = FastAPI(title="Weather Dashboard API")
 
@@ -20,19 +23,34 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
+# Endpoints are plain functions: the weather core blocks on the upstream, so
+# FastAPI runs them in its thread pool instead of on the event loop
+
+@app.exception_handler(CircuitOpenError)
+@app.exception_handler(RateLimitError)
+async def upstream_unavailable(request, error):
+    """503 for requests the upstream guards refused, with a retry hint"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(error)},
+        headers={"Retry-After": str(max(1, math.ceil(getattr(error, "retry_after", 1))))},
+    )
+
 @app.get("/api/current-weather")
-async def get_current_weather(
+def get_current_weather(
     latitude: float = Query(..., description="Latitude of the location"),
     longitude: float = Query(..., description="Longitude of the location")
 ):
     try:
         weather_data = fetch_current_weather(latitude, longitude)
         return weather_data
+    except (CircuitOpenError, RateLimitError):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching current weather: {str(e)}")
 
 @app.get("/api/hourly-forecast")
-async def get_hourly_forecast(
+def get_hourly_forecast(
     latitude: float = Query(..., description="Latitude of the location"),
     longitude: float = Query(..., description="Longitude of the location"),
     hours: int = Query(24, description="Number of hours to forecast (max 48)")
@@ -43,11 +61,13 @@ async def get_hourly_forecast(
     try:
         forecast_data = fetch_hourly_forecast(latitude, longitude, hours)
         return forecast_data
+    except (CircuitOpenError, RateLimitError):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching hourly forecast: {str(e)}")
 
 @app.get("/api/historical-weather")
-async def get_historical_weather(
+def get_historical_weather(
     latitude: float = Query(..., description="Latitude of the location"),
     longitude: float = Query(..., description="Longitude of the location"),
     start_date: date = Query(..., description="Start date (YYYY-MM-DD)"),
@@ -68,6 +88,8 @@ async def get_historical_weather(
     try:
         historical_data = fetch_historical_weather(latitude, longitude, start_date, end_date)
         return historical_data
+    except (CircuitOpenError, RateLimitError):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching historical weather: {str(e)}")
 
@@ -0,0 +1,81 @@
+"""Circuit breaker for upstream API calls"""
+
+from __future__ import annotations
+
+import threading
+import time
+
+
+class CircuitBreaker:
+    """Circuit breaker
+
+    After `failure_threshold` consecutive failures the circuit opens and calls are rejected immediately instead
+    of waiting on a degraded upstream. Once `recovery_timeout` seconds have passed the circuit is half-open: up to
+    `half_open_max_calls` probe requests go through. A successful probe closes the circuit, a failed one opens it
+    again for another `recovery_timeout`.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0, half_open_max_calls: int = 1):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+
+    @property
+    def state(self) -> str:
+        """Current state, moving from open to half-open once the recovery timeout has passed"""
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+                self._state = self.HALF_OPEN
+                self._probes = 0
+            return self._state
+
+    def retry_after(self) -> float:
+        """Seconds until the next probe will be let through (0 if requests are allowed)"""
+        with self._lock:
+            if self._state != self.OPEN:
+                return 0.0
+            return max(0.0, self.recovery_timeout - (time.monotonic() - self._opened_at))
+
+    def allow_request(self) -> bool:
+        """Whether a call may go to the upstream now. Every allowed call must be followed by a `record_*` call."""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.OPEN:
+            return False
+        with self._lock:
+            if self._probes < self.half_open_max_calls:
+                self._probes += 1
+                return True
+            return False
+
+    def release(self):
+        """Give back an allowed call that was never sent, without reporting an outcome"""
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def record_success(self):
+        """Report a successful call"""
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probes = 0
+
+    def record_failure(self):
+        """Report a failed call"""
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probes = 0
@@ -2,11 +2,19 @@
 
 from __future__ import annotations
 
-from typing import TypeVar
+import hashlib
+import json
+import threading
+import time
+from typing import Protocol, TypeVar
 
 import requests
 from openmeteo_sdk.WeatherApiResponse import WeatherApiResponse
 
+from openmeteo_requests.CircuitBreaker import CircuitBreaker
+from openmeteo_requests.Hedger import Hedger
+from openmeteo_requests.RateLimiter import RateLimiter
+
 T = TypeVar("T")
 TSession = TypeVar("TSession", bound=requests.Session)
 
@@ -15,20 +23,184 @@ class OpenMeteoRequestsError(Exception):
     """Open-Meteo Error"""
 
 
-class Client:
-    """Open-Meteo API Client"""
+class CircuitOpenError(OpenMeteoRequestsError):
+    """Upstream calls are suspended by the circuit breaker"""
 
-    def __init__(self, session: TSession | None = None):
-        self.session = session or requests.Session()
+    def __init__(self, retry_after: float):
+        super().__init__(f"Circuit open after repeated upstream failures, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
 
-    # pylint: disable=too-many-arguments
-    def _get(self, cls: type[T], url: str, params: any, method: str, verify: bool | str | None) -> list[T]:
-        params["format"] = "flatbuffers"
 
-        if method.upper() == "POST":
-            response = self.session.request("POST", url, data=params, verify=verify)
+class RateLimitError(OpenMeteoRequestsError):
+    """No rate limiter token became available in time"""
+
+
+class RawCache(Protocol):
+    """Storage for raw responses, e.g. a shared-memory or Redis backed cache"""
+
+    def get(self, key: str) -> bytes | None:
+        """Return the stored bytes or None"""
+
+    def set(self, key: str, value: bytes, ttl: float) -> bool:
+        """Store bytes for `ttl` seconds"""
+
+
+def decode_frames(cls: type[T], data: bytes) -> list[T]:
+    """Split length-prefixed FlatBuffers frames into messages.
+
+    Decoding is lazy: each message reads its fields straight from `data` when they are accessed.
+    """
+    messages = []
+    total = len(data)
+    pos = int(0)
+    while pos < total:
+        length = int.from_bytes(data[pos : pos + 4], byteorder="little")
+        message = cls.GetRootAs(data, pos + 4)
+        messages.append(message)
+        pos += length + 4
+    return messages
+
+
+def _cache_key(url: str, params: any, method: str) -> str:
+    payload = json.dumps([method.upper(), url, params], sort_keys=True, default=str)
+    return "openmeteo:" + hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _retry_after(response: requests.Response, default: float = 60.0) -> float:
+    try:
+        return float(response.headers.get("Retry-After", default))
+    except ValueError:
+        return default
+
+
+class Client:
+    """Open-Meteo API Client
+
+    Optionally guarded by a `RateLimiter`, which spaces out upstream calls, and a `CircuitBreaker`, which fails
+    fast with `CircuitOpenError` while the upstream keeps failing. With a `Hedger`, a GET that is slower than
+    most recent calls is sent a second time and the first answer wins; the duplicate needs a rate limiter token
+    that is available right away and counts once for the circuit breaker.
+
+    With a `cache`, the raw FlatBuffers frames are stored for `cache_ttl` seconds. They are compact and are
+    decoded again on every access, so only the variables that are actually read cost any work.
+    """
+
+    def __init__(
+        self,
+        session: TSession | None = None,
+        rate_limiter: RateLimiter | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        timeout: float | None = None,
+        cache: RawCache | None = None,
+        cache_ttl: float = 3600.0,
+        hedger: Hedger | None = None,
+    ):
+        self.session = session or requests.Session()
+        self.rate_limiter = rate_limiter
+        self.circuit_breaker = circuit_breaker
+        self.timeout = timeout
+        self.cache = cache
+        self.cache_ttl = cache_ttl
+        self.hedger = hedger
+
+    def request(
+        self,
+        url: str,
+        params: any,
+        method: str = "GET",
+        verify: bool | str | None = None,
+        timeout: float | None = None,
+    ) -> requests.Response:
+        """Send one request through the rate limiter and circuit breaker and return the raw response
+
+        `timeout` is a budget in seconds for this call, including the wait for a rate limiter token. It can only
+        shorten the client's own timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        breaker = self.circuit_breaker
+        if breaker is not None and not breaker.allow_request():
+            raise CircuitOpenError(breaker.retry_after())
+        if self.rate_limiter is not None:
+            max_wait = None if timeout is None else min(self.rate_limiter.max_wait, max(timeout, 0.0))
+            if not self.rate_limiter.acquire(max_wait):
+                if breaker is not None:
+                    breaker.release()
+                raise RateLimitError("Rate limit exceeded while waiting for an upstream slot")
+
+        try:
+            timeout = self._timeout(deadline)
+        except requests.exceptions.Timeout:
+            if breaker is not None:
+                breaker.release()
+            raise
+
+        try:
+            if method.upper() == "POST":
+                response = self.session.request("POST", url, data=params, verify=verify, timeout=timeout)
+            elif self.hedger is not None:
+                response = self.hedger.run(
+                    lambda cancelled: self._hedged_get(url, params, verify, deadline, cancelled), self._admit_hedge
+                )
+            else:
+                response = self.session.request("GET", url, params=params, verify=verify, timeout=timeout)
+        except requests.exceptions.RequestException:
+            if breaker is not None:
+                breaker.record_failure()
+            raise
+
+        if response.status_code == 429 and self.rate_limiter is not None:
+            self.rate_limiter.pause(_retry_after(response))
+        if breaker is not None:
+            if response.status_code == 429 or response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+        return response
+
+    def _timeout(self, deadline: float | None) -> float | None:
+        """Timeout for a call sent now: the client's timeout, capped by the time left until `deadline`"""
+        if deadline is None:
+            return self.timeout
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise requests.exceptions.Timeout("Deadline exceeded before the request was sent")
+        return remaining if self.timeout is None else min(self.timeout, remaining)
+
+    def _hedged_get(
+        self, url: str, params: any, verify: bool | str | None, deadline: float | None, cancelled: threading.Event
+    ) -> requests.Response:
+        """One attempt of a hedged GET. The body is read here, unless the other attempt has answered already."""
+        response = self.session.request(
+            "GET", url, params=params, verify=verify, timeout=self._timeout(deadline), stream=True
+        )
+        if cancelled.is_set():
+            response.close()
         else:
-            response = self.session.request("GET", url, params=params, verify=verify)
+            _ = response.content
+        return response
+
+    def _admit_hedge(self) -> bool:
+        """Whether a duplicate may be sent: it takes a rate limiter token only if one is available now"""
+        return self.rate_limiter is None or self.rate_limiter.try_acquire() == 0.0
+
+    def fetch_raw(
+        self,
+        url: str,
+        params: any,
+        method: str = "GET",
+        verify: bool | str | None = None,
+        timeout: float | None = None,
+    ) -> bytes:
+        """Get the raw length-prefixed FlatBuffers frames, from the cache if possible"""
+        params = dict(params, format="flatbuffers")
+
+        key = _cache_key(url, params, method) if self.cache is not None else None
+        if key is not None:
+            data = self.cache.get(key)
+            if data is not None:
+                return data
+
+        response = self.request(url, params, method, verify, timeout)
 
         if response.status_code in [400, 429]:
             response_body = response.json()
@@ -37,15 +209,13 @@ class Client:
         response.raise_for_status()
 
         data = response.content
-        messages = []
-        total = len(data)
-        pos = int(0)
-        while pos < total:
-            length = int.from_bytes(data[pos : pos + 4], byteorder="little")
-            message = cls.GetRootAs(data, pos + 4)
-            messages.append(message)
-            pos += length + 4
-        return messages
+        if key is not None:
+            self.cache.set(key, data, self.cache_ttl)
+        return data
+
+    # pylint: disable=too-many-arguments
+    def _get(self, cls: type[T], url: str, params: any, method: str, verify: bool | str | None) -> list[T]:
+        return decode_frames(cls, self.fetch_raw(url, params, method, verify))
 
     def weather_api(
         self, url: str, params: any, method: str = "GET", verify: bool | str | None = None
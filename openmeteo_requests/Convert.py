@@ -0,0 +1,155 @@
+"""Vectorized conversion of weather API responses to NumPy arrays and DataFrames"""
+
+from __future__ import annotations
+
+from openmeteo_sdk.Aggregation import Aggregation
+from openmeteo_sdk.Variable import Variable
+from openmeteo_sdk.VariablesWithTime import VariablesWithTime
+from openmeteo_sdk.VariableWithValues import VariableWithValues
+from openmeteo_sdk.WeatherApiResponse import WeatherApiResponse
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None
+
+SECTIONS = {
+    "current": WeatherApiResponse.Current,
+    "minutely_15": WeatherApiResponse.Minutely15,
+    "hourly": WeatherApiResponse.Hourly,
+    "daily": WeatherApiResponse.Daily,
+}
+
+# Keys of `to_numpy` results that are not weather variables
+METADATA_KEYS = ("time", "latitude", "longitude", "elevation")
+
+_VARIABLE_NAMES = {value: name for name, value in vars(Variable).items() if not name.startswith("_")}
+_AGGREGATION_SUFFIXES = {
+    value: {"minimum": "min", "maximum": "max"}.get(name, name)
+    for name, value in vars(Aggregation).items()
+    if not name.startswith("_") and value != Aggregation.none
+}
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("numpy is required for this conversion: pip install numpy")
+
+
+def variable_name(variable: VariableWithValues) -> str:
+    """API name of a variable, e.g. `temperature_2m`, `temperature_2m_max` or `soil_temperature_0_to_7cm`"""
+    name = _VARIABLE_NAMES.get(variable.Variable(), f"variable_{variable.Variable()}")
+    if variable.Altitude():
+        name += f"_{variable.Altitude()}m"
+    if variable.PressureLevel():
+        name += f"_{variable.PressureLevel()}hPa"
+    if variable.Depth() or variable.DepthTo():
+        name += f"_{variable.Depth()}_to_{variable.DepthTo()}cm"
+    if variable.Aggregation() != Aggregation.none:
+        name += "_" + _AGGREGATION_SUFFIXES.get(variable.Aggregation(), str(variable.Aggregation()))
+    if variable.PreviousDay():
+        name += f"_previous_day{variable.PreviousDay()}"
+    if variable.EnsembleMember():
+        name += f"_member{variable.EnsembleMember():02d}"
+    return name
+
+
+def index_variables(section: VariablesWithTime) -> dict[str, VariableWithValues]:
+    """Map the API name of every variable in a section to the variable, in a single pass.
+
+    Look up variables in the result instead of scanning `Variables(i)` for each one:
+
+        hourly = index_variables(response.Hourly())
+        temperature = hourly["temperature_2m"].ValuesAsNumpy()
+    """
+    return {variable_name(variable): variable for variable in map(section.Variables, range(section.VariablesLength()))}
+
+
+def time_axis(section: VariablesWithTime, scalar: bool = False) -> np.ndarray:
+    """Timestamps of a section as `datetime64[s]` (UTC), built from `Time`, `TimeEnd` and `Interval`"""
+    _require_numpy()
+    if scalar:
+        return np.array([section.Time()], dtype="datetime64[s]")
+    return np.arange(section.Time(), section.TimeEnd(), section.Interval(), dtype=np.int64).astype("datetime64[s]")
+
+
+def _section(response: WeatherApiResponse, name: str) -> VariablesWithTime:
+    if name not in SECTIONS:
+        raise ValueError(f"Unknown section {name!r}, expected one of {', '.join(SECTIONS)}")
+    section = SECTIONS[name](response)
+    if section is None:
+        raise ValueError(f"Response for location {response.LocationId()} has no {name} data")
+    return section
+
+
+def _values(variable: VariableWithValues, scalar: bool) -> np.ndarray:
+    if scalar:
+        return np.array([variable.Value()], dtype=np.float32)
+    if variable.ValuesInt64Length():
+        # Unix timestamps such as sunrise and sunset
+        return variable.ValuesInt64AsNumpy().astype("datetime64[s]")
+    return variable.ValuesAsNumpy()
+
+
+def to_numpy(responses: list[WeatherApiResponse], section: str = "hourly") -> dict[str, np.ndarray]:
+    """Convert one section of all responses to a dict of NumPy arrays.
+
+    The result holds `time` (steps), `latitude`, `longitude` and `elevation` (locations) and one
+    (locations, steps) array per weather variable. `np.stack` over the variables gives a
+    locations × steps × variables cube. Variables missing for a location are NaN (NaT for timestamps).
+
+    All responses must share the same time axis, as they do for one multi-location request.
+    """
+    _require_numpy()
+    if not responses:
+        raise ValueError("No responses to convert")
+    scalar = section == "current"
+    sections = [_section(response, section) for response in responses]
+    axis = (sections[0].Time(), sections[0].TimeEnd(), sections[0].Interval())
+    for other in sections[1:]:
+        if (other.Time(), other.TimeEnd(), other.Interval()) != axis:
+            raise ValueError("Responses have different time axes and cannot be stacked")
+
+    time = time_axis(sections[0], scalar)
+    result = {
+        "time": time,
+        "latitude": np.array([response.Latitude() for response in responses], dtype=np.float32),
+        "longitude": np.array([response.Longitude() for response in responses], dtype=np.float32),
+        "elevation": np.array([response.Elevation() for response in responses], dtype=np.float32),
+    }
+    for location, variables in enumerate(map(index_variables, sections)):
+        for name, variable in variables.items():
+            values = _values(variable, scalar)
+            column = result.get(name)
+            if column is None:
+                missing = np.datetime64("NaT") if values.dtype.kind == "M" else np.nan
+                column = result[name] = np.full((len(responses), len(time)), missing, dtype=values.dtype)
+            column[location] = values
+    return result
+
+
+def to_dataframe(responses: list[WeatherApiResponse], section: str = "hourly"):
+    """Convert one section of all responses to a long `pandas.DataFrame`.
+
+    There is one row per location and time step, with the columns `location` (position in `responses`),
+    `date` (UTC), `latitude`, `longitude`, `elevation` and one column per weather variable.
+    """
+    try:
+        import pandas as pd
+    except ImportError as e:  # pragma: no cover - pandas is optional
+        raise ImportError("pandas is required for to_dataframe: pip install pandas") from e
+
+    arrays = to_numpy(responses, section)
+    locations, steps = len(responses), len(arrays["time"])
+    data = {
+        "location": np.repeat(np.arange(locations), steps),
+        "date": pd.to_datetime(np.tile(arrays["time"], locations), utc=True),
+    }
+    for key in METADATA_KEYS[1:]:
+        data[key] = np.repeat(arrays[key], steps)
+    for name, values in arrays.items():
+        if name in METADATA_KEYS:
+            continue
+        values = values.reshape(-1)
+        data[name] = pd.to_datetime(values, utc=True) if values.dtype.kind == "M" else values
+    return pd.DataFrame(data)
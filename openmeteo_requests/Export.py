@@ -0,0 +1,283 @@
+"""Resumable bulk export of historical weather for many sites to partitioned Parquet files
+
+    openmeteo-export sites.csv --start 2000-01-01 --end 2023-12-31 --hourly temperature_2m,precipitation \
+        --output archive/
+
+The site list is a CSV file with `latitude` and `longitude` columns and an optional `id` column. Sites are
+batched into multi-location requests and the date range is split by calendar year. Each batch and year is one
+task that writes `<section>/year=<year>/part-<batch>.parquet`, so memory holds at most `concurrency` tasks.
+
+Parts are written to a temporary name and renamed when complete: an interrupted export is resumed by running
+the same command again, which skips every part that already exists.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date
+from typing import Callable, NamedTuple
+
+from openmeteo_sdk.WeatherApiResponse import WeatherApiResponse
+
+from openmeteo_requests.Client import Client, decode_frames
+from openmeteo_requests.Convert import METADATA_KEYS, to_numpy
+from openmeteo_requests.RateLimiter import RateLimiter
+
+ARCHIVE_URL = "https://archive-api.open-meteo.com/v1/archive"
+JOB_FILE = "_job.json"
+
+
+class Site(NamedTuple):
+    """A location to export"""
+
+    id: str
+    latitude: float
+    longitude: float
+
+
+class Task(NamedTuple):
+    """One upstream request: a batch of sites over part of the date range"""
+
+    batch: int
+    year: int
+    start: date
+    end: date
+    sites: list
+
+
+def read_sites(path: str) -> list[Site]:
+    """Read sites from a CSV file with `latitude`, `longitude` and optionally `id` columns"""
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        missing = {"latitude", "longitude"} - set(reader.fieldnames or ())
+        if missing:
+            raise ValueError(f"Site list {path} is missing columns: {', '.join(sorted(missing))}")
+        return [
+            Site(row.get("id") or str(i), float(row["latitude"]), float(row["longitude"]))
+            for i, row in enumerate(reader)
+        ]
+
+
+def plan_tasks(sites: list[Site], start: date, end: date, batch_size: int) -> list[Task]:
+    """Split the export into batches of sites and calendar years"""
+    if end < start:
+        raise ValueError("End date is before start date")
+    tasks = []
+    for year in range(start.year, end.year + 1):
+        year_start = max(start, date(year, 1, 1))
+        year_end = min(end, date(year, 12, 31))
+        for batch, first in enumerate(range(0, len(sites), batch_size)):
+            tasks.append(Task(batch, year, year_start, year_end, sites[first : first + batch_size]))
+    return tasks
+
+
+def _to_table(sites: list[Site], arrays: dict):
+    """Long table with one row per site and time step"""
+    import numpy as np
+    import pyarrow as pa
+
+    locations, steps = len(sites), len(arrays["time"])
+    timestamp = pa.timestamp("s", tz="UTC")
+    columns = {
+        "site_id": pa.array(np.repeat([site.id for site in sites], steps)),
+        "latitude": np.repeat([site.latitude for site in sites], steps),
+        "longitude": np.repeat([site.longitude for site in sites], steps),
+        "elevation": np.repeat(arrays["elevation"], steps),
+        "time": pa.array(np.tile(arrays["time"], locations), type=timestamp),
+    }
+    for name, values in arrays.items():
+        if name not in METADATA_KEYS:
+            values = values.reshape(-1)
+            columns[name] = pa.array(values, type=timestamp) if values.dtype.kind == "M" else values
+    return pa.table(columns)
+
+
+class ExportJob:
+    """Export historical weather for many sites to partitioned Parquet files
+
+    Requests run on `concurrency` threads that share one `RateLimiter`. Failed tasks are retried `retries`
+    times with exponential backoff; tasks that still fail are reported by `run` and retried on the next run.
+    """
+
+    # pylint: disable=too-many-arguments,too-many-instance-attributes
+    def __init__(
+        self,
+        sites: list[Site],
+        start: date,
+        end: date,
+        output: str,
+        hourly: list[str] = (),
+        daily: list[str] = (),
+        url: str = ARCHIVE_URL,
+        models: str | None = None,
+        batch_size: int = 50,
+        concurrency: int = 4,
+        rate_limit: float = 2.0,
+        retries: int = 3,
+        client_factory: Callable[[RateLimiter], Client] | None = None,
+    ):
+        if not hourly and not daily:
+            raise ValueError("Nothing to export: give hourly and/or daily variables")
+        self.sites = sites
+        self.start = start
+        self.end = end
+        self.output = output
+        self.sections = {name: list(values) for name, values in (("hourly", hourly), ("daily", daily)) if values}
+        self.url = url
+        self.models = models
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.retries = retries
+        self.rate_limiter = RateLimiter(rate_limit, burst=max(1, concurrency), max_wait=300.0)
+        self.client_factory = client_factory or (lambda limiter: Client(rate_limiter=limiter, timeout=300))
+        # requests sessions are not thread-safe, so each thread gets its own client
+        self._local = threading.local()
+
+    def _client(self) -> Client:
+        if getattr(self._local, "client", None) is None:
+            self._local.client = self.client_factory(self.rate_limiter)
+        return self._local.client
+
+    def describe(self) -> dict:
+        """Parameters that must not change when an export is resumed"""
+        sites = hashlib.sha256(json.dumps([list(site) for site in self.sites]).encode()).hexdigest()
+        return {
+            "url": self.url,
+            "sections": self.sections,
+            "models": self.models,
+            "start": self.start.isoformat(),
+            "end": self.end.isoformat(),
+            "batch_size": self.batch_size,
+            "sites": sites,
+        }
+
+    def _check_job_file(self):
+        path = os.path.join(self.output, JOB_FILE)
+        description = self.describe()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                if json.load(f) != description:
+                    raise ValueError(f"{self.output} holds a different export; use a new output directory")
+        else:
+            os.makedirs(self.output, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(description, f, indent=2)
+
+    def part_paths(self, task: Task) -> dict[str, str]:
+        """Output file of a task for each section"""
+        return {
+            section: os.path.join(self.output, section, f"year={task.year}", f"part-{task.batch:05d}.parquet")
+            for section in self.sections
+        }
+
+    def is_done(self, task: Task) -> bool:
+        """Whether all files of a task were written by an earlier run"""
+        return all(os.path.exists(path) for path in self.part_paths(task).values())
+
+    def _params(self, task: Task) -> dict:
+        params = {
+            "latitude": [site.latitude for site in task.sites],
+            "longitude": [site.longitude for site in task.sites],
+            "start_date": task.start.isoformat(),
+            "end_date": task.end.isoformat(),
+            **self.sections,
+        }
+        if self.models:
+            params["models"] = self.models
+        return params
+
+    def run_task(self, task: Task):
+        """Fetch one task and write its Parquet files, retrying failures"""
+        import pyarrow.parquet as pq
+
+        for attempt in range(self.retries + 1):
+            try:
+                data = self._client().fetch_raw(self.url, self._params(task), method="POST")
+                break
+            except Exception:  # pylint: disable=broad-except
+                if attempt == self.retries:
+                    raise
+                time.sleep(2**attempt)
+
+        responses = decode_frames(WeatherApiResponse, data)
+        if len(responses) != len(task.sites):
+            raise ValueError(f"Expected {len(task.sites)} locations, got {len(responses)}")
+        for section, path in self.part_paths(task).items():
+            table = _to_table(task.sites, to_numpy(responses, section))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            partial = path + ".partial"
+            pq.write_table(table, partial)
+            os.replace(partial, path)
+
+    def run(self, progress: Callable[[int, int], None] | None = None) -> dict:
+        """Run all remaining tasks and return counts of `done`, `skipped` and `failed` tasks"""
+        self._check_job_file()
+        tasks = plan_tasks(self.sites, self.start, self.end, self.batch_size)
+        pending = [task for task in tasks if not self.is_done(task)]
+        summary = {"total": len(tasks), "skipped": len(tasks) - len(pending), "done": 0, "failed": 0, "errors": []}
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            futures = {pool.submit(self.run_task, task): task for task in pending}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                    summary["done"] += 1
+                except Exception as e:  # pylint: disable=broad-except
+                    task = futures[future]
+                    summary["failed"] += 1
+                    summary["errors"].append(f"batch {task.batch} year {task.year}: {e}")
+                if progress is not None:
+                    progress(summary["skipped"] + summary["done"] + summary["failed"], summary["total"])
+        return summary
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Export historical weather for many sites to Parquet")
+    parser.add_argument("sites", help="CSV file with latitude, longitude and optional id columns")
+    parser.add_argument("--start", required=True, type=date.fromisoformat, help="First day, YYYY-MM-DD")
+    parser.add_argument("--end", required=True, type=date.fromisoformat, help="Last day, YYYY-MM-DD")
+    parser.add_argument("--output", required=True, help="Output directory, also used to resume")
+    parser.add_argument("--hourly", default="", help="Comma separated hourly variables")
+    parser.add_argument("--daily", default="", help="Comma separated daily variables")
+    parser.add_argument("--url", default=ARCHIVE_URL, help="API endpoint")
+    parser.add_argument("--models", help="Weather models, e.g. era5_seamless")
+    parser.add_argument("--batch-size", type=int, default=50, help="Sites per upstream request")
+    parser.add_argument("--concurrency", type=int, default=4, help="Requests in flight")
+    parser.add_argument("--rate-limit", type=float, default=2.0, help="Upstream requests per second")
+    args = parser.parse_args(argv)
+
+    job = ExportJob(
+        read_sites(args.sites),
+        args.start,
+        args.end,
+        args.output,
+        hourly=[v for v in args.hourly.split(",") if v],
+        daily=[v for v in args.daily.split(",") if v],
+        url=args.url,
+        models=args.models,
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        rate_limit=args.rate_limit,
+    )
+    summary = job.run(lambda finished, total: print(f"{finished}/{total} parts", file=sys.stderr))
+    for error in summary["errors"]:
+        print(f"Failed: {error}", file=sys.stderr)
+    print(
+        f"{summary['done']} written, {summary['skipped']} already done, {summary['failed']} failed", file=sys.stderr
+    )
+    if summary["failed"]:
+        print("Run the same command again to resume", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""Hedged requests for upstream API calls"""
+
+from __future__ import annotations
+
+import collections
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, TypeVar
+
+T = TypeVar("T")
+
+
+class Hedger:
+    """Request hedging
+
+    A few upstream calls take many times the median and dominate the tail latency. When a call has not answered
+    after the `percentile` of recent latencies, the hedger sends a duplicate and returns whichever answers first.
+    The other one is cancelled: it is not sent if it has not started yet, and its response is closed unread.
+    The delay counts from when the call is sent, not from when it was queued for one of the `max_workers` threads,
+    and no duplicate is sent while all of them are busy: it would only wait in the queue and add to the load.
+
+    Every call earns `budget` hedges, up to `burst` saved, so duplicates add at most that share of extra load.
+    Until `min_samples` latencies are known there is no delay to hedge after and calls are sent once.
+
+    Only use it for idempotent requests; `Client` hedges GETs only.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        budget: float = 0.05,
+        burst: float = 5.0,
+        window: int = 200,
+        min_samples: int = 20,
+        min_delay: float = 0.05,
+        max_workers: int = 16,
+    ):
+        if not 0 < percentile < 100:
+            raise ValueError("percentile must be between 0 and 100")
+        self.percentile = percentile
+        self.budget = budget
+        self.burst = burst
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._latencies: collections.deque[float] = collections.deque(maxlen=window)
+        self._credit = 0.0
+        self._calls = 0
+        self._hedged = 0
+        self._hedge_wins = 0
+        self._busy = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="openmeteo-hedge")
+
+    def delay(self) -> float | None:
+        """Seconds to wait for an answer before hedging, None while too few latencies are known"""
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            latencies = sorted(self._latencies)
+        index = min(len(latencies) - 1, int(len(latencies) * self.percentile / 100))
+        return max(self.min_delay, latencies[index])
+
+    def record(self, seconds: float):
+        """Report the latency of a call that was answered"""
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def _take_hedge(self, admit: Callable[[], bool] | None) -> bool:
+        """Spend one hedge of the budget if one is saved up, a thread is free and `admit` allows it"""
+        with self._lock:
+            if self._credit < 1.0 or self._busy >= self.max_workers:
+                return False
+            self._credit -= 1.0
+        if admit is not None and not admit():
+            with self._lock:
+                self._credit += 1.0
+            return False
+        with self._lock:
+            self._hedged += 1
+        return True
+
+    def _attempt(
+        self, send: Callable[[threading.Event], T], cancelled: threading.Event, started: threading.Event | None = None
+    ) -> T | None:
+        with self._lock:
+            self._busy += 1
+        try:
+            if started is not None:
+                started.set()
+            if cancelled.is_set():
+                return None
+            start = time.monotonic()
+            result = send(cancelled)
+            # Slow calls that lost are recorded too, so the delay keeps following the real tail
+            self.record(time.monotonic() - start)
+            return result
+        finally:
+            with self._lock:
+                self._busy -= 1
+
+    def run(self, send: Callable[[threading.Event], T], admit: Callable[[], bool] | None = None) -> T:
+        """Call `send`, and once more if the first call is slow; return the first answer
+
+        `send` is given an event that is set once the call is no longer needed, so it can close its response.
+        `admit` is asked before a duplicate is sent, e.g. to take a rate limiter token without waiting.
+        An attempt that fails while the other is still running is not an answer; the other one is awaited.
+        """
+        with self._lock:
+            self._calls += 1
+            self._credit = min(self.burst, self._credit + self.budget)
+        delay = self.delay()
+        cancelled = threading.Event()
+        started = threading.Event()
+        primary = self._executor.submit(self._attempt, send, cancelled, started)
+        pending = {primary}
+        if delay is not None:
+            started.wait()
+            if not wait(pending, timeout=delay).done and self._take_hedge(admit):
+                pending.add(self._executor.submit(self._attempt, send, cancelled))
+
+        while True:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            winner = min(done, key=lambda future: future.exception() is not None)
+            if winner.exception() is None or not pending:
+                break
+        cancelled.set()
+        for future in pending:
+            future.cancel()
+        if winner is not primary and winner.exception() is None:
+            with self._lock:
+                self._hedge_wins += 1
+        return winner.result()
+
+    def stats(self) -> dict:
+        """Calls, hedges sent and hedges that answered first, with the current hedge delay"""
+        delay = self.delay()
+        with self._lock:
+            return {"calls": self._calls, "hedged": self._hedged, "hedge_wins": self._hedge_wins, "delay": delay}
+
+    def __del__(self):
+        """cleanup"""
+        if getattr(self, "_executor", None) is not None:
+            self._executor.shutdown(wait=False)
@@ -0,0 +1,139 @@
+"""Multi-process decoding of large multi-location responses into NumPy arrays"""
+
+from __future__ import annotations
+
+import mmap
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from openmeteo_sdk.WeatherApiResponse import WeatherApiResponse
+
+from openmeteo_requests.Client import decode_frames
+from openmeteo_requests.Convert import (
+    METADATA_KEYS,
+    _require_numpy,
+    _section,
+    _values,
+    index_variables,
+    time_axis,
+    to_numpy,
+)
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None
+
+# Frames per task, enough to amortize the task overhead while keeping all workers busy
+_MIN_CHUNK = 16
+
+# State handed to the workers by fork: the raw frames and the shared output views
+_worker = {}
+_worker_lock = threading.Lock()
+
+
+def frame_offsets(data: bytes | memoryview) -> list[int]:
+    """Positions of the length prefixes of all frames in `data`"""
+    offsets = []
+    total = len(data)
+    pos = 0
+    while pos < total:
+        offsets.append(pos)
+        pos += int.from_bytes(data[pos : pos + 4], byteorder="little") + 4
+    return offsets
+
+
+def _shared_arrays(first: WeatherApiResponse, section: str, locations: int) -> dict[str, np.ndarray]:
+    """Output arrays for all locations, backed by one anonymous shared mapping"""
+    scalar = section == "current"
+    steps = len(time_axis(_section(first, section), scalar))
+    arrays = {key: (np.dtype(np.float32), (locations,)) for key in METADATA_KEYS[1:]}
+    for name, variable in index_variables(_section(first, section)).items():
+        arrays[name] = (_values(variable, scalar).dtype, (locations, steps))
+
+    offsets, size = {}, 0
+    for name, (dtype, shape) in arrays.items():
+        offsets[name] = size
+        # Keep every array 8-byte aligned
+        size += -(-int(np.prod(shape)) * dtype.itemsize // 8) * 8
+    # MAP_SHARED: pages written by forked workers are visible to the parent. The arrays keep the mapping alive.
+    buffer = mmap.mmap(-1, max(1, size))
+    return {
+        name: np.ndarray(shape, dtype=dtype, buffer=buffer, offset=offsets[name])
+        for name, (dtype, shape) in arrays.items()
+    }
+
+
+def _decode_range(first_location: int, offsets: list[int]) -> list[str]:
+    """Decode frames into the shared output, returning names of variables missing from the layout"""
+    data = _worker["data"]
+    views = _worker["views"]
+    section_name = _worker["section"]
+    scalar = section_name == "current"
+    unexpected = set()
+    for location, offset in enumerate(offsets, first_location):
+        response = WeatherApiResponse.GetRootAs(data, offset + 4)
+        section = _section(response, section_name)
+        if (section.Time(), section.TimeEnd(), section.Interval()) != _worker["axis"]:
+            raise ValueError("Responses have different time axes and cannot be stacked")
+        views["latitude"][location] = response.Latitude()
+        views["longitude"][location] = response.Longitude()
+        views["elevation"][location] = response.Elevation()
+        found = index_variables(section)
+        for name, view in views.items():
+            if view.ndim == 1:
+                continue
+            variable = found.pop(name, None)
+            if variable is not None:
+                view[location] = _values(variable, scalar)
+            else:
+                view[location] = np.datetime64("NaT") if view.dtype.kind == "M" else np.nan
+        unexpected.update(found)
+    return sorted(unexpected)
+
+
+def to_numpy_parallel(data: bytes, section: str = "hourly", workers: int | None = None) -> dict[str, np.ndarray]:
+    """Decode raw frames, e.g. from `Client.fetch_raw`, into the arrays `to_numpy` returns, using a process pool.
+
+    Workers are forked with the raw frames already in memory and write their range of locations straight into
+    an anonymous shared mapping that backs the returned arrays, so neither the response nor the arrays are
+    pickled or copied. Worth it for archive requests with thousands of locations; for small responses
+    `to_numpy` is faster. Without `fork` (Windows) this falls back to `to_numpy`.
+
+    All locations must have the same variables and time axis, as they do for one request.
+    """
+    _require_numpy()
+    if "fork" not in multiprocessing.get_all_start_methods():  # pragma: no cover - Windows
+        return to_numpy(decode_frames(WeatherApiResponse, data), section)
+    offsets = frame_offsets(data)
+    if not offsets:
+        raise ValueError("No responses to convert")
+    first = WeatherApiResponse.GetRootAs(data, 4)
+    first_section = _section(first, section)
+    views = _shared_arrays(first, section, len(offsets))
+    workers = workers or os.cpu_count() or 1
+    chunk = max(_MIN_CHUNK, -(-len(offsets) // (workers * 4)))
+
+    with _worker_lock:
+        _worker.update(
+            data=data,
+            views=views,
+            section=section,
+            axis=(first_section.Time(), first_section.TimeEnd(), first_section.Interval()),
+        )
+        try:
+            context = multiprocessing.get_context("fork")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                ranges = range(0, len(offsets), chunk)
+                tasks = [pool.submit(_decode_range, start, offsets[start : start + chunk]) for start in ranges]
+                unexpected = sorted({name for task in tasks for name in task.result()})
+        finally:
+            _worker.clear()
+    if unexpected:
+        raise ValueError(f"Variables missing from the first location: {', '.join(unexpected)}")
+
+    result = {"time": time_axis(first_section, section == "current")}
+    result.update(views)
+    return result
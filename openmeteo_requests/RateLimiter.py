@@ -0,0 +1,99 @@
+"""Token bucket rate limiter for upstream API calls"""
+
+from __future__ import annotations
+
+import os
+import struct
+import threading
+import time
+from typing import Callable
+
+# Shared bucket state: tokens left and the monotonic time they were counted at
+_STATE = struct.Struct("<dd")
+# Longest pause; a shared state paused for longer is from before a reboot reset the monotonic clock
+MAX_PAUSE = 3600.0
+
+
+class RateLimiter:
+    """Token bucket limiter
+
+    Tokens refill at `rate` per second up to `burst`. Every upstream call takes one token.
+
+    By default the bucket lives in this process. Pass `path` to share one bucket between all processes on the
+    host (e.g. gunicorn workers): the bucket state is kept in that file and updated under an exclusive `flock`.
+    Shared buckets rely on `time.monotonic()` being system wide, which holds on Linux and macOS. The clock starts
+    over at boot, so a state file that survived a reboot and is further ahead than `MAX_PAUSE` is reset to a full
+    bucket.
+    """
+
+    def __init__(self, rate: float, burst: float | None = None, max_wait: float = 5.0, path: str | None = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1.0, rate))
+        self.max_wait = max_wait
+        self.path = path
+        self._lock = threading.Lock()
+        self._state = (self.burst, time.monotonic())
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644) if path is not None else None
+
+    def _take(self, state: tuple[float, float], now: float) -> tuple[tuple[float, float], float]:
+        """Refill the bucket and take one token. Returns the new state and the seconds to wait (0 if taken)."""
+        tokens, updated = state
+        if updated > now:
+            # Paused until `updated`
+            return state, updated - now
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens >= 1.0:
+            return (tokens - 1.0, now), 0.0
+        return (tokens, now), (1.0 - tokens) / self.rate
+
+    def _update(self, func: Callable[[tuple[float, float], float], tuple[tuple[float, float], float]]) -> float:
+        """Apply `func` to the bucket state atomically, in this process or across processes"""
+        if self._fd is None:
+            with self._lock:
+                self._state, result = func(self._state, time.monotonic())
+                return result
+
+        import fcntl  # pylint: disable=import-outside-toplevel
+
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                now = time.monotonic()
+                raw = os.pread(self._fd, _STATE.size, 0)
+                state = _STATE.unpack(raw) if len(raw) == _STATE.size else (self.burst, now)
+                # Written before a reboot, or not a state at all (NaN)
+                if not state[1] <= now + MAX_PAUSE:
+                    state = (self.burst, now)
+                state, result = func(state, now)
+                os.pwrite(self._fd, _STATE.pack(*state), 0)
+                return result
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def try_acquire(self) -> float:
+        """Take a token if one is available. Returns 0 on success or the seconds until the next token."""
+        return self._update(self._take)
+
+    def acquire(self, max_wait: float | None = None) -> bool:
+        """Block until a token is available. Returns False if that would take longer than `max_wait` seconds."""
+        max_wait = self.max_wait if max_wait is None else max_wait
+        deadline = time.monotonic() + max_wait
+        while True:
+            wait = self.try_acquire()
+            if wait == 0.0:
+                return True
+            if time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Hand out no tokens for `seconds`, at most MAX_PAUSE, e.g. after the upstream answered 429 with Retry-After"""
+        seconds = min(seconds, MAX_PAUSE)
+        self._update(lambda state, now: ((0.0, max(state[1], now + seconds)), 0.0))
+
+    def __del__(self):
+        """cleanup"""
+        if getattr(self, "_fd", None) is not None:
+            os.close(self._fd)
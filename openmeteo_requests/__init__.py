@@ -1,5 +1,25 @@
 from __future__ import annotations
 
-from openmeteo_requests.Client import Client
+from openmeteo_requests.CircuitBreaker import CircuitBreaker
+from openmeteo_requests.Client import CircuitOpenError, Client, OpenMeteoRequestsError, RateLimitError, decode_frames
+from openmeteo_requests.Convert import index_variables, time_axis, to_dataframe, to_numpy, variable_name
+from openmeteo_requests.Hedger import Hedger
+from openmeteo_requests.Parallel import to_numpy_parallel
+from openmeteo_requests.RateLimiter import RateLimiter
 
-__all__ = ["Client"]
+__all__ = [
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "Client",
+    "Hedger",
+    "OpenMeteoRequestsError",
+    "RateLimitError",
+    "RateLimiter",
+    "decode_frames",
+    "index_variables",
+    "time_axis",
+    "to_dataframe",
+    "to_numpy",
+    "to_numpy_parallel",
+    "variable_name",
+]
@@ -8,6 +8,8 @@ from __future__ import annotations
 
 from typing import List
 
+import flatbuffers
+import numpy as np
 import pytest
 from _pytest.nodes import Item
 
@@ -24,3 +26,60 @@ def pytest_collection_modifyitems(items: list[Item]):
 def unit_test_mocks(monkeypatch: None):
     """Include Mocks here to execute all commands offline and fast."""
     pass
+
+
+def _encode_variable(builder, key, values):
+    variable, altitude, aggregation = key
+    values = np.asarray(values)
+    vector = builder.CreateNumpyVector(values) if values.ndim else None
+    builder.StartObject(13)
+    builder.PrependUint8Slot(0, variable, 0)
+    if vector is None:
+        builder.PrependFloat32Slot(2, float(values), 0.0)
+    else:
+        builder.PrependUOffsetTRelativeSlot(4 if values.dtype == np.int64 else 3, vector, 0)
+    builder.PrependInt16Slot(5, altitude, 0)
+    builder.PrependUint8Slot(6, aggregation, 0)
+    return builder.EndObject()
+
+
+def _encode_section(builder, start, interval, variables):
+    offsets = [_encode_variable(builder, key, values) for key, values in variables.items()]
+    steps = max((np.size(values) for values in variables.values()), default=1)
+    builder.StartVector(4, len(offsets), 4)
+    for offset in reversed(offsets):
+        builder.PrependUOffsetTRelative(offset)
+    vector = builder.EndVector()
+    builder.StartObject(4)
+    builder.PrependInt64Slot(0, start, 0)
+    builder.PrependInt64Slot(1, start + steps * interval, 0)
+    builder.PrependInt32Slot(2, interval, 0)
+    builder.PrependUOffsetTRelativeSlot(3, vector, 0)
+    return builder.EndObject()
+
+
+def encode_response(latitude: float, longitude: float, location_id: int = 0, **sections) -> bytes:
+    """Encode one length-prefixed WeatherApiResponse frame.
+
+    Each section is `(start, interval, {(Variable, altitude, Aggregation): values})`. Float32 arrays
+    become `Values`, int64 arrays `ValuesInt64` and scalars `Value`.
+    """
+    builder = flatbuffers.Builder(1024)
+    # Table slots of WeatherApiResponse.current/daily/hourly/minutely_15
+    slots = {"current": 9, "daily": 10, "hourly": 11, "minutely_15": 12}
+    offsets = {slots[name]: _encode_section(builder, *section) for name, section in sections.items()}
+    builder.StartObject(15)
+    builder.PrependFloat32Slot(0, latitude, 0.0)
+    builder.PrependFloat32Slot(1, longitude, 0.0)
+    builder.PrependInt32Slot(4, location_id, 0)
+    for slot, offset in offsets.items():
+        builder.PrependUOffsetTRelativeSlot(slot, offset, 0)
+    builder.Finish(builder.EndObject())
+    frame = bytes(builder.Output())
+    return len(frame).to_bytes(4, "little") + frame
+
+
+@pytest.fixture
+def encode_frames():
+    """Encoder for offline responses, see `encode_response`"""
+    return encode_response
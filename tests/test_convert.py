@@ -0,0 +1,89 @@
+"""Test conversion to NumPy arrays and DataFrames"""
+from __future__ import annotations
+
+import numpy as np
+import pytest
+from openmeteo_sdk.Aggregation import Aggregation
+from openmeteo_sdk.Variable import Variable
+from openmeteo_sdk.WeatherApiResponse import WeatherApiResponse
+
+import openmeteo_requests
+from openmeteo_requests import index_variables, to_dataframe, to_numpy
+
+START = 1718928000  # 2024-06-21T00:00Z
+TEMPERATURE = (Variable.temperature, 2, Aggregation.none)
+PRECIPITATION = (Variable.precipitation, 0, Aggregation.none)
+
+
+def hourly(*values, precipitation=True):
+    variables = {TEMPERATURE: np.array(values, dtype=np.float32)}
+    if precipitation:
+        variables[PRECIPITATION] = np.zeros(len(values), dtype=np.float32)
+    return (START, 3600, variables)
+
+
+def test_index_variables_names(encode_frames):
+    daily = {
+        (Variable.temperature, 2, Aggregation.maximum): np.array([20.0], dtype=np.float32),
+        (Variable.wind_direction, 10, Aggregation.dominant): np.array([180.0], dtype=np.float32),
+        (Variable.sunrise, 0, Aggregation.none): np.array([START + 18000], dtype=np.int64),
+    }
+    data = encode_frames(52.5, 13.4, daily=(START, 86400, daily))
+    response = openmeteo_requests.decode_frames(WeatherApiResponse, data)[0]
+
+    index = index_variables(response.Daily())
+    assert list(index) == ["temperature_2m_max", "wind_direction_10m_dominant", "sunrise"]
+    assert index["sunrise"].ValuesInt64(0) == START + 18000
+
+
+def test_to_numpy_stacks_locations(encode_frames):
+    data = encode_frames(52.5, 13.4, hourly=hourly(1, 2, 3)) + encode_frames(
+        48.1, 9.3, 1, hourly=hourly(4, 5, 6, precipitation=False)
+    )
+    responses = openmeteo_requests.decode_frames(WeatherApiResponse, data)
+
+    arrays = to_numpy(responses)
+    assert arrays["time"].dtype == np.dtype("datetime64[s]")
+    assert str(arrays["time"][1]) == "2024-06-21T01:00:00"
+    assert arrays["latitude"] == pytest.approx([52.5, 48.1])
+    np.testing.assert_array_equal(arrays["temperature_2m"], [[1, 2, 3], [4, 5, 6]])
+    # Missing for the second location
+    assert np.isnan(arrays["precipitation"][1]).all()
+    assert np.stack([arrays["temperature_2m"], arrays["precipitation"]], axis=-1).shape == (2, 3, 2)
+
+
+def test_to_numpy_current_and_errors(encode_frames):
+    current = (START, 900, {TEMPERATURE: np.float32(21.5)})
+    response = openmeteo_requests.decode_frames(WeatherApiResponse, encode_frames(52.5, 13.4, current=current))[0]
+
+    arrays = to_numpy([response], "current")
+    assert arrays["temperature_2m"].tolist() == [[21.5]]
+    assert arrays["time"].shape == (1,)
+    with pytest.raises(ValueError, match="no hourly data"):
+        to_numpy([response])
+    with pytest.raises(ValueError, match="Unknown section"):
+        to_numpy([response], "yearly")
+
+
+def test_to_numpy_rejects_mismatched_time_axes(encode_frames):
+    data = encode_frames(52.5, 13.4, hourly=hourly(1, 2)) + encode_frames(48.1, 9.3, hourly=hourly(1, 2, 3))
+    with pytest.raises(ValueError, match="different time axes"):
+        to_numpy(openmeteo_requests.decode_frames(WeatherApiResponse, data))
+
+
+def test_to_dataframe(encode_frames):
+    data = encode_frames(52.5, 13.4, hourly=hourly(1, 2)) + encode_frames(48.1, 9.3, 1, hourly=hourly(3, 4))
+    df = to_dataframe(openmeteo_requests.decode_frames(WeatherApiResponse, data))
+
+    assert list(df.columns) == [
+        "location",
+        "date",
+        "latitude",
+        "longitude",
+        "elevation",
+        "temperature_2m",
+        "precipitation",
+    ]
+    assert df["location"].tolist() == [0, 0, 1, 1]
+    assert str(df["date"].iloc[3]) == "2024-06-21 01:00:00+00:00"
+    assert df["temperature_2m"].tolist() == [1, 2, 3, 4]
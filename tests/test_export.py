@@ -0,0 +1,116 @@
+"""Test the bulk Parquet export"""
+from __future__ import annotations
+
+import os
+from datetime import date, datetime, timezone
+
+import numpy as np
+import pyarrow.parquet as pq
+import pytest
+import requests
+from openmeteo_sdk.Aggregation import Aggregation
+from openmeteo_sdk.Variable import Variable
+
+import openmeteo_requests
+from openmeteo_requests.Export import ExportJob, Site, main, plan_tasks, read_sites
+
+
+class ArchiveSession:
+    """Answers archive requests with frames built from the request, failing for `fail_latitude`"""
+
+    def __init__(self, encode_frames, fail_latitude: float | None = None):
+        self.encode_frames = encode_frames
+        self.fail_latitude = fail_latitude
+        self.calls = []
+
+    def request(self, method, url, params=None, data=None, verify=None, timeout=None):
+        params = params or data
+        self.calls.append(params)
+        if self.fail_latitude in params["latitude"]:
+            raise requests.exceptions.ConnectionError("upstream down")
+        start = datetime.fromisoformat(params["start_date"]).replace(tzinfo=timezone.utc)
+        days = (date.fromisoformat(params["end_date"]) - start.date()).days + 1
+        frames = []
+        for latitude in params["latitude"]:
+            values = np.arange(days * 24, dtype=np.float32) + latitude
+            hourly = (int(start.timestamp()), 3600, {(Variable.temperature, 2, Aggregation.none): values})
+            frames.append(self.encode_frames(latitude, 0.0, hourly=hourly))
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b"".join(frames)
+        return response
+
+    def close(self):
+        pass
+
+
+SITES = [Site(f"s{i}", float(i), 0.0) for i in range(5)]
+
+
+def export_job(output, session, **kwargs):
+    factory = lambda limiter: openmeteo_requests.Client(session=session, rate_limiter=limiter)  # noqa: E731
+    return ExportJob(
+        SITES,
+        date(2022, 12, 30),
+        date(2023, 1, 1),
+        str(output),
+        hourly=["temperature_2m"],
+        batch_size=2,
+        concurrency=2,
+        rate_limit=1000,
+        retries=0,
+        client_factory=factory,
+        **kwargs,
+    )
+
+
+def test_read_sites_and_plan(tmp_path):
+    path = tmp_path / "sites.csv"
+    path.write_text("id,latitude,longitude\nberlin,52.52,13.41\n,48.1,9.3\n")
+    sites = read_sites(str(path))
+    assert sites == [Site("berlin", 52.52, 13.41), Site("1", 48.1, 9.3)]
+
+    tasks = plan_tasks(SITES, date(2022, 12, 30), date(2023, 1, 1), 2)
+    assert [(task.batch, task.year, len(task.sites)) for task in tasks] == [
+        (0, 2022, 2),
+        (1, 2022, 2),
+        (2, 2022, 1),
+        (0, 2023, 2),
+        (1, 2023, 2),
+        (2, 2023, 1),
+    ]
+    assert tasks[3].start == date(2023, 1, 1)
+
+
+def test_export_resumes_after_failure(tmp_path, encode_frames):
+    failing = ArchiveSession(encode_frames, fail_latitude=4.0)
+    summary = export_job(tmp_path, failing).run()
+    assert (summary["done"], summary["failed"]) == (4, 2)
+    assert "upstream down" in summary["errors"][0]
+
+    working = ArchiveSession(encode_frames)
+    summary = export_job(tmp_path, working).run()
+    assert (summary["skipped"], summary["done"], summary["failed"]) == (4, 2, 0)
+    assert len(working.calls) == 2
+
+    table = pq.read_table(str(tmp_path / "hourly")).to_pandas()
+    assert len(table) == 5 * 3 * 24
+    site = table[table["site_id"] == "s3"].sort_values("time")
+    assert site["temperature_2m"].iloc[0] == 3.0
+    assert str(site["time"].iloc[0]) == "2022-12-30 00:00:00+00:00"
+    assert not [name for _, _, files in os.walk(tmp_path) for name in files if name.endswith(".partial")]
+
+
+def test_changed_job_is_refused(tmp_path, encode_frames):
+    export_job(tmp_path, ArchiveSession(encode_frames)).run()
+    job = export_job(tmp_path, ArchiveSession(encode_frames))
+    job.sections["hourly"].append("precipitation")
+    with pytest.raises(ValueError, match="different export"):
+        job.run()
+
+
+def test_main_requires_variables(tmp_path):
+    path = tmp_path / "sites.csv"
+    path.write_text("latitude,longitude\n52.52,13.41\n")
+    with pytest.raises(ValueError, match="Nothing to export"):
+        main([str(path), "--start", "2023-01-01", "--end", "2023-01-02", "--output", str(tmp_path / "out")])
@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 import pytest
+import requests
 from openmeteo_sdk.Variable import Variable
 
 import openmeteo_requests
@@ -54,3 +55,45 @@ def test_int_client():
     This test is marked implicitly as an integration test because the name contains "_init_"
     https://docs.pytest.org/en/6.2.x/example/markers.html#automatically-adding-markers-based-on-test-names
     """
+
+
+class DictCache:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ttl):
+        self.data[key] = value
+        return True
+
+
+class RawSession:
+    def __init__(self, content: bytes):
+        self.content = content
+        self.calls = []
+
+    def request(self, method, url, params=None, data=None, verify=None, timeout=None):
+        self.calls.append(params or data)
+        response = requests.Response()
+        response.status_code = 200
+        response._content = self.content
+        return response
+
+    def close(self):
+        pass
+
+
+def test_fetch_raw_caches_frames():
+    session = RawSession(b"\x00\x00\x00\x00")
+    cache = DictCache()
+    om = openmeteo_requests.Client(session=session, cache=cache)
+    params = {"latitude": 52.54, "longitude": 13.41, "hourly": ["temperature_2m"]}
+
+    assert om.fetch_raw("https://example.invalid", params) == b"\x00\x00\x00\x00"
+    assert om.fetch_raw("https://example.invalid", dict(params)) == b"\x00\x00\x00\x00"
+    assert len(session.calls) == 1
+    assert session.calls[0]["format"] == "flatbuffers"
+    assert "format" not in params
+    assert list(cache.data.values()) == [b"\x00\x00\x00\x00"]
@@ -0,0 +1,60 @@
+"""Test multi-process decoding"""
+from __future__ import annotations
+
+import numpy as np
+import pytest
+from openmeteo_sdk.Aggregation import Aggregation
+from openmeteo_sdk.Variable import Variable
+from openmeteo_sdk.WeatherApiResponse import WeatherApiResponse
+
+import openmeteo_requests
+from openmeteo_requests import to_numpy, to_numpy_parallel
+from openmeteo_requests.Parallel import frame_offsets
+
+START = 1718928000
+TEMPERATURE = (Variable.temperature, 2, Aggregation.none)
+SUNRISE = (Variable.sunrise, 0, Aggregation.none)
+
+
+def batch(encode_frames, locations: int, steps: int = 24) -> bytes:
+    frames = []
+    for i in range(locations):
+        hourly = {
+            TEMPERATURE: np.arange(steps, dtype=np.float32) + i,
+            SUNRISE: np.full(steps, START + i, dtype=np.int64),
+        }
+        frames.append(encode_frames(40 + i * 0.1, 10 - i * 0.1, i, hourly=(START, 3600, hourly)))
+    return b"".join(frames)
+
+
+def test_frame_offsets(encode_frames):
+    data = batch(encode_frames, 3)
+    offsets = frame_offsets(data)
+    assert len(offsets) == 3
+    assert offsets[0] == 0
+
+
+def test_matches_serial_conversion(encode_frames):
+    data = batch(encode_frames, 40)
+
+    parallel = to_numpy_parallel(data, workers=2)
+    serial = to_numpy(openmeteo_requests.decode_frames(WeatherApiResponse, data))
+    assert list(parallel) == list(serial)
+    for name, values in serial.items():
+        np.testing.assert_array_equal(parallel[name], values)
+
+
+def test_rejects_mismatched_time_axes(encode_frames):
+    data = batch(encode_frames, 20) + batch(encode_frames, 1, steps=12)
+    with pytest.raises(ValueError, match="different time axes"):
+        to_numpy_parallel(data, workers=2)
+
+
+def test_rejects_variables_missing_from_the_layout(encode_frames):
+    extra = {
+        TEMPERATURE: np.zeros(24, dtype=np.float32),
+        (Variable.precipitation, 0, Aggregation.none): np.zeros(24, dtype=np.float32),
+    }
+    data = batch(encode_frames, 1) + encode_frames(1, 2, hourly=(START, 3600, extra))
+    with pytest.raises(ValueError, match="precipitation"):
+        to_numpy_parallel(data, workers=1)
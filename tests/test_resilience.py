@@ -0,0 +1,310 @@
+"""Test rate limiter, circuit breaker and request hedging"""
+from __future__ import annotations
+
+import os
+import struct
+import tempfile
+import threading
+import time
+
+import pytest
+import requests
+
+import openmeteo_requests
+from openmeteo_requests import (
+    CircuitBreaker,
+    CircuitOpenError,
+    Hedger,
+    OpenMeteoRequestsError,
+    RateLimiter,
+    RateLimitError,
+)
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, headers: dict | None = None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = b""
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+    def json(self):
+        return {"error": True, "reason": "fake"}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(str(self.status_code))
+
+
+class FakeSession:
+    def __init__(self, responses: list):
+        self.responses = list(responses)
+        self.calls = 0
+        self.timeout = None
+
+    def request(self, *args, **kwargs):
+        self.calls += 1
+        self.timeout = kwargs.get("timeout")
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    def close(self):
+        pass
+
+
+def test_rate_limiter_burst_then_wait():
+    limiter = RateLimiter(rate=10, burst=3)
+    assert [limiter.try_acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.try_acquire() == pytest.approx(0.1, abs=0.02)
+    assert limiter.acquire(max_wait=0.5)
+
+
+def test_rate_limiter_gives_up_after_max_wait():
+    limiter = RateLimiter(rate=0.5, burst=1)
+    assert limiter.acquire(max_wait=0)
+    assert not limiter.acquire(max_wait=0.1)
+
+
+def test_rate_limiter_pause():
+    limiter = RateLimiter(rate=1000, burst=10)
+    limiter.pause(0.3)
+    assert limiter.try_acquire() == pytest.approx(0.3, abs=0.05)
+
+
+def test_rate_limiter_shared_between_instances():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bucket")
+        first = RateLimiter(rate=0.1, burst=2, path=path)
+        second = RateLimiter(rate=0.1, burst=2, path=path)
+        assert first.try_acquire() == 0.0
+        assert second.try_acquire() == 0.0
+        assert first.try_acquire() > 0
+        assert second.try_acquire() > 0
+
+
+def test_rate_limiter_resets_a_shared_state_from_before_a_reboot():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bucket")
+        # The monotonic clock of the previous boot was a day ahead of this one
+        with open(path, "wb") as f:
+            f.write(struct.pack("<dd", 0.0, time.monotonic() + 86400))
+        limiter = RateLimiter(rate=0.1, burst=2, path=path)
+        assert limiter.try_acquire() == 0.0
+        assert limiter.acquire(max_wait=0)
+
+        limiter.pause(86400)
+        assert limiter.try_acquire() == pytest.approx(3600, abs=1)
+
+
+def test_circuit_breaker_opens_and_recovers():
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+    assert breaker.retry_after() > 0
+
+    # Half-open lets exactly one probe through
+    time.sleep(0.06)
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    time.sleep(0.06)
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_client_fails_fast_when_circuit_open():
+    session = FakeSession([requests.exceptions.ConnectionError(), FakeResponse(503)])
+    om = openmeteo_requests.Client(session=session, circuit_breaker=CircuitBreaker(failure_threshold=2))
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        om.weather_api("https://example.invalid", params={})
+    with pytest.raises(requests.exceptions.HTTPError):
+        om.weather_api("https://example.invalid", params={})
+    with pytest.raises(CircuitOpenError):
+        om.weather_api("https://example.invalid", params={})
+    assert session.calls == 2
+
+
+def test_client_pauses_limiter_on_429():
+    limiter = RateLimiter(rate=100, burst=5)
+    session = FakeSession([FakeResponse(429, {"Retry-After": "2"})])
+    om = openmeteo_requests.Client(session=session, rate_limiter=limiter)
+
+    with pytest.raises(OpenMeteoRequestsError):
+        om.weather_api("https://example.invalid", params={})
+    assert limiter.try_acquire() == pytest.approx(2, abs=0.1)
+
+
+def test_client_timeout_is_capped_by_the_call_budget():
+    session = FakeSession([FakeResponse(200), FakeResponse(200)])
+    om = openmeteo_requests.Client(session=session, timeout=10)
+
+    om.request("https://example.invalid", {})
+    assert session.timeout == 10
+    om.request("https://example.invalid", {}, timeout=0.5)
+    assert 0 < session.timeout <= 0.5
+
+
+def test_client_budget_bounds_the_rate_limiter_wait():
+    limiter = RateLimiter(rate=0.5, burst=1, max_wait=5)
+    breaker = CircuitBreaker()
+    session = FakeSession([FakeResponse(200)])
+    om = openmeteo_requests.Client(session=session, rate_limiter=limiter, circuit_breaker=breaker)
+
+    om.request("https://example.invalid", {})
+    start = time.monotonic()
+    with pytest.raises(RateLimitError):
+        om.request("https://example.invalid", {}, timeout=0.1)
+    assert time.monotonic() - start < 1
+    assert session.calls == 1
+
+
+def test_client_sends_nothing_once_the_budget_is_spent():
+    breaker = CircuitBreaker()
+    session = FakeSession([FakeResponse(200)])
+    om = openmeteo_requests.Client(session=session, circuit_breaker=breaker)
+
+    with pytest.raises(requests.exceptions.Timeout):
+        om.request("https://example.invalid", {}, timeout=0)
+    assert session.calls == 0
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+class SlowSession:
+    """Answers 200 after the given delays, one per call; calls after the last take the last delay"""
+
+    def __init__(self, delays: list):
+        self.delays = list(delays)
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def request(self, *args, **kwargs):
+        with self._lock:
+            delay = self.delays[min(len(self.calls), len(self.delays) - 1)]
+            self.calls.append(kwargs)
+        time.sleep(delay)
+        return FakeResponse(200)
+
+    def close(self):
+        pass
+
+
+def primed_hedger(samples: int = 5, **kwargs) -> Hedger:
+    """Hedger that already knows latencies of 10 ms and has a hedge to spend"""
+    hedger = Hedger(min_samples=5, min_delay=0.01, **{"budget": 1.0, **kwargs})
+    for _ in range(samples):
+        hedger.record(0.01)
+    return hedger
+
+
+def test_hedger_sends_a_duplicate_after_a_slow_call():
+    hedger = primed_hedger()
+    cancelled_events = []
+
+    def send(cancelled):
+        cancelled_events.append(cancelled)
+        time.sleep(1 if len(cancelled_events) == 1 else 0)
+        return len(cancelled_events)
+
+    start = time.monotonic()
+    assert hedger.run(send) == 2
+    assert time.monotonic() - start < 0.5
+    assert cancelled_events[0].is_set()
+    assert hedger.stats()["hedged"] == 1
+    assert hedger.stats()["hedge_wins"] == 1
+
+
+def test_hedger_waits_for_the_other_attempt_after_a_failure():
+    hedger = primed_hedger()
+    attempts = []
+
+    def send(cancelled):
+        attempts.append(cancelled)
+        if len(attempts) == 1:
+            time.sleep(0.05)
+            raise requests.exceptions.ConnectionError()
+        time.sleep(0.1)
+        return "second"
+
+    assert hedger.run(send) == "second"
+
+    def fail(cancelled):
+        time.sleep(0.05)
+        raise requests.exceptions.ConnectionError()
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        hedger.run(fail)
+
+
+def test_hedger_budget_caps_the_duplicates():
+    hedger = primed_hedger(samples=100, percentile=50, budget=0.125, burst=1)
+    for _ in range(20):
+        hedger.run(lambda cancelled: time.sleep(0.03))
+    assert hedger.stats()["calls"] == 20
+    assert hedger.stats()["hedged"] == 2
+
+    hedger = primed_hedger()
+    hedger.run(lambda cancelled: time.sleep(0.03), admit=lambda: False)
+    assert hedger.stats()["hedged"] == 0
+
+
+def test_hedger_does_not_hedge_while_all_threads_are_busy():
+    hedger = primed_hedger(max_workers=1, burst=2)
+    sent = []
+
+    def send(seconds):
+        def attempt(cancelled):
+            sent.append(seconds)
+            time.sleep(seconds)
+            return seconds
+
+        return attempt
+
+    slow = threading.Thread(target=hedger.run, args=(send(0.3),))
+    slow.start()
+    time.sleep(0.05)
+    # Queued behind the slow call for longer than the hedge delay, then answered quickly
+    assert hedger.run(send(0.02)) == 0.02
+    slow.join()
+    assert sent == [0.3, 0.02]
+    assert hedger.stats()["hedged"] == 0
+
+
+def test_client_hedges_gets_only():
+    session = SlowSession([0.5, 0])
+    breaker = CircuitBreaker(failure_threshold=1)
+    om = openmeteo_requests.Client(session=session, circuit_breaker=breaker, hedger=primed_hedger())
+
+    start = time.monotonic()
+    assert om.request("https://example.invalid", {}).status_code == 200
+    assert time.monotonic() - start < 0.4
+    assert len(session.calls) == 2
+    assert all(call["stream"] for call in session.calls)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    session = SlowSession([0.1])
+    om = openmeteo_requests.Client(session=session, hedger=primed_hedger())
+    om.request("https://example.invalid", {}, method="POST")
+    assert len(session.calls) == 1
+
+
+def test_client_hedges_only_with_a_free_rate_limiter_token():
+    limiter = RateLimiter(rate=0.1, burst=1)
+    session = SlowSession([0.1, 0])
+    hedger = primed_hedger()
+    om = openmeteo_requests.Client(session=session, rate_limiter=limiter, hedger=hedger)
+
+    om.request("https://example.invalid", {})
+    assert len(session.calls) == 1
+    assert hedger.stats()["hedged"] == 0
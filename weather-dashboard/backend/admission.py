@@ -0,0 +1,172 @@
+"""
+Admission Control - Bounded concurrency and deadlines per request
+
+When Open-Meteo slows down, every request that needs it holds a server thread
+for as long as the upstream takes, until no thread is left for anything else.
+Routes are therefore grouped into classes, each with a limit on how many of
+its requests a worker handles at once. Routes without a class (weather codes,
+health, favorites, geocoding) never wait on the upstream and are always
+admitted, so they stay fast during upstream incidents.
+
+A request that finds no free slot within QUEUE_TIMEOUT is not queued any
+longer: it runs from the cache only. Cached data is served even if stale, and
+without any the request is shed with OverloadedError, a 503 with Retry-After.
+
+Every admitted request also gets a deadline, REQUEST_DEADLINE seconds from
+its start. upstream_timeout() hands the time left to the upstream client, so
+a slow upstream call gives up before the request's time is over and the
+cache can still answer with what it has.
+
+The deadline is kept in a context variable, so the weather core reads it
+without knowing about Flask or FastAPI; outside a request there is none.
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+
+from openmeteo_requests import RateLimitError
+
+# Route class -> requests of that class a worker handles at once. Leave some of
+# the 16 gunicorn threads for the cheap routes
+ROUTE_LIMITS = {
+    # Single location forecasts and map tiles, one upstream call at most
+    'forecast': 12,
+    # Alerts for all favorites can take an upstream call per location
+    'alerts': 2,
+}
+# Seconds a request waits for a slot of its class before it runs from the cache only
+QUEUE_TIMEOUT = float(os.getenv('ADMISSION_QUEUE_TIMEOUT', 0.25))
+# Seconds an admitted request may spend, including its upstream calls
+REQUEST_DEADLINE = float(os.getenv('REQUEST_DEADLINE', 5))
+# Suggested wait for shed requests
+RETRY_AFTER = 2
+
+
+def load_limits():
+    """ROUTE_LIMITS with the overrides from ADMISSION_LIMITS, e.g. {"forecast": 8}"""
+    limits = dict(ROUTE_LIMITS)
+    overrides = os.getenv('ADMISSION_LIMITS')
+    if overrides:
+        limits.update({name: int(limit) for name, limit in json.loads(overrides).items()})
+    return limits
+
+
+class OverloadedError(RateLimitError):
+    """
+    A request refused for lack of capacity or time
+
+    It is a RateLimitError, so it is served stale from the cache where
+    possible and reported as 503 with Retry-After like an upstream refusal.
+    """
+
+    def __init__(self, message, retry_after=RETRY_AFTER):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Budget:
+    """What a request may still do: its deadline and whether it may call the upstream"""
+
+    def __init__(self, deadline=None, cache_only=False):
+        self.deadline = deadline
+        self.cache_only = cache_only
+
+    def remaining(self):
+        """Seconds until the deadline, None without one"""
+        return None if self.deadline is None else self.deadline - time.monotonic()
+
+
+_budget = contextvars.ContextVar('request_budget', default=None)
+
+
+def begin(deadline=None, cache_only=False):
+    """
+    Start the budget of the current request
+
+    Args:
+        deadline (float): Seconds the request may take, None for no limit
+        cache_only (bool): Whether the request may only be served from the cache
+
+    Returns:
+        Token for end()
+    """
+    expires = None if deadline is None else time.monotonic() + deadline
+    return _budget.set(Budget(expires, cache_only))
+
+
+def end(token):
+    """End the budget started with begin()"""
+    _budget.reset(token)
+
+
+def upstream_timeout():
+    """
+    Seconds an upstream call of the current request may take
+
+    Returns:
+        float: Time left until the deadline, None outside a request or without a deadline
+
+    Raises:
+        OverloadedError: The request runs from the cache only or its deadline has passed
+    """
+    budget = _budget.get()
+    if budget is None:
+        return None
+    if budget.cache_only:
+        raise OverloadedError('Server busy, only cached data is served')
+    remaining = budget.remaining()
+    if remaining is not None and remaining <= 0:
+        raise OverloadedError('Request deadline exceeded before the upstream call')
+    return remaining
+
+
+class AdmissionControl:
+    """Concurrency limits per route class"""
+
+    def __init__(self, limits=None, queue_timeout=QUEUE_TIMEOUT, deadline=REQUEST_DEADLINE):
+        """
+        Args:
+            limits (dict): Route class -> concurrent requests, see ROUTE_LIMITS
+            queue_timeout (float): Seconds to wait for a free slot
+            deadline (float): Seconds an admitted request may take, passed to begin()
+        """
+        self.limits = load_limits() if limits is None else dict(limits)
+        self.queue_timeout = queue_timeout
+        self.deadline = deadline
+        self._slots = {name: threading.BoundedSemaphore(limit) for name, limit in self.limits.items()}
+        self._lock = threading.Lock()
+        self._active = dict.fromkeys(self.limits, 0)
+        self._shed = dict.fromkeys(self.limits, 0)
+
+    def acquire(self, route_class):
+        """
+        Take a slot of a route class, waiting at most queue_timeout
+
+        Args:
+            route_class (str): One of limits
+
+        Returns:
+            bool: Whether a slot was taken; release() it when the request is done
+        """
+        admitted = self.limits[route_class] > 0 and self._slots[route_class].acquire(timeout=self.queue_timeout)
+        with self._lock:
+            if admitted:
+                self._active[route_class] += 1
+            else:
+                self._shed[route_class] += 1
+        return admitted
+
+    def release(self, route_class):
+        """Give back a slot taken with acquire()"""
+        with self._lock:
+            self._active[route_class] -= 1
+        self._slots[route_class].release()
+
+    def stats(self):
+        """Limit, requests in progress and requests turned away per route class"""
+        with self._lock:
+            return {name: {'limit': limit, 'active': self._active[name], 'shed': self._shed[name]}
+                    for name, limit in self.limits.items()}
@@ -0,0 +1,204 @@
+"""
+Aggregation - Daily and weekly rollups of hourly forecast arrays
+
+Daily values such as temperature_2m_max or precipitation_sum are reductions
+of hourly series over local calendar days. Computing them here from the cached
+hourly frames saves a separate upstream request for the daily section.
+
+Hourly timestamps are grouped into buckets (local days, or ISO weeks starting
+on Monday) and every variable is reduced with one `np.ufunc.reduceat` call
+over the bucket boundaries, so there is no Python loop over days.
+
+The upstream gives one UTC offset, the one in effect when the forecast was
+made. A 16 day forecast can cross a daylight saving change, after which
+local days start an hour earlier or later, so with the timezone name every
+hour gets its own offset from the tz database.
+"""
+
+from datetime import datetime
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import numpy as np
+
+from weather_frames import parse_variable, values_to_list
+
+SECONDS_PER_DAY = 86400
+
+# Daily variable -> (hourly source variable, reduction), following the Open-Meteo definitions
+DAILY_AGGREGATES = {
+    'temperature_2m_max': ('temperature_2m', 'max'),
+    'temperature_2m_min': ('temperature_2m', 'min'),
+    'temperature_2m_mean': ('temperature_2m', 'mean'),
+    'apparent_temperature_max': ('apparent_temperature', 'max'),
+    'apparent_temperature_min': ('apparent_temperature', 'min'),
+    'apparent_temperature_mean': ('apparent_temperature', 'mean'),
+    'uv_index_max': ('uv_index', 'max'),
+    'precipitation_sum': ('precipitation', 'sum'),
+    'rain_sum': ('rain', 'sum'),
+    'snowfall_sum': ('snowfall', 'sum'),
+    'precipitation_hours': ('precipitation', 'hours'),
+    'precipitation_probability_max': ('precipitation_probability', 'max'),
+    # Weather codes are ordered by severity, so the daily code is the most severe hour
+    'weather_code': ('weather_code', 'max'),
+    'wind_speed_10m_max': ('wind_speed_10m', 'max'),
+    'wind_gusts_10m_max': ('wind_gusts_10m', 'max'),
+    'wind_direction_10m_dominant': ('wind_direction_10m', 'dominant'),
+}
+
+# The dominant direction is weighted by wind speed
+DOMINANT_WEIGHTS = {'wind_direction_10m': 'wind_speed_10m'}
+
+
+def source_variables(variables):
+    """
+    Hourly variables needed to compute a set of daily variables
+
+    Args:
+        variables (list): Daily variable names, all keys of DAILY_AGGREGATES
+
+    Returns:
+        list: Hourly variable names, without duplicates
+    """
+    sources = []
+    for name in variables:
+        source, how = DAILY_AGGREGATES[name]
+        needed = [source, DOMINANT_WEIGHTS.get(source)] if how == 'dominant' else [source]
+        sources.extend(v for v in needed if v is not None and v not in sources)
+    return sources
+
+
+def local_days(timestamps, utc_offset, timezone=None):
+    """
+    Local date of every timestamp, as days since 1970-01-01
+
+    Args:
+        timestamps (np.ndarray): Unix seconds, ascending
+        utc_offset (int): Offset of the response timezone in seconds
+        timezone (str): tz database name of the response timezone; without it
+            (or if it is unknown) utc_offset holds for every timestamp
+
+    Returns:
+        np.ndarray: int64 day numbers
+    """
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    offsets = utc_offset
+    if timezone and len(timestamps):
+        try:
+            zone = ZoneInfo(timezone)
+        except (ZoneInfoNotFoundError, ValueError):
+            zone = None
+        if zone is not None:
+            first, last = (int(datetime.fromtimestamp(int(t), zone).utcoffset().total_seconds())
+                           for t in (timestamps[0], timestamps[-1]))
+            if first == last:
+                offsets = first
+            else:
+                # Only forecasts that cross a daylight saving change look up every hour
+                offsets = np.array([datetime.fromtimestamp(int(t), zone).utcoffset().total_seconds()
+                                    for t in timestamps], dtype=np.int64)
+    return (timestamps + offsets) // SECONDS_PER_DAY
+
+
+def bucket_starts(timestamps, utc_offset, period='day', timezone=None):
+    """
+    Group sorted hourly timestamps into local days or ISO weeks
+
+    Args:
+        timestamps (np.ndarray): Unix seconds, ascending
+        utc_offset (int): Offset of the response timezone in seconds
+        period (str): 'day' or 'week'
+        timezone (str): tz database name of the response timezone, see local_days
+
+    Returns:
+        tuple: (index of the first hour of each bucket, local date of each bucket as datetime64[D])
+    """
+    days = local_days(timestamps, utc_offset, timezone)
+    if period == 'week':
+        # 1970-01-01 was a Thursday; shift so that weeks start on Monday
+        keys = (days + 3) // 7
+        labels = keys * 7 - 3
+    elif period == 'day':
+        keys = labels = days
+    else:
+        raise ValueError(f"Unknown period: {period}")
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(keys)) + 1)) if len(keys) else np.array([], dtype=np.int64)
+    return starts, labels[starts].astype('datetime64[D]')
+
+
+def _reduce(values, starts, how, weights=None):
+    """Reduce contiguous buckets of values, ignoring missing (NaN) hours"""
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+    counts = np.add.reduceat(valid, starts)
+    if how == 'max':
+        result = np.fmax.reduceat(values, starts)
+    elif how == 'min':
+        result = np.fmin.reduceat(values, starts)
+    elif how in ('sum', 'mean'):
+        result = np.add.reduceat(np.where(valid, values, 0.0), starts)
+        if how == 'mean':
+            result = result / np.maximum(counts, 1)
+    elif how == 'hours':
+        result = np.add.reduceat(values > 0, starts).astype(np.float64)
+    elif how == 'dominant':
+        # Circular mean: average the direction vectors, weighted by speed, instead of the angles
+        weights = np.ones_like(values) if weights is None else np.nan_to_num(np.asarray(weights, dtype=np.float64))
+        radians = np.radians(np.where(valid, values, 0.0))
+        weights = np.where(valid, weights, 0.0)
+        u = np.add.reduceat(weights * np.sin(radians), starts)
+        v = np.add.reduceat(weights * np.cos(radians), starts)
+        result = np.degrees(np.arctan2(u, v)) % 360
+    else:
+        raise ValueError(f"Unknown reduction: {how}")
+    result[counts == 0] = np.nan
+    return result
+
+
+def aggregate_arrays(hourly, utc_offset, variables, period='day', timezone=None):
+    """
+    Compute daily or weekly variables from hourly arrays, as arrays
+
+    Args:
+        hourly (dict): 'time' (unix seconds) plus hourly arrays, e.g. from LazyWeatherResponse.arrays
+        utc_offset (int): Offset of the response timezone in seconds
+        variables (list): Daily variable names, keys of DAILY_AGGREGATES
+        period (str): 'day' or 'week'
+        timezone (str): tz database name of the response timezone, see local_days
+
+    Returns:
+        tuple: (local date of each bucket as datetime64[D], dict of one float64 array per variable
+            whose source is present in hourly)
+    """
+    starts, labels = bucket_starts(hourly['time'], utc_offset, period, timezone)
+    result = {}
+    if not len(starts):
+        return labels, result
+    for name in variables:
+        source, how = DAILY_AGGREGATES[name]
+        if source not in hourly:
+            continue
+        weights = hourly.get(DOMINANT_WEIGHTS.get(source)) if how == 'dominant' else None
+        result[name] = _reduce(hourly[source], starts, how, weights)
+    return labels, result
+
+
+def aggregate(hourly, utc_offset, variables, period='day', timezone=None):
+    """
+    Compute daily or weekly variables from hourly arrays
+
+    Args:
+        hourly (dict): 'time' (unix seconds) plus hourly arrays, e.g. from LazyWeatherResponse.arrays
+        utc_offset (int): Offset of the response timezone in seconds
+        variables (list): Daily variable names, keys of DAILY_AGGREGATES
+        period (str): 'day' or 'week'
+        timezone (str): tz database name of the response timezone, see local_days
+
+    Returns:
+        dict: 'time' (local ISO dates of bucket starts) plus one JSON-ready list per variable
+            whose source is present in hourly
+    """
+    labels, arrays = aggregate_arrays(hourly, utc_offset, variables, period, timezone)
+    result = {'time': np.datetime_as_string(labels, unit='D').tolist()}
+    for name, values in arrays.items():
+        result[name] = values_to_list(parse_variable(name)[0], values)
+    return result
@@ -0,0 +1,167 @@
+"""
+Alerts - Threshold and duration rules evaluated over hourly forecast arrays
+
+Hourly data for any number of locations is stacked into (locations, hours)
+arrays and every rule is evaluated for all of them at once: a boolean mask
+for the condition, the length of the run of consecutive matching hours from a
+cumulative sum, and the start and end of every qualifying run from the edges
+of the mask. Each run is its own alert, so storms on two days are two alerts.
+Only the compact alert summaries leave the backend.
+"""
+
+import numpy as np
+
+# Weather codes (WMO) for freezing drizzle and freezing rain
+FREEZING_RAIN_CODES = [56, 57, 66, 67]
+THUNDERSTORM_CODES = [95, 96, 99]
+
+# Each rule fires when `variable` matches for at least `hours` consecutive hours.
+# Conditions are 'above' / 'below' a threshold or 'in' a list of values.
+ALERT_RULES = [
+    {'id': 'extreme-wind', 'title': 'Extreme Wind Warning', 'severity': 'extreme',
+     'variable': 'wind_gusts_10m', 'condition': 'above', 'threshold': 90, 'hours': 1,
+     'description': 'Wind gusts up to {peak:.0f} km/h. Stay indoors and away from trees.'},
+    {'id': 'high-wind', 'title': 'High Wind Warning', 'severity': 'severe',
+     'variable': 'wind_gusts_10m', 'condition': 'above', 'threshold': 60, 'hours': 3,
+     'description': 'Wind gusts up to {peak:.0f} km/h for {duration} hours. Secure loose objects.'},
+    {'id': 'freezing-rain', 'title': 'Freezing Rain Warning', 'severity': 'severe',
+     'variable': 'weather_code', 'condition': 'in', 'values': FREEZING_RAIN_CODES, 'hours': 1,
+     'description': 'Freezing rain or drizzle expected. Roads and walkways may be icy.'},
+    {'id': 'thunderstorm', 'title': 'Thunderstorm Watch', 'severity': 'moderate',
+     'variable': 'weather_code', 'condition': 'in', 'values': THUNDERSTORM_CODES, 'hours': 1,
+     'description': 'Thunderstorms expected, possibly with hail. Seek shelter if thunder is heard.'},
+    {'id': 'heavy-rain', 'title': 'Heavy Rain Warning', 'severity': 'severe',
+     'variable': 'precipitation', 'condition': 'above', 'threshold': 10, 'hours': 2,
+     'description': 'Up to {peak:.1f} mm of rain per hour. Flooding is possible in low-lying areas.'},
+    {'id': 'extreme-heat', 'title': 'Extreme Heat Warning', 'severity': 'extreme',
+     'variable': 'heat_index', 'condition': 'above', 'threshold': 40, 'hours': 3,
+     'description': 'Heat index up to {peak:.0f}°C. Avoid strenuous activity and stay hydrated.'},
+    {'id': 'heat', 'title': 'Heat Advisory', 'severity': 'moderate',
+     'variable': 'heat_index', 'condition': 'above', 'threshold': 32, 'hours': 3,
+     'description': 'Heat index up to {peak:.0f}°C for {duration} hours.'},
+    {'id': 'hard-freeze', 'title': 'Hard Freeze Warning', 'severity': 'moderate',
+     'variable': 'temperature_2m', 'condition': 'below', 'threshold': -10, 'hours': 6,
+     'description': 'Temperatures down to {peak:.0f}°C. Protect pipes and plants.'},
+]
+
+# Rule variables computed by the backend, with the hourly variables they need
+DERIVED_VARIABLES = {'heat_index': ['temperature_2m', 'relative_humidity_2m']}
+
+SOURCE = 'Weather Dashboard forecast alerts'
+
+
+def source_variables(rules=ALERT_RULES):
+    """
+    Hourly variables needed to evaluate a set of rules
+
+    Args:
+        rules (list): Alert rules
+
+    Returns:
+        list: Hourly variable names, without duplicates
+    """
+    sources = []
+    for rule in rules:
+        for name in DERIVED_VARIABLES.get(rule['variable'], [rule['variable']]):
+            if name not in sources:
+                sources.append(name)
+    return sources
+
+
+def heat_index(temperature, humidity):
+    """
+    Vectorized heat index in Celsius
+
+    Uses the same formula as calculate_feels_like_temperature for hot weather
+    (above 27°C); below that the air temperature is returned.
+    """
+    t = np.asarray(temperature, dtype=np.float64)
+    rh = np.asarray(humidity, dtype=np.float64)
+    index = (
+        -8.784695 + 1.61139411 * t + 2.338549 * rh - 0.14611605 * t * rh
+        - 0.012308094 * t ** 2 - 0.016424828 * rh ** 2 + 0.002211732 * t ** 2 * rh
+        + 0.00072546 * t * rh ** 2 - 0.000003582 * t ** 2 * rh ** 2
+    )
+    return np.where(t > 27, index, t)
+
+
+def _match(rule, values):
+    if rule['condition'] == 'above':
+        return values >= rule['threshold']
+    if rule['condition'] == 'below':
+        return values <= rule['threshold']
+    if rule['condition'] == 'in':
+        return np.isin(values, rule['values'])
+    raise ValueError(f"Unknown alert condition: {rule['condition']}")
+
+
+def qualifying_hours(mask, hours):
+    """
+    Hours that are part of a run of at least `hours` consecutive matches
+
+    Args:
+        mask (np.ndarray): Boolean (locations, hours) matches
+        hours (int): Minimum run length
+
+    Returns:
+        np.ndarray: Boolean (locations, hours)
+    """
+    counts = np.cumsum(mask, axis=1)
+    # Count at the last non-matching hour, carried forward: the start of the current run
+    run_start = np.maximum.accumulate(np.where(mask, 0, counts), axis=1)
+    run_ends = (counts - run_start) >= hours
+    # Extend each qualifying run end back over the hours of its run
+    qualifying = run_ends.copy()
+    for shift in range(1, hours):
+        qualifying[:, :-shift] |= run_ends[:, shift:]
+    return qualifying & mask
+
+
+def evaluate_alerts(hourly, local_times, rules=ALERT_RULES):
+    """
+    Evaluate alert rules for many locations in one vectorized pass
+
+    Args:
+        hourly (dict): Hourly variable name -> (locations, hours) float array, NaN where missing
+        local_times (np.ndarray): (locations, hours) local ISO time strings, '' where missing
+        rules (list): Alert rules
+
+    Returns:
+        list: One list of alert summaries per location
+    """
+    locations = len(local_times)
+    arrays = dict(hourly)
+    if 'heat_index' not in arrays and all(name in arrays for name in DERIVED_VARIABLES['heat_index']):
+        arrays['heat_index'] = heat_index(arrays['temperature_2m'], arrays['relative_humidity_2m'])
+
+    alerts = [[] for _ in range(locations)]
+    for rule in rules:
+        values = arrays.get(rule['variable'])
+        if values is None or not values.size:
+            continue
+        qualifying = qualifying_hours(_match(rule, values), rule['hours'])
+        if not qualifying.any():
+            continue
+        # Runs start where a qualifying hour follows one that is not, and end where the next one is not;
+        # both come out ordered by location, then time, so the n-th start and the n-th end form a run
+        padded = np.pad(qualifying, ((0, 0), (1, 1)))
+        run_locations, run_starts = np.nonzero(padded[:, 1:-1] & ~padded[:, :-2])
+        run_ends = np.nonzero(padded[:, 1:-1] & ~padded[:, 2:])[1]
+        # Hours outside the runs are NaN, so reducing from each run start to the next covers just the run
+        masked = np.where(qualifying, values, np.nan).ravel()
+        reduce = np.fmin if rule['condition'] == 'below' else np.fmax
+        peaks = reduce.reduceat(masked, run_locations * qualifying.shape[1] + run_starts)
+        for location, first, last, peak in zip(run_locations, run_starts, run_ends, peaks):
+            times = local_times[location]
+            # Alerts end at the start of the first hour after the run, or with the data
+            end = last + 1 if last + 1 < len(times) and times[last + 1] else last
+            alerts[location].append({
+                'id': f"{rule['id']}-{times[first]}",
+                'title': rule['title'],
+                'description': rule['description'].format(peak=peak, duration=last - first + 1),
+                'severity': rule['severity'],
+                'start': times[first],
+                'end': times[end],
+                'source': SOURCE,
+            })
+    return alerts
@@ -0,0 +1,80 @@
+"""
+Cache backends for the weather service
+
+create_cache() picks the backend from the environment:
+
+    WEATHER_CACHE_BACKEND   shm (default), redis or none
+    WEATHER_CACHE_PATH      file used by the shm backend
+    WEATHER_CACHE_SLOTS     number of entries in the shm table
+    WEATHER_CACHE_SLOT_SIZE bytes per shm entry
+    WEATHER_CACHE_URL       redis://host:port/db for the redis backend
+
+Snapshots of the shm table (see snapshot.py) let a restarted server start warm:
+
+    WEATHER_CACHE_SNAPSHOT          snapshot file, snapshots are off when unset
+    WEATHER_CACHE_SNAPSHOT_INTERVAL seconds between periodic snapshots
+    WEATHER_CACHE_SNAPSHOT_ENTRIES  most entries to keep, all by default
+"""
+
+import logging
+import os
+import threading
+
+from .base import CacheBackend, NullCache
+from .redis_cache import RedisCache
+from .serialization import dumps, loads
+from .shm import SharedMemoryCache
+from .snapshot import SnapshotThread, restore_snapshot, write_snapshot
+
+__all__ = [
+    'CacheBackend', 'LazyCache', 'NullCache', 'RedisCache', 'SharedMemoryCache', 'SnapshotThread', 'create_cache',
+    'dumps', 'loads', 'restore_snapshot', 'write_snapshot',
+]
+
+
+def create_cache():
+    """Create the cache backend configured in the environment"""
+    backend = os.getenv('WEATHER_CACHE_BACKEND', 'shm').lower()
+    if backend == 'redis':
+        return RedisCache(os.getenv('WEATHER_CACHE_URL', 'redis://127.0.0.1:6379/0'))
+    if backend == 'shm':
+        try:
+            return SharedMemoryCache(
+                path=os.getenv('WEATHER_CACHE_PATH') or None,
+                slot_count=int(os.getenv('WEATHER_CACHE_SLOTS', 1024)),
+                slot_size=int(os.getenv('WEATHER_CACHE_SLOT_SIZE', 32 * 1024)),
+            )
+        except (OSError, RuntimeError) as e:
+            logging.warning('Shared memory cache unavailable, caching disabled: %s', str(e))
+    return NullCache()
+
+
+class LazyCache:
+    """
+    Stand-in that creates the configured backend on first use
+
+    Module-level caches are created on import, but opening the shared memory
+    file or a Redis connection there would slow down every import of the
+    service and happen in processes that never serve a request.
+    """
+
+    def __init__(self, factory=create_cache):
+        """
+        Args:
+            factory (callable): Creates the backend
+        """
+        self._factory = factory
+        self._backend = None
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self):
+        """The backend, created on first access"""
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    self._backend = self._factory()
+        return self._backend
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
@@ -0,0 +1,109 @@
+"""
+Cache backend interface
+
+Backends store opaque bytes under string keys with a time-to-live. They are
+shared by every worker process on a host (or across hosts), so the hit rate
+grows with the deployment rather than with each worker.
+"""
+
+import threading
+
+
+class CacheBackend:
+    """Base class for cache backends"""
+
+    def __init__(self):
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _record(self, hit):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key):
+        """
+        Look up a value
+
+        Args:
+            key (str): Cache key
+
+        Returns:
+            bytes: The stored value, or None if missing or expired
+        """
+        raise NotImplementedError
+
+    def set(self, key, value, ttl):
+        """
+        Store a value
+
+        Args:
+            key (str): Cache key
+            value (bytes): Serialized value
+            ttl (float): Seconds until the entry expires
+
+        Returns:
+            bool: Whether the value was stored
+        """
+        raise NotImplementedError
+
+    def delete(self, key):
+        """
+        Remove a value if present
+
+        Args:
+            key (str): Cache key
+        """
+        raise NotImplementedError
+
+    def entries(self):
+        """
+        Live entries for a snapshot, most used first
+
+        Returns:
+            list: (digest, expires, hits, value) tuples, or None if the backend cannot enumerate its entries
+        """
+        return None
+
+    def load_entries(self, entries):
+        """
+        Store entries from a snapshot without replacing live ones
+
+        Args:
+            entries (iterable): (digest, expires, hits, value) tuples
+
+        Returns:
+            int: Number of entries stored
+        """
+        return 0
+
+    def digest(self, key):
+        """Digest under which a key is stored, None if the backend does not use digests"""
+        return None
+
+    def stats(self):
+        """Hit/miss counters of this process"""
+        total = self.hits + self.misses
+        return {
+            'backend': self.__class__.__name__,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
+
+class NullCache(CacheBackend):
+    """Backend that stores nothing, used when caching is disabled"""
+
+    def get(self, key):
+        self._record(False)
+        return None
+
+    def set(self, key, value, ttl):
+        return False
+
+    def delete(self, key):
+        pass
@@ -0,0 +1,122 @@
+"""
+Redis cache backend
+
+Talks the Redis protocol (RESP) directly over a socket, so it works with
+Redis, Valkey, KeyDB or any local stand-in without extra dependencies. Cache
+failures are never fatal: if the server is unreachable the backend reports a
+miss and the request falls through to the upstream API.
+"""
+
+import logging
+import socket
+import threading
+from urllib.parse import urlparse
+
+from .base import CacheBackend
+
+
+class RedisProtocolError(Exception):
+    """Error reply or malformed response from the server"""
+
+
+class RedisCache(CacheBackend):
+    """Cache stored in a Redis-compatible server"""
+
+    def __init__(self, url='redis://127.0.0.1:6379/0', prefix='weather:', timeout=0.5):
+        super().__init__()
+        parsed = urlparse(url)
+        self.host = parsed.hostname or '127.0.0.1'
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.lstrip('/') or 0)
+        self.password = parsed.password
+        self.prefix = prefix
+        self.timeout = timeout
+        # One connection per thread keeps request/reply pairs from interleaving
+        self._local = threading.local()
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._local.sock = sock
+        self._local.reader = sock.makefile('rb')
+        if self.password:
+            self._call(b'AUTH', self.password.encode())
+        if self.db:
+            self._call(b'SELECT', str(self.db).encode())
+
+    def _disconnect(self):
+        sock = getattr(self._local, 'sock', None)
+        if sock is not None:
+            try:
+                self._local.reader.close()
+                sock.close()
+            finally:
+                self._local.sock = None
+
+    def _read_reply(self):
+        line = self._local.reader.readline()
+        if not line.endswith(b'\r\n'):
+            raise ConnectionError('Connection closed by server')
+        kind, payload = line[:1], line[1:-2]
+        if kind == b'+':
+            return payload
+        if kind == b'-':
+            raise RedisProtocolError(payload.decode(errors='replace'))
+        if kind == b':':
+            return int(payload)
+        if kind == b'$':
+            length = int(payload)
+            if length < 0:
+                return None
+            data = self._local.reader.read(length + 2)
+            return data[:-2]
+        if kind == b'*':
+            count = int(payload)
+            return None if count < 0 else [self._read_reply() for _ in range(count)]
+        raise RedisProtocolError(f'Unexpected reply type {kind!r}')
+
+    def _call(self, *args):
+        command = [b'*%d\r\n' % len(args)]
+        for arg in args:
+            command.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+        self._local.sock.sendall(b''.join(command))
+        return self._read_reply()
+
+    def _execute(self, *args):
+        """Run a command, reconnecting once if the connection went stale"""
+        for attempt in range(2):
+            try:
+                if getattr(self._local, 'sock', None) is None:
+                    self._connect()
+                return self._call(*args)
+            except (OSError, ConnectionError):
+                self._disconnect()
+                if attempt:
+                    raise
+        return None
+
+    def _key(self, key):
+        return (self.prefix + key).encode()
+
+    def get(self, key):
+        try:
+            value = self._execute(b'GET', self._key(key))
+        except (OSError, ConnectionError, RedisProtocolError) as e:
+            logging.warning('Redis cache unavailable: %s', str(e))
+            value = None
+        self._record(value is not None)
+        return value
+
+    def set(self, key, value, ttl):
+        try:
+            self._execute(b'SET', self._key(key), value, b'PX', str(max(1, int(ttl * 1000))).encode())
+            return True
+        except (OSError, ConnectionError, RedisProtocolError) as e:
+            logging.warning('Redis cache unavailable: %s', str(e))
+            return False
+
+    def delete(self, key):
+        try:
+            self._execute(b'DEL', self._key(key))
+        except (OSError, ConnectionError, RedisProtocolError) as e:
+            logging.warning('Redis cache unavailable: %s', str(e))
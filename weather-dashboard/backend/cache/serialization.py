@@ -0,0 +1,39 @@
+"""
+Compact serialization for cache values
+
+Uses msgpack when it is installed and falls back to compact JSON, so cached
+values decode without re-running the formatting code. NumPy arrays and
+scalars, as found in formatted forecasts, are stored as plain lists and numbers.
+"""
+
+import json
+
+import numpy as np
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+
+def _default(value):
+    """Convert NumPy values and objects with a to_dict() shape, such as forecasts, that the serializers do not know"""
+    if hasattr(value, 'to_dict'):
+        return value.to_dict()
+    if isinstance(value, (np.ndarray, np.generic)):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+
+def dumps(value):
+    """Serialize a value of plain Python types and NumPy values to bytes"""
+    if msgpack is not None:
+        return msgpack.packb(value, use_bin_type=True, default=_default)
+    return json.dumps(value, default=_default, separators=(',', ':')).encode()
+
+
+def loads(data):
+    """Inverse of dumps"""
+    if msgpack is not None:
+        return msgpack.unpackb(data, raw=False)
+    return json.loads(data)
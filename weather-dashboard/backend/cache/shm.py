@@ -0,0 +1,256 @@
+"""
+Shared-memory cache backend
+
+A fixed-size hash table in a memory-mapped file, by default on /dev/shm. All
+worker processes on the host map the same file, so an entry fetched by one
+worker is a hit for every other worker and memory does not grow with the
+number of workers.
+
+Layout: a 64 byte header followed by `slot_count` slots of `slot_size` bytes.
+Each slot starts with a sequence number, the key digest, the expiry time, the
+value length and a hit counter. Keys are placed by open addressing over a
+short probe window; when the window is full the entry closest to expiry is
+evicted. Hit counters are bumped by readers without the lock, so they are
+approximate; they only rank entries for snapshots (see snapshot.py).
+
+Writers serialize on an exclusive flock. Readers take no lock: the sequence
+number is odd while a slot is being written and readers retry if it changed
+while they copied the value (a seqlock).
+"""
+
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+
+from .base import CacheBackend
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+MAGIC = b'WXCACHE2'
+HEADER = struct.Struct('<8sII')
+HEADER_SIZE = 64
+SLOT_HEADER = struct.Struct('<I16sdII')
+SEQ = struct.Struct('<I')
+HITS = struct.Struct('<I')
+HITS_OFFSET = 32
+EMPTY_DIGEST = bytes(16)
+PROBE_LENGTH = 8
+
+
+def default_path():
+    """Location of the cache file, preferring tmpfs-backed /dev/shm"""
+    base = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.path.join(base, 'weather-dashboard-cache')
+
+
+class SharedMemoryCache(CacheBackend):
+    """Cache shared by all processes that open the same file"""
+
+    def __init__(self, path=None, slot_count=1024, slot_size=32 * 1024):
+        super().__init__()
+        if fcntl is None:
+            raise RuntimeError('SharedMemoryCache requires fcntl (POSIX)')
+        self.path = path or default_path()
+        self.slot_count = slot_count
+        self.slot_size = slot_size
+        self._lock = threading.Lock()
+        self._open()
+
+    def _open(self):
+        self._pid = os.getpid()
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            magic, slot_count, slot_size = HEADER.unpack(os.pread(self._fd, HEADER.size, 0).ljust(HEADER.size, b'\0'))
+            if magic == MAGIC:
+                # Another process created the table; its geometry wins
+                self.slot_count, self.slot_size = slot_count, slot_size
+            else:
+                # New file, or an older layout: start from zeroed slots
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, HEADER_SIZE + self.slot_count * self.slot_size)
+                os.pwrite(self._fd, HEADER.pack(MAGIC, self.slot_count, self.slot_size), 0)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._map = mmap.mmap(self._fd, HEADER_SIZE + self.slot_count * self.slot_size)
+
+    def _ensure_own_descriptor(self):
+        # flock is tied to the open file description, which a fork shares with the parent
+        if os.getpid() != self._pid:
+            self._map.close()
+            os.close(self._fd)
+            self._open()
+
+    @property
+    def capacity(self):
+        """Largest value that fits in a slot"""
+        return self.slot_size - SLOT_HEADER.size
+
+    def _digest(self, key):
+        return hashlib.blake2b(key.encode(), digest_size=16).digest()
+
+    def _probe(self, digest):
+        start = int.from_bytes(digest[:8], 'little') % self.slot_count
+        for i in range(PROBE_LENGTH):
+            yield HEADER_SIZE + ((start + i) % self.slot_count) * self.slot_size
+
+    def _read(self, offset, digest):
+        """Consistent read of a slot. Returns (found, expires, value); found is None for a never used slot."""
+        for _ in range(16):
+            seq, slot_digest, expires, length, _ = SLOT_HEADER.unpack_from(self._map, offset)
+            if seq & 1:
+                time.sleep(0)
+                continue
+            if slot_digest != digest:
+                return (None if slot_digest == EMPTY_DIGEST else False), 0.0, None
+            value = self._map[offset + SLOT_HEADER.size:offset + SLOT_HEADER.size + length]
+            if SEQ.unpack_from(self._map, offset)[0] == seq:
+                return True, expires, value
+        return False, 0.0, None
+
+    def get(self, key):
+        digest = self._digest(key)
+        now = time.time()
+        for offset in self._probe(digest):
+            found, expires, value = self._read(offset, digest)
+            if found is None:
+                break
+            if found and expires > now:
+                self._record(True)
+                HITS.pack_into(self._map, offset + HITS_OFFSET,
+                               min(HITS.unpack_from(self._map, offset + HITS_OFFSET)[0] + 1, 0xFFFFFFFF))
+                return value
+        self._record(False)
+        return None
+
+    def _write(self, offset, digest, expires, value, hits=0):
+        seq = SEQ.unpack_from(self._map, offset)[0]
+        SEQ.pack_into(self._map, offset, seq + 1)
+        self._map[offset + SLOT_HEADER.size:offset + SLOT_HEADER.size + len(value)] = value
+        SLOT_HEADER.pack_into(self._map, offset, seq + 1, digest, expires, len(value), hits)
+        SEQ.pack_into(self._map, offset, seq + 2)
+
+    def _locked(self, func):
+        with self._lock:
+            self._ensure_own_descriptor()
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                return func()
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def set(self, key, value, ttl):
+        if len(value) > self.capacity:
+            logging.debug('Cache value for %s too large (%d bytes)', key, len(value))
+            return False
+        digest = self._digest(key)
+
+        def store():
+            now = time.time()
+            free = victim = None
+            victim_expires = float('inf')
+            for offset in self._probe(digest):
+                _, slot_digest, expires, _, _ = SLOT_HEADER.unpack_from(self._map, offset)
+                if slot_digest == digest:
+                    free = offset
+                    break
+                if free is None and (slot_digest == EMPTY_DIGEST or expires <= now):
+                    free = offset
+                if expires < victim_expires:
+                    victim, victim_expires = offset, expires
+            self._write(free if free is not None else victim, digest, now + ttl, value)
+            return True
+
+        return self._locked(store)
+
+    def delete(self, key):
+        digest = self._digest(key)
+
+        def remove():
+            for offset in self._probe(digest):
+                _, slot_digest, _, _, _ = SLOT_HEADER.unpack_from(self._map, offset)
+                if slot_digest == digest:
+                    self._write(offset, digest, 0.0, b'')
+
+        self._locked(remove)
+
+    def entries(self):
+        """
+        Live entries with their hit counts, most used first
+
+        Returns:
+            list: (digest, expires, hits, value) tuples
+        """
+        now = time.time()
+        entries = []
+        for index in range(self.slot_count):
+            offset = HEADER_SIZE + index * self.slot_size
+            digest = SLOT_HEADER.unpack_from(self._map, offset)[1]
+            if digest == EMPTY_DIGEST:
+                continue
+            found, expires, value = self._read(offset, digest)
+            if found and expires > now:
+                entries.append((digest, expires, HITS.unpack_from(self._map, offset + HITS_OFFSET)[0], value))
+        entries.sort(key=lambda entry: entry[2], reverse=True)
+        return entries
+
+    def load_entries(self, entries):
+        """
+        Store entries by digest without replacing live ones
+
+        Entries that are expired, too large, already present or whose probe
+        window has no free slot are skipped, so pass the most valuable first.
+
+        Args:
+            entries (iterable): (digest, expires, hits, value) tuples
+
+        Returns:
+            int: Number of entries stored
+        """
+        def store():
+            now = time.time()
+            stored = 0
+            for digest, expires, hits, value in entries:
+                if expires <= now or len(value) > self.capacity:
+                    continue
+                free = None
+                for offset in self._probe(digest):
+                    _, slot_digest, slot_expires, _, _ = SLOT_HEADER.unpack_from(self._map, offset)
+                    live = slot_digest != EMPTY_DIGEST and slot_expires > now
+                    if slot_digest == digest and live:
+                        free = None
+                        break
+                    if free is None and not live:
+                        free = offset
+                if free is not None:
+                    self._write(free, digest, expires, value, hits)
+                    stored += 1
+            return stored
+
+        return self._locked(store)
+
+    def digest(self, key):
+        """Digest under which a key is stored, for matching keys against entries()"""
+        return self._digest(key)
+
+    def clear(self):
+        """Drop every entry"""
+
+        def wipe():
+            for index in range(self.slot_count):
+                self._write(HEADER_SIZE + index * self.slot_size, EMPTY_DIGEST, 0.0, b'')
+
+        self._locked(wipe)
+
+    def close(self):
+        """Unmap the table; the file stays for other processes"""
+        self._map.close()
+        os.close(self._fd)
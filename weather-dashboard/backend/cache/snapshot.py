@@ -0,0 +1,164 @@
+"""
+Cache snapshots for warm restarts
+
+A restart or deploy of the shared memory backend starts with an empty table,
+so every popular location costs an upstream request again. write_snapshot()
+saves the live entries to a file, pinned keys (the favorites) first and the
+rest by hit count; restore_snapshot() loads it back through a read-only
+memory map on the next start, skipping entries whose TTL ran out meanwhile.
+
+File layout: MAGIC, the record count, then per record the key digest, expiry
+time, hit count and value length followed by the value bytes.
+"""
+
+import logging
+import mmap
+import os
+import struct
+import threading
+
+MAGIC = b'WXSNAP01'
+COUNT = struct.Struct('<I')
+RECORD = struct.Struct('<16sdII')
+
+
+def write_snapshot(cache, path, pinned_keys=(), max_entries=None):
+    """
+    Save the live entries of a cache to a file
+
+    The file is written next to path and renamed over it, so a reader never
+    sees a partial snapshot.
+
+    Args:
+        cache (CacheBackend): The cache
+        path (str): Snapshot file
+        pinned_keys (iterable): Keys saved before all others, e.g. for favorite locations
+        max_entries (int): Keep only this many entries, None for all
+
+    Returns:
+        int: Number of entries saved, 0 if the backend does not support snapshots
+    """
+    entries = cache.entries()
+    if entries is None:
+        return 0
+    pinned = {cache.digest(key) for key in pinned_keys}
+    # sorted() is stable, so the hit count order holds within both groups
+    entries = sorted(entries, key=lambda entry: entry[0] not in pinned)[:max_entries]
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(MAGIC + COUNT.pack(len(entries)))
+        for digest, expires, hits, value in entries:
+            f.write(RECORD.pack(digest, expires, hits, len(value)))
+            f.write(value)
+    os.replace(temp_path, path)
+    return len(entries)
+
+
+def read_snapshot(path):
+    """
+    Yield the records of a snapshot file
+
+    Args:
+        path (str): Snapshot file
+
+    Yields:
+        tuple: (digest, expires, hits, value)
+
+    Raises:
+        ValueError: If the file is not a snapshot
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size < len(MAGIC) + COUNT.size:
+            raise ValueError(f"{path} is not a cache snapshot")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if data[:len(MAGIC)] != MAGIC:
+                raise ValueError(f"{path} is not a cache snapshot")
+            offset = len(MAGIC)
+            count = COUNT.unpack_from(data, offset)[0]
+            offset += COUNT.size
+            for _ in range(count):
+                if offset + RECORD.size > len(data):
+                    raise ValueError(f"{path} is truncated")
+                digest, expires, hits, length = RECORD.unpack_from(data, offset)
+                offset += RECORD.size
+                if offset + length > len(data):
+                    raise ValueError(f"{path} is truncated")
+                yield digest, expires, hits, data[offset:offset + length]
+                offset += length
+
+
+def restore_snapshot(cache, path):
+    """
+    Load a snapshot into a cache
+
+    Entries that expired since the snapshot are skipped, and live entries in
+    the cache are never replaced. A missing or damaged file is not an error;
+    the cache just starts cold.
+
+    Args:
+        cache (CacheBackend): The cache
+        path (str): Snapshot file
+
+    Returns:
+        int: Number of entries restored
+    """
+    if not os.path.exists(path):
+        return 0
+    try:
+        return cache.load_entries(read_snapshot(path))
+    except (OSError, ValueError) as e:
+        logging.warning(f"Cache snapshot not restored: {str(e)}")
+        return 0
+
+
+class SnapshotThread:
+    """Background thread that writes a snapshot every interval seconds"""
+
+    def __init__(self, cache, path, interval, pinned_keys=tuple, max_entries=None):
+        """
+        Args:
+            cache (CacheBackend): The cache
+            path (str): Snapshot file
+            interval (float): Seconds between snapshots
+            pinned_keys (callable): Returns the keys to pin, called for every snapshot
+            max_entries (int): Keep only this many entries, None for all
+        """
+        self.cache = cache
+        self.path = path
+        self.interval = interval
+        self.pinned_keys = pinned_keys
+        self.max_entries = max_entries
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='cache-snapshot', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def snapshot(self):
+        """Write a snapshot now; failures are logged"""
+        try:
+            return write_snapshot(self.cache, self.path, self.pinned_keys(), self.max_entries)
+        except Exception as e:
+            logging.warning(f"Cache snapshot failed: {str(e)}")
+            return 0
+
+    def stop(self, final=True):
+        """
+        Stop the thread
+
+        Args:
+            final (bool): Write one last snapshot, e.g. on shutdown
+        """
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        if final:
+            self.snapshot()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.snapshot()
@@ -0,0 +1,202 @@
+"""
+Ensemble - Several forecast models side by side
+
+How far the models disagree is the most honest measure of how certain a
+forecast is. get_ensemble() asks the upstream for several models in one
+request (the `models` list gives one frame per model), so an ensemble costs a
+single call against the rate limiter and one cache entry per location and
+set of models, whatever order they are asked in. The entry is fresh until the
+first of its models publishes a new run.
+
+Models do not share a time axis: they start at the same hour but end at
+different horizons. Every member is placed on a common hourly axis by index
+arithmetic on its first time, hours a model does not cover stay NaN, and the
+statistics are computed for all time steps at once on the (model x time)
+array of each variable:
+
+    mean, min, max  over the models that cover the hour
+    spread          standard deviation across the models
+    agreement       share of those models within ENSEMBLE_VARIABLES[variable] of the mean
+"""
+
+import os
+
+import numpy as np
+from openmeteo_sdk.Model import Model
+
+import weather_service
+from weather_frames import LazyWeatherResponse, format_times
+from forecast import LOCATION_FIELDS
+
+# Models compared by default; WEATHER_ENSEMBLE_MODELS overrides them as a comma separated list
+ENSEMBLE_MODELS = [model for model in os.getenv(
+    'WEATHER_ENSEMBLE_MODELS', 'ecmwf_ifs025,gfs_seamless,icon_seamless').split(',') if model]
+# Most models in one request; every model adds a full frame to the upstream response and the cache entry,
+# and with every variable an entry of 4 models (about 31 KB) just fits the default 32 KB shared memory slot
+MAX_ENSEMBLE_MODELS = 4
+# Variable -> how close to the mean a model must be to count as agreeing, in the variable's unit
+ENSEMBLE_VARIABLES = {
+    'temperature_2m': 2.0,
+    'precipitation': 1.0,
+    'wind_speed_10m': 5.0,
+    'relative_humidity_2m': 10.0,
+    'cloud_cover': 20.0,
+}
+# Model enum of the frames -> model name
+MODEL_NAMES = {value: name for name, value in vars(Model).items() if isinstance(value, int) and value}
+
+
+def resolve_models(models):
+    """
+    Check the requested models
+
+    Args:
+        models (list): Model names, None for ENSEMBLE_MODELS
+
+    Returns:
+        list: Model names without duplicates, in the requested order
+
+    Raises:
+        ValueError: If a model is unknown or there are too many
+    """
+    models = list(dict.fromkeys(models or ENSEMBLE_MODELS))
+    unknown = [model for model in models if MODEL_NAMES.get(getattr(Model, model, None)) != model]
+    if unknown:
+        raise ValueError(f"Unknown models: {', '.join(unknown)}")
+    if len(models) > MAX_ENSEMBLE_MODELS:
+        raise ValueError(f"At most {MAX_ENSEMBLE_MODELS} models can be compared")
+    return models
+
+
+def split_frames(data):
+    """
+    Decode every frame of an upstream response
+
+    Args:
+        data (bytes): Length-prefixed frames
+
+    Returns:
+        list: One LazyWeatherResponse per frame
+    """
+    responses = []
+    offset = 0
+    while offset < len(data):
+        responses.append(LazyWeatherResponse(data, offset))
+        offset += 4 + int.from_bytes(data[offset:offset + 4], 'little')
+    return responses
+
+
+def spread_statistics(members, tolerance):
+    """
+    Ensemble statistics of one variable, for every time step at once
+
+    Args:
+        members (np.ndarray): (model x time) values, NaN where a model has none
+        tolerance (float): Largest distance from the mean that counts as agreeing
+
+    Returns:
+        dict: float32 'mean', 'min', 'max', 'spread' and 'agreement' per time
+            step, NaN where no model has a value
+    """
+    present = ~np.isnan(members)
+    count = present.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(present, members, 0).sum(axis=0) / count
+        deviation = np.where(present, members - mean, 0)
+        spread = np.sqrt((deviation ** 2).sum(axis=0) / count)
+        agreeing = present & (np.abs(deviation) <= tolerance)
+        agreement = agreeing.sum(axis=0) / count
+    return {
+        'mean': mean.astype(np.float32),
+        'min': np.fmin.reduce(members, axis=0),
+        'max': np.fmax.reduce(members, axis=0),
+        'spread': spread.astype(np.float32),
+        'agreement': agreement.astype(np.float32),
+    }
+
+
+def align_members(responses, variables, first, stop, axis_start):
+    """
+    Place the hourly values of every member on the common axis
+
+    Args:
+        responses (list): LazyWeatherResponse per model
+        variables (list): Hourly variables
+        first (int): First step of the window on the common axis
+        stop (int): End of the window (exclusive)
+        axis_start (int): First time of the common axis in unix seconds
+
+    Returns:
+        dict: Variable -> (model x time) float32 array, NaN where a model has no value
+    """
+    stacks = {name: np.full((len(responses), stop - first), np.nan, dtype=np.float32) for name in variables}
+    for row, response in enumerate(responses):
+        member_axis = response.time_axis('hourly')
+        if member_axis is None:
+            continue
+        shift = (member_axis[0] - axis_start) // member_axis[2]
+        for name in variables:
+            variable = response.variable('hourly', name)
+            if variable is None:
+                continue
+            values = variable.ValuesAsNumpy()
+            begin = max(first, shift)
+            end = min(stop, shift + len(values))
+            if begin < end:
+                stacks[name][row, begin - first:end - first] = values[begin - shift:end - shift]
+    return stacks
+
+
+def get_ensemble(latitude, longitude, models=None, hours=48, fields=None, start=None, end=None):
+    """
+    Compare the hourly forecasts of several models
+
+    Args:
+        latitude (float): The latitude of the location
+        longitude (float): The longitude of the location
+        models (list): Model names, None for ENSEMBLE_MODELS
+        hours (int): Number of hours when end is not given
+        fields (list): Variables of ENSEMBLE_VARIABLES to include, None for all
+        start: First hour, see weather_service.resolve_window
+        end: End of the window (exclusive), like start
+
+    Returns:
+        dict: 'timestamps', 'models', one entry per variable with the
+            statistics of spread_statistics() and 'members' (model -> values),
+            and the location fields
+
+    Raises:
+        ValueError: If a model or field is unknown or the window is invalid
+    """
+    requested = resolve_models(models)
+    variables = weather_service.resolve_fields(fields, list(ENSEMBLE_VARIABLES))
+    # Sorted, so that the same models in another order share the cache entry
+    models = sorted(requested)
+    params = dict(weather_service.hourly_params(latitude, longitude, variables), models=models)
+
+    data = weather_service.cached_fetch('ensemble', params, weather_service.om.get_weather_raw, 'hourly')
+    # Frames come in the order of the models list; members are returned in the requested order
+    frames = dict(zip(models, split_frames(data)))
+    requested = [model for model in requested if model in frames]
+    responses = [frames[model] for model in requested]
+    # The Model field says which is which where it is set
+    names = [MODEL_NAMES.get(response.response.Model(), model) for response, model in zip(responses, requested)]
+
+    axes = [axis for axis in (response.time_axis('hourly') for response in responses) if axis is not None]
+    if not axes:
+        raise ValueError("No hourly data for these models")
+    interval = axes[0][2]
+    axis = (min(axis[0] for axis in axes), max(axis[1] for axis in axes), interval)
+    utc_offset = responses[0].utc_offset
+    first, stop = weather_service.resolve_window(axis, utc_offset, start, end, hours)
+
+    result = {
+        'timestamps': format_times(axis[0] + interval * np.arange(first, stop), utc_offset, 'm'),
+        'models': names,
+    }
+    for name, members in align_members(responses, variables, first, stop, axis[0]).items():
+        statistics = spread_statistics(members, ENSEMBLE_VARIABLES[name])
+        statistics['members'] = dict(zip(names, members))
+        result[name] = statistics
+    result.update({name: value for name, value in responses[0].metadata().items() if name in LOCATION_FIELDS})
+    return result
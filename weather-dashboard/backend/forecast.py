@@ -0,0 +1,231 @@
+"""
+Forecast - Compact time series of one location
+
+Formatted forecasts used to be dicts of Python lists, where every value is a
+boxed float of 24 bytes plus an 8 byte list slot, for each variable and hour.
+A Forecast keeps one int64 time axis shared by all variables and one float32
+column per variable, 4 bytes a value. Columns read from cached frames are
+views into the frame bytes, and slicing a forecast slices every column
+without copying.
+
+A Forecast reads like the dict it replaces: forecast['temperature_2m'] is a
+column, the time key gives local ISO strings and the location fields are
+plain values. to_dict() is the JSON response shape, which
+responses.dumps_bytes and the cache serializer use directly.
+"""
+
+from collections.abc import Mapping
+
+import numpy as np
+
+from weather_frames import INTEGER_VARIABLES, TIMESTAMP_VARIABLES, format_times, parse_variable
+
+LOCATION_FIELDS = ('latitude', 'longitude', 'elevation', 'timezone')
+
+
+def _variable(name):
+    """Open-Meteo variable of a column name, None for derived columns such as feels_like_temperature"""
+    try:
+        return parse_variable(name)[0]
+    except ValueError:
+        return None
+
+
+def column_values(name, values):
+    """
+    A column as JSON-ready Python values
+
+    Args:
+        name (str): Column name, which decides integer and timestamp columns
+        values (np.ndarray): float32 values (int64 unix seconds for timestamp columns)
+
+    Returns:
+        list: Integers for integer variables, shortest floats otherwise, None for missing values
+    """
+    variable = _variable(name)
+    if variable in TIMESTAMP_VARIABLES:
+        return values.tolist()
+    missing = np.isnan(values)
+    if variable in INTEGER_VARIABLES:
+        # NaN has no integer; cast a placeholder and mask it below
+        result = np.rint(np.where(missing, 0, values)).astype(np.int64).tolist()
+    else:
+        # Through the shortest decimal form, so 12.3 does not become 12.300000190734863
+        result = values.astype(str).astype(np.float64).tolist()
+    if missing.any():
+        result = [None if gap else value for value, gap in zip(result, missing.tolist())]
+    return result
+
+
+class Forecast(Mapping):
+    """Time series of one location as float32 columns on a shared time axis"""
+
+    __slots__ = ('time', 'columns', 'utc_offset', 'location', 'time_key', 'time_unit')
+
+    def __init__(self, time, columns=None, utc_offset=0, location=None, time_key='time', time_unit='m'):
+        """
+        Args:
+            time (np.ndarray): Unix seconds of each step
+            columns (dict): Column name -> values, stored with set_column()
+            utc_offset (int): Offset of the location's timezone in seconds, for formatting times
+            location (dict): latitude, longitude, elevation and timezone
+            time_key (str): Key of the formatted time axis, e.g. 'timestamps'
+            time_unit (str): 'm' to format times as date and time, 'D' as dates
+        """
+        self.time = np.asarray(time, dtype=np.int64)
+        self.columns = {}
+        self.utc_offset = utc_offset
+        self.location = dict(location or {})
+        self.time_key = time_key
+        self.time_unit = time_unit
+        for name, values in (columns or {}).items():
+            self.set_column(name, values)
+
+    @classmethod
+    def from_frames(cls, response, section, variables, start=0, stop=None):
+        """
+        Read a time series section of cached frames without copying the values
+
+        Args:
+            response (LazyWeatherResponse): Decoded frames
+            section (str): 'hourly' or 'daily'
+            variables (list): Variable names to include; those not in the response are left out
+            start (int): First time step
+            stop (int): End of the slice (exclusive), None for all
+
+        Returns:
+            Forecast: Columns are views into the frame bytes
+        """
+        arrays = response.arrays(section, [])
+        location = {name: value for name, value in response.metadata().items() if name in LOCATION_FIELDS}
+        if not arrays:
+            return cls(np.array([], dtype=np.int64), {}, response.utc_offset, location)
+        time = arrays['time']
+        columns = {}
+        for name in variables:
+            variable = response.variable(section, name)
+            if variable is None:
+                continue
+            if variable.Variable() in TIMESTAMP_VARIABLES:
+                columns[name] = variable.ValuesInt64AsNumpy()[start:stop]
+            else:
+                columns[name] = variable.ValuesAsNumpy()[start:stop]
+        unit = 'D' if len(time) > 1 and time[1] - time[0] >= 86400 else 'm'
+        return cls(time[start:stop], columns, response.utc_offset, location, time_unit=unit)
+
+    @classmethod
+    def from_json(cls, response, section):
+        """
+        Read a time series section of an Open-Meteo JSON response
+
+        Args:
+            response (dict): Response with local ISO times in response[section]['time']
+            section (str): 'hourly' or 'daily'
+
+        Returns:
+            Forecast: Times are kept as local times, with a utc_offset of 0
+        """
+        series = response.get(section, {})
+        time = np.array(series.get('time', []), dtype='datetime64[s]').astype(np.int64)
+        unit = 'D' if len(time) > 1 and time[1] - time[0] >= 86400 else 'm'
+        location = {name: response.get(name) for name in LOCATION_FIELDS}
+        columns = {}
+        for name, values in series.items():
+            if name == 'time' or not len(values):
+                continue
+            if _variable(name) in TIMESTAMP_VARIABLES:
+                values = np.array(values, dtype='datetime64[s]').astype(np.int64)
+            columns[name] = values[:len(time)]
+        return cls(time, columns, 0, location, time_unit=unit)
+
+    def set_column(self, name, values):
+        """
+        Add or replace a column
+
+        Values are stored as float32, missing ones (None) as NaN, and a short
+        column is padded with NaN. Timestamp variables such as sunrise stay
+        int64 unix seconds.
+
+        Args:
+            name (str): Column name
+            values: Array or list with at most one value per time step
+
+        Raises:
+            ValueError: More values than time steps, or a timestamp column of the wrong length
+        """
+        count = len(self.time)
+        if _variable(name) in TIMESTAMP_VARIABLES:
+            values = np.asarray(values, dtype=np.int64)
+            if len(values) != count:
+                raise ValueError(f"Column {name} has {len(values)} values for {count} time steps")
+        else:
+            values = np.asarray(values, dtype=np.float32)
+            if len(values) > count:
+                raise ValueError(f"Column {name} has {len(values)} values for {count} time steps")
+            if len(values) < count:
+                values = np.concatenate([values, np.full(count - len(values), np.nan, dtype=np.float32)])
+        self.columns[name] = values
+
+    def times(self):
+        """The time axis as local ISO strings"""
+        return format_times(self.time, self.utc_offset, self.time_unit)
+
+    def slice(self, start, stop=None):
+        """A forecast of time steps start to stop, sharing memory with this one"""
+        return Forecast(self.time[start:stop], {name: values[start:stop] for name, values in self.columns.items()},
+                        self.utc_offset, self.location, self.time_key, self.time_unit)
+
+    def select(self, names):
+        """A forecast with only the named columns, plus the time axis and location"""
+        return Forecast(self.time, {name: values for name, values in self.columns.items() if name in names},
+                        self.utc_offset, self.location, self.time_key, self.time_unit)
+
+    @property
+    def nbytes(self):
+        """Bytes taken by the time axis and columns"""
+        return self.time.nbytes + sum(values.nbytes for values in self.columns.values())
+
+    def as_list(self, key):
+        """A column or the time axis as JSON-ready Python values, for callers that need lists"""
+        if key == self.time_key:
+            return self.times()
+        return column_values(key, self.columns[key])
+
+    def to_dict(self):
+        """
+        The forecast in the JSON response shape
+
+        Returns:
+            dict: Formatted times, columns as arrays (integer variables as
+                int64, timestamps as local ISO strings) and the location fields
+        """
+        result = {self.time_key: self.times()}
+        for name, values in self.columns.items():
+            variable = _variable(name)
+            if variable in TIMESTAMP_VARIABLES:
+                result[name] = format_times(values, self.utc_offset, 'm')
+            elif variable in INTEGER_VARIABLES and not np.isnan(values).any():
+                result[name] = np.rint(values).astype(np.int64)
+            elif variable in INTEGER_VARIABLES:
+                result[name] = column_values(name, values)
+            else:
+                result[name] = values
+        result.update(self.location)
+        return result
+
+    def __getitem__(self, key):
+        if key == self.time_key:
+            return self.times()
+        if key in self.columns:
+            if _variable(key) in TIMESTAMP_VARIABLES:
+                return format_times(self.columns[key], self.utc_offset, 'm')
+            return self.columns[key]
+        return self.location[key]
+
+    def __iter__(self):
+        yield self.time_key
+        yield from self.columns
+        yield from self.location
+
+    def __len__(self):
+        return 1 + len(self.columns) + len(self.location)
@@ -0,0 +1,254 @@
+"""
+Geocoding - Place search and reverse geocoding from a local gazetteer
+
+Location search and "current location" names are answered from a GeoNames
+dump loaded by the backend, instead of a third-party service on every
+keystroke. Build the index once from e.g. cities15000.txt and countryInfo.txt
+(https://download.geonames.org/export/dump/):
+
+    python geocoding.py cities15000.txt --countries countryInfo.txt --output data/gazetteer
+
+The index is a directory of NumPy arrays opened with mmap_mode='r', so
+startup does not parse anything and all workers share the same pages:
+
+- keys.npy: normalized names, sorted, for prefix search with searchsorted
+- key_places.npy: place of each key
+- cells.npy / cell_starts.npy: places ordered by 1° grid cell, for reverse lookup
+- latitude.npy, longitude.npy, population.npy: per place
+- labels.bin / label_offsets.npy: "name\\tcountry\\tstate" per place
+"""
+
+import argparse
+import csv
+import os
+import sys
+import unicodedata
+
+import numpy as np
+
+GAZETTEER_PATH = os.getenv('GAZETTEER_PATH', os.path.join(os.path.dirname(__file__), 'data', 'gazetteer'))
+
+# Longer names are still found by their first KEY_LENGTH bytes
+KEY_LENGTH = 24
+# 1° cells: 360 x 180
+CELL_COLUMNS = 360
+CELL_ROWS = 180
+EARTH_RADIUS_KM = 6371.0
+
+
+def normalize(text):
+    """Lowercase ASCII form of a name for matching: 'Zürich' -> 'zurich'"""
+    decomposed = unicodedata.normalize('NFKD', text.casefold())
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).encode('ascii', 'ignore').decode()
+
+
+def cell_ids(latitudes, longitudes):
+    """Grid cell of each coordinate"""
+    rows = np.clip(np.floor(np.asarray(latitudes) + 90), 0, CELL_ROWS - 1).astype(np.int64)
+    columns = np.floor(np.asarray(longitudes) + 180).astype(np.int64) % CELL_COLUMNS
+    return rows * CELL_COLUMNS + columns
+
+
+def build_index(places_path, output, countries_path=None):
+    """
+    Build the index directory from a GeoNames places dump
+
+    Args:
+        places_path (str): Tab separated GeoNames file, e.g. cities15000.txt
+        output (str): Index directory to write
+        countries_path (str): GeoNames countryInfo.txt for country names, codes are used without it
+
+    Returns:
+        int: Number of places
+    """
+    countries, states = {}, {}
+    if countries_path:
+        with open(countries_path, encoding='utf-8') as f:
+            for row in csv.reader(f, delimiter='\t'):
+                if row and not row[0].startswith('#') and len(row) > 4:
+                    countries[row[0]] = row[4]
+        # admin1CodesASCII.txt next to countryInfo.txt names the states
+        admin_path = os.path.join(os.path.dirname(countries_path), 'admin1CodesASCII.txt')
+        if os.path.exists(admin_path):
+            with open(admin_path, encoding='utf-8') as f:
+                states = {row[0]: row[1] for row in csv.reader(f, delimiter='\t') if len(row) > 1}
+
+    labels, latitudes, longitudes, populations, keys, key_places = [], [], [], [], [], []
+    with open(places_path, encoding='utf-8') as f:
+        for row in csv.reader(f, delimiter='\t', quoting=csv.QUOTE_NONE):
+            if len(row) < 15:
+                continue
+            place = len(labels)
+            name, ascii_name, country_code = row[1], row[2], row[8]
+            state = states.get(f"{country_code}.{row[10]}", '')
+            labels.append(f"{name}\t{countries.get(country_code, country_code)}\t{state}")
+            latitudes.append(float(row[4]))
+            longitudes.append(float(row[5]))
+            populations.append(int(row[14] or 0))
+            for key in {normalize(name), normalize(ascii_name)}:
+                if key:
+                    keys.append(key.encode()[:KEY_LENGTH])
+                    key_places.append(place)
+
+    os.makedirs(output, exist_ok=True)
+    keys = np.array(keys, dtype=f'S{KEY_LENGTH}')
+    order = np.argsort(keys, kind='stable')
+    np.save(os.path.join(output, 'keys.npy'), keys[order])
+    np.save(os.path.join(output, 'key_places.npy'), np.array(key_places, dtype=np.int32)[order])
+
+    latitudes = np.array(latitudes, dtype=np.float32)
+    longitudes = np.array(longitudes, dtype=np.float32)
+    cells = cell_ids(latitudes, longitudes)
+    by_cell = np.argsort(cells, kind='stable').astype(np.int32)
+    starts = np.searchsorted(cells[by_cell], np.arange(CELL_ROWS * CELL_COLUMNS + 1))
+    np.save(os.path.join(output, 'cells.npy'), by_cell)
+    np.save(os.path.join(output, 'cell_starts.npy'), starts.astype(np.int32))
+    np.save(os.path.join(output, 'latitude.npy'), latitudes)
+    np.save(os.path.join(output, 'longitude.npy'), longitudes)
+    np.save(os.path.join(output, 'population.npy'), np.array(populations, dtype=np.int64))
+
+    encoded = [label.encode() for label in labels]
+    np.save(os.path.join(output, 'label_offsets.npy'), np.concatenate(([0], np.cumsum([len(b) for b in encoded]))))
+    with open(os.path.join(output, 'labels.bin'), 'wb') as f:
+        f.write(b''.join(encoded))
+    return len(labels)
+
+
+_gazetteer = None
+
+
+def get_gazetteer():
+    """
+    The shared Gazetteer, opened on first use
+
+    Raises:
+        FileNotFoundError: If the index has not been built at GAZETTEER_PATH
+    """
+    global _gazetteer
+    if _gazetteer is None:
+        _gazetteer = Gazetteer(GAZETTEER_PATH)
+    return _gazetteer
+
+
+class Gazetteer:
+    """Memory-mapped place index with prefix search and reverse lookup"""
+
+    def __init__(self, path=GAZETTEER_PATH):
+        """
+        Args:
+            path (str): Index directory written by build_index
+
+        Raises:
+            FileNotFoundError: If the index has not been built
+        """
+        def load(name):
+            return np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r')
+
+        self.keys = load('keys')
+        self.key_places = load('key_places')
+        self.cells = load('cells')
+        self.cell_starts = load('cell_starts')
+        self.latitude = load('latitude')
+        self.longitude = load('longitude')
+        self.population = load('population')
+        self.label_offsets = load('label_offsets')
+        self.labels = np.memmap(os.path.join(path, 'labels.bin'), dtype=np.uint8, mode='r') \
+            if self.label_offsets[-1] else np.zeros(0, dtype=np.uint8)
+
+    def __len__(self):
+        return len(self.latitude)
+
+    def place(self, index, distance_km=None):
+        """A place as returned by the API"""
+        start, end = self.label_offsets[index], self.label_offsets[index + 1]
+        name, country, state = bytes(self.labels[start:end]).decode().split('\t')
+        place = {
+            'name': name,
+            'country': country,
+            'latitude': round(float(self.latitude[index]), 4),
+            'longitude': round(float(self.longitude[index]), 4),
+            'population': int(self.population[index]),
+        }
+        if state:
+            place['state'] = state
+        if distance_km is not None:
+            place['distance_km'] = round(float(distance_km), 1)
+        return place
+
+    def search(self, query, limit=10):
+        """
+        Places whose name starts with query, most populous first
+
+        Args:
+            query (str): Name prefix, case and accents are ignored
+            limit (int): Maximum number of places
+
+        Returns:
+            list: Places
+        """
+        prefix = normalize(query).strip().encode()[:KEY_LENGTH]
+        if not prefix or limit < 1:
+            return []
+        # All keys with the prefix form one contiguous run of the sorted array
+        low = np.searchsorted(self.keys, prefix, side='left')
+        if len(prefix) == KEY_LENGTH:
+            high = np.searchsorted(self.keys, prefix, side='right')
+        else:
+            high = np.searchsorted(self.keys, prefix + b'\xff', side='left')
+        places = np.unique(self.key_places[low:high])
+        if len(places) > limit:
+            places = places[np.argpartition(-self.population[places], limit - 1)[:limit]]
+        places = places[np.argsort(-self.population[places], kind='stable')]
+        return [self.place(index) for index in places]
+
+    def reverse(self, latitude, longitude, max_distance_km=50.0):
+        """
+        Nearest place to a coordinate
+
+        Args:
+            latitude (float): The latitude
+            longitude (float): The longitude
+            max_distance_km (float): Search radius
+
+        Returns:
+            dict: The nearest place with its distance, or None if there is none within the radius
+        """
+        row, column = divmod(int(cell_ids(latitude, longitude)), CELL_COLUMNS)
+        # One degree of latitude is ~111 km; longitude cells shrink towards the poles
+        rows = int(max_distance_km // 111) + 1
+        edge = abs(latitude) + rows
+        columns = CELL_COLUMNS // 2 if edge >= 89 else int(np.ceil(rows / np.cos(np.radians(edge))))
+        candidates = []
+        for r in range(max(0, row - rows), min(CELL_ROWS, row + rows + 1)):
+            for c in range(column - columns, column + columns + 1):
+                cell = r * CELL_COLUMNS + c % CELL_COLUMNS
+                candidates.append(self.cells[self.cell_starts[cell]:self.cell_starts[cell + 1]])
+        candidates = np.unique(np.concatenate(candidates)) if candidates else np.array([], dtype=np.int32)
+        if not len(candidates):
+            return None
+
+        lat1, lon1 = np.radians(latitude), np.radians(longitude)
+        lat2 = np.radians(self.latitude[candidates].astype(np.float64))
+        lon2 = np.radians(self.longitude[candidates].astype(np.float64))
+        a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+        distances = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+        nearest = int(np.argmin(distances))
+        if distances[nearest] > max_distance_km:
+            return None
+        return self.place(candidates[nearest], distances[nearest])
+
+
+def main(argv=None):
+    """Command line entry point for building the index"""
+    parser = argparse.ArgumentParser(description='Build the gazetteer index from a GeoNames dump')
+    parser.add_argument('places', help='GeoNames places file, e.g. cities15000.txt')
+    parser.add_argument('--countries', help='GeoNames countryInfo.txt for country names')
+    parser.add_argument('--output', default=GAZETTEER_PATH, help='Index directory')
+    args = parser.parse_args(argv)
+    count = build_index(args.places, args.output, args.countries)
+    print(f"Indexed {count} places in {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
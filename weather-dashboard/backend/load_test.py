@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Load Test - Capacity report for the Flask backend
+
+Starts the upstream stand-in, launches the backend under gunicorn with each
+worker model (sync, threaded, gevent) and drives a realistic mix of
+current/hourly/daily/favorites traffic at increasing concurrency. For every
+step it reports throughput, latency percentiles and server CPU per request.
+
+Usage:
+    python load_test.py --models sync threaded gevent --concurrency 1 4 16 64
+"""
+
+import argparse
+import importlib.util
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import psutil
+import requests
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Gunicorn settings for each worker model, passed through gunicorn.conf.py
+WORKER_MODELS = {
+    'sync': {'GUNICORN_WORKER_CLASS': 'sync', 'GUNICORN_THREADS': '1'},
+    'threaded': {'GUNICORN_WORKER_CLASS': 'gthread', 'GUNICORN_THREADS': '16'},
+    'gevent': {'GUNICORN_WORKER_CLASS': 'gevent', 'GUNICORN_THREADS': '1'},
+}
+
+# A handful of popular locations; traffic is skewed towards the first entries
+LOCATIONS = [
+    (51.5074, -0.1278),
+    (40.7128, -74.0060),
+    (48.8566, 2.3522),
+    (52.5200, 13.4050),
+    (35.6895, 139.6917),
+    (-33.8688, 151.2093),
+    (37.7749, -122.4194),
+    (55.7558, 37.6173),
+    (19.4326, -99.1332),
+    (1.3521, 103.8198),
+]
+
+# (weight, method, path template) - mirrors what one dashboard page load issues
+TRAFFIC_MIX = [
+    (40, 'GET', '/weather/current?lat={lat}&lon={lon}'),
+    (25, 'GET', '/weather/forecast/hourly?lat={lat}&lon={lon}&hours=48'),
+    (20, 'GET', '/weather/forecast/daily?lat={lat}&lon={lon}&days=7'),
+    (15, 'GET', '/favorites'),
+]
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(q / 100 * len(sorted_values))
+    return sorted_values[max(0, min(len(sorted_values), rank) - 1)]
+
+
+def pick_request(rng):
+    """Choose the next request from the traffic mix"""
+    total = sum(weight for weight, _, _ in TRAFFIC_MIX)
+    roll = rng.uniform(0, total)
+    for weight, method, template in TRAFFIC_MIX:
+        roll -= weight
+        if roll <= 0:
+            break
+    lat, lon = LOCATIONS[min(int(rng.paretovariate(1.2)) - 1, len(LOCATIONS) - 1)]
+    return method, template.format(lat=lat, lon=lon)
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_ready(url, timeout=20.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(url, timeout=1).status_code < 500:
+                return
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not become ready within {timeout}s")
+
+
+def _cpu_seconds(process):
+    """User + system CPU time of a process and all of its children"""
+    total = 0.0
+    for proc in [process] + process.children(recursive=True):
+        try:
+            times = proc.cpu_times()
+            total += times.user + times.system
+        except psutil.NoSuchProcess:
+            pass
+    return total
+
+
+def model_available(model):
+    """Whether the packages needed for a worker model are installed"""
+    if importlib.util.find_spec('gunicorn') is None:
+        return False
+    if model == 'gevent':
+        return importlib.util.find_spec('gevent') is not None
+    return True
+
+
+class BackendServer:
+    """The backend running under gunicorn with one worker of the given model"""
+
+    def __init__(self, model, upstream_url, workdir):
+        self.model = model
+        self.port = _free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.env = dict(os.environ)
+        self.env.update(WORKER_MODELS[model])
+        self.env.update({
+            'GUNICORN_BIND': f"127.0.0.1:{self.port}",
+            'GUNICORN_WORKERS': '1',
+            'OPEN_METEO_API_URL': upstream_url,
+            # Measure the backend itself, not the upstream rate limit
+            'OPEN_METEO_RATE_LIMIT': os.getenv('OPEN_METEO_RATE_LIMIT', '100000'),
+            'OPEN_METEO_RATE_BURST': os.getenv('OPEN_METEO_RATE_BURST', '100000'),
+            'FAVORITES_FILE': os.path.join(workdir, 'favorites.json'),
+            # Every run starts with its own cold cache
+            'WEATHER_CACHE_PATH': os.path.join(workdir, 'cache'),
+            'PYTHONPATH': BACKEND_DIR,
+        })
+        self.workdir = workdir
+        self.process = None
+
+    def __enter__(self):
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', os.path.join(BACKEND_DIR, 'gunicorn.conf.py'), 'wsgi:app'],
+            cwd=self.workdir,
+            env=self.env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            _wait_until_ready(f"{self.url}/weather/codes")
+        except RuntimeError:
+            self.__exit__()
+            raise
+        return self
+
+    def __exit__(self, *exc_info):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+def run_step(server, concurrency, duration, warmup=1.0, seed=0):
+    """
+    Drive the server with a closed loop of `concurrency` clients
+
+    Args:
+        server (BackendServer): Running backend
+        concurrency (int): Number of concurrent clients
+        duration (float): Measurement window in seconds
+        warmup (float): Seconds of traffic before measuring starts
+        seed (int): Seed for the traffic mix
+
+    Returns:
+        dict: Throughput, latency percentiles and CPU cost for the step
+    """
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    measuring = threading.Event()
+    stop = threading.Event()
+
+    def client(index):
+        rng = random.Random(seed * 1000 + index)
+        session = requests.Session()
+        while not stop.is_set():
+            method, path = pick_request(rng)
+            started = time.perf_counter()
+            try:
+                ok = session.request(method, server.url + path, timeout=30).status_code < 500
+            except requests.exceptions.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - started
+            if measuring.is_set() and not stop.is_set():
+                with lock:
+                    if ok:
+                        latencies.append(elapsed)
+                    else:
+                        errors[0] += 1
+        session.close()
+
+    threads = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+
+    time.sleep(warmup)
+    process = psutil.Process(server.process.pid)
+    cpu_before = _cpu_seconds(process)
+    measuring.set()
+    started = time.perf_counter()
+    time.sleep(duration)
+    stop.set()
+    elapsed = time.perf_counter() - started
+    cpu_used = _cpu_seconds(process) - cpu_before
+    for thread in threads:
+        thread.join(timeout=30)
+
+    latencies.sort()
+    completed = len(latencies)
+    return {
+        'concurrency': concurrency,
+        'requests': completed,
+        'errors': errors[0],
+        'rps': completed / elapsed,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'cpu_ms_per_request': cpu_used / completed * 1000 if completed else 0.0,
+    }
+
+
+def recommend(steps, slo_ms):
+    """Highest-throughput step whose p99 stays within the latency objective"""
+    within = [step for step in steps if step['p99_ms'] <= slo_ms and step['errors'] == 0]
+    return max(within, key=lambda step: step['rps']) if within else None
+
+
+def format_report(report, slo_ms):
+    """Render the capacity report as a plain-text table"""
+    lines = [
+        f"Capacity report (upstream latency {report['upstream_latency_ms']:.0f} ms, "
+        f"{report['duration']:.0f}s per step, p99 objective {slo_ms:.0f} ms)",
+        '',
+        f"{'model':<10}{'conc':>6}{'rps':>10}{'p50 ms':>10}{'p99 ms':>10}{'cpu ms/req':>12}{'errors':>8}",
+    ]
+    for model, steps in report['models'].items():
+        for step in steps:
+            lines.append(
+                f"{model:<10}{step['concurrency']:>6}{step['rps']:>10.1f}{step['p50_ms']:>10.1f}"
+                f"{step['p99_ms']:>10.1f}{step['cpu_ms_per_request']:>12.2f}{step['errors']:>8}"
+            )
+    lines.append('')
+    for model, steps in report['models'].items():
+        best = recommend(steps, slo_ms)
+        if best:
+            lines.append(
+                f"{model}: sustains {best['rps']:.0f} rps per worker at concurrency {best['concurrency']} "
+                f"(p99 {best['p99_ms']:.0f} ms, {best['cpu_ms_per_request']:.2f} ms CPU/request)"
+            )
+        else:
+            lines.append(f"{model}: no step met the p99 objective")
+    for model in report['skipped']:
+        lines.append(f"{model}: skipped (worker dependencies not installed)")
+    return '\n'.join(lines)
+
+
+def run_load_test(models, concurrency_levels, duration, upstream_latency_ms):
+    """
+    Run the full sweep and return the capacity report
+
+    Args:
+        models (list): Worker model names from WORKER_MODELS
+        concurrency_levels (list): Concurrency values to sweep
+        duration (float): Seconds to measure at each concurrency level
+        upstream_latency_ms (float): Median latency of the upstream stand-in
+
+    Returns:
+        dict: Results per worker model
+    """
+    report = {
+        'upstream_latency_ms': upstream_latency_ms,
+        'duration': duration,
+        'cpu_count': os.cpu_count(),
+        'models': {},
+        'skipped': [],
+    }
+    upstream_port = _free_port()
+    upstream = subprocess.Popen(
+        [sys.executable, os.path.join(BACKEND_DIR, 'upstream_standin.py'),
+         '--port', str(upstream_port), '--latency-ms', str(upstream_latency_ms)],
+        stdout=subprocess.DEVNULL,
+    )
+    upstream_url = f"http://127.0.0.1:{upstream_port}/v1/forecast"
+    try:
+        _wait_until_ready(upstream_url)
+        for model in models:
+            if not model_available(model):
+                report['skipped'].append(model)
+                continue
+            with tempfile.TemporaryDirectory() as workdir, BackendServer(model, upstream_url, workdir) as server:
+                report['models'][model] = [
+                    run_step(server, concurrency, duration, seed=concurrency) for concurrency in concurrency_levels
+                ]
+    finally:
+        upstream.terminate()
+        upstream.wait(timeout=10)
+    return report
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Capacity report for the weather dashboard backend')
+    parser.add_argument('--models', nargs='+', default=list(WORKER_MODELS), choices=list(WORKER_MODELS))
+    parser.add_argument('--concurrency', nargs='+', type=int, default=[1, 4, 16, 64])
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds to measure per concurrency level')
+    parser.add_argument('--upstream-latency-ms', type=float, default=30.0)
+    parser.add_argument('--slo-ms', type=float, default=500.0, help='p99 latency objective for recommendations')
+    parser.add_argument('--output', help='Write the raw report as JSON to this file')
+    args = parser.parse_args()
+
+    report = run_load_test(args.models, args.concurrency, args.duration, args.upstream_latency_ms)
+    print(format_report(report, args.slo_ms))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
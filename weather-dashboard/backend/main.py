@@ -1,32 +1,62 @@
 """
 Main Flask application for the Weather Dashboard backend
+
+Routes live on the `api` blueprint and create_app() builds the application.
+Importing this module has no side effects beyond reading the environment:
+logging, memory monitoring and data directories are set up by create_app(),
+and the upstream client and cache connect on their first request.
 """
 
-from flask import Flask, jsonify, request
+from flask import Blueprint, Flask, Response, g, jsonify, request
 from flask_cors import CORS
 import os
 import json
-from weather_service import get_current_weather, get_hourly_forecast, get_daily_forecast
+import atexit
+import hmac
+import math
+import time
+from openmeteo_requests import CircuitOpenError, RateLimitError
+from weather_service import (get_current_weather, get_hourly_forecast, get_daily_forecast, get_weather_alerts,
+                             favorite_cache_keys, restore_cache, start_cache_snapshots, cache as weather_cache,
+                             om as upstream_client)
+from ensemble import get_ensemble
+from push import LocationHub
+from responses import FastJSONProvider, StaticPayload
+from tiles import TILE_LAYERS, TILE_TTL, encode_png, get_tile
+from geocoding import get_gazetteer
 from dotenv import load_dotenv
 import traceback
-from utils.logger import setup_error_logging, start_memory_logging, logger, performance_monitor
+import admission
+from admission import AdmissionControl
+from utils.logger import configure_logging, setup_error_logging, start_memory_logging, logger, performance_monitor
+from utils.profiler import ProfilerBusyError, SamplingProfiler, collapsed, speedscope
 
 # Load environment variables
 load_dotenv()
 
-# Initialize Flask app
-app = Flask(__name__)
-CORS(app)
+api = Blueprint('api', __name__)
 
-# Set up error logging and memory monitoring
-setup_error_logging(app)
-start_memory_logging()
+# Server-Sent Events subscriptions; every open stream holds a server thread, so leave threads for requests
+location_hub = LocationHub(max_subscribers=int(os.getenv('PUSH_MAX_STREAMS', 8)))
 
-# Path to favorites JSON file
-FAVORITES_FILE = os.path.join(os.path.dirname(__file__), 'data', 'favorites.json')
+# Concurrency limits per route class; routes not listed here are cheap and always admitted
+request_admission = AdmissionControl()
+ROUTE_CLASSES = {
+    'api.current_weather': 'forecast',
+    'api.hourly_forecast': 'forecast',
+    'api.daily_forecast': 'forecast',
+    'api.weather_ensemble': 'forecast',
+    'api.weather_tile': 'forecast',
+    'api.weather_alerts': 'alerts',
+}
+
+# Stack sampler for /admin/profile; off until a profile is requested
+profiler = SamplingProfiler()
+# Token for the /admin routes, sent as X-Admin-Token; without it they answer 404
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
 
-# Ensure data directory exists
-os.makedirs(os.path.dirname(FAVORITES_FILE), exist_ok=True)
+# Path to favorites JSON file
+FAVORITES_FILE = os.getenv('FAVORITES_FILE', os.path.join(os.path.dirname(__file__), 'data', 'favorites.json'))
 
 # Weather code descriptions
 WEATHER_CODES = {
@@ -60,7 +90,21 @@ WEATHER_CODES = {
     99: "Thunderstorm with heavy hail"
 }
 
-@app.before_request
+# The code table never changes at runtime, so it is serialized once
+WEATHER_CODES_PAYLOAD = StaticPayload(WEATHER_CODES)
+
+@api.before_app_request
+def profile_request():
+    """Tell the profiler which route this thread is handling; nothing happens while it is off"""
+    if request.endpoint != 'api.admin_profile':
+        profiler.enter(request.endpoint or request.path)
+
+@api.teardown_app_request
+def end_profile_request(error=None):
+    """The thread is done with its request"""
+    profiler.leave()
+
+@api.before_app_request
 def before_request():
     # Log request details
     logger.info(
@@ -74,7 +118,29 @@ def before_request():
         }
     )
 
-@app.after_request
+@api.before_app_request
+def admit_request():
+    """Take a slot of the route's class; without one in time the request runs from the cache only"""
+    route_class = ROUTE_CLASSES.get(request.endpoint)
+    if route_class is None:
+        return
+    admitted = request_admission.acquire(route_class)
+    if not admitted:
+        logger.warning('Route class %s is full, serving %s from the cache only', route_class, request.path)
+    g.admission = (route_class, admitted, admission.begin(request_admission.deadline, not admitted))
+
+@api.teardown_app_request
+def release_request(error=None):
+    """Give back the request's slot and end its deadline"""
+    state = g.pop('admission', None)
+    if state is None:
+        return
+    route_class, admitted, token = state
+    admission.end(token)
+    if admitted:
+        request_admission.release(route_class)
+
+@api.after_app_request
 def after_request(response):
     # Log response details
     logger.info(
@@ -88,7 +154,26 @@ def after_request(response):
     )
     return response
 
-@app.route('/weather/current', methods=['GET'])
+def upstream_unavailable(error):
+    """503 response for requests the upstream guards or admission control refused, with a retry hint"""
+    logger.warning('Upstream unavailable: %s', str(error))
+    response = jsonify({"error": str(error)})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(max(1, math.ceil(getattr(error, 'retry_after', 1))))
+    return response
+
+def requested_fields():
+    """Forecast fields from the comma separated `fields` query parameter, None for all"""
+    fields = request.args.get('fields')
+    if not fields:
+        return None
+    return [field.strip() for field in fields.split(',') if field.strip()]
+
+def requested_window():
+    """start and end query parameters that were given, as keyword arguments for the forecast functions"""
+    return {name: request.args[name] for name in ('start', 'end') if request.args.get(name)}
+
+@api.route('/weather/current', methods=['GET'])
 def current_weather():
     """Get current weather for a location"""
     try:
@@ -102,13 +187,46 @@ def current_weather():
 
         weather_data = get_current_weather(lat, lon)
         return jsonify(weather_data)
+    except (CircuitOpenError, RateLimitError) as e:
+        return upstream_unavailable(e)
     except Exception as e:
         logger.exception('Error fetching current weather: %s', str(e))
         return jsonify({"error": str(e)}), 500
 
-@app.route('/weather/forecast/hourly', methods=['GET'])
+@api.route('/weather/stream', methods=['GET'])
+def weather_stream():
+    """Stream current weather for a location as Server-Sent Events: a snapshot, then changed fields"""
+    try:
+        lat = float(request.args.get('lat', 0))
+        lon = float(request.args.get('lon', 0))
+        subscription = location_hub.subscribe(lat, lon)
+    except OverflowError as e:
+        # Clients fall back to polling /weather/current
+        response = jsonify({"error": str(e)})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(location_hub.interval)
+        return response
+    except (CircuitOpenError, RateLimitError) as e:
+        return upstream_unavailable(e)
+    except Exception as e:
+        logger.exception('Error subscribing to current weather: %s', str(e))
+        return jsonify({"error": str(e)}), 500
+
+    return Response(location_hub.events(subscription), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        # Stop reverse proxies from buffering the stream
+        'X-Accel-Buffering': 'no'
+    })
+
+@api.route('/weather/forecast/hourly', methods=['GET'])
 def hourly_forecast():
-    """Get hourly forecast for a location"""
+    """
+    Get hourly forecast for a location, optionally only the comma separated `fields`
+
+    `start` and `end` select a window, as hours from the start of today (e.g.
+    start=12&end=36, or start=-6 for past hours) or local ISO times; without
+    `end` the window is `hours` long.
+    """
     try:
         lat = float(request.args.get('lat', 0))
         lon = float(request.args.get('lon', 0))
@@ -120,15 +238,24 @@ def hourly_forecast():
             'hours': hours
         })
 
-        forecast_data = get_hourly_forecast(lat, lon, hours)
+        forecast_data = get_hourly_forecast(lat, lon, hours, requested_fields(), **requested_window())
         return jsonify(forecast_data)
+    except (CircuitOpenError, RateLimitError) as e:
+        return upstream_unavailable(e)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         logger.exception('Error fetching hourly forecast: %s', str(e))
         return jsonify({"error": str(e)}), 500
 
-@app.route('/weather/forecast/daily', methods=['GET'])
+@api.route('/weather/forecast/daily', methods=['GET'])
 def daily_forecast():
-    """Get daily forecast for a location"""
+    """
+    Get daily forecast for a location (weekly with period=week), optionally only the comma separated `fields`
+
+    `start` and `end` select a window, as days from today or local ISO dates;
+    without `end` the window is `days` long.
+    """
     try:
         lat = float(request.args.get('lat', 0))
         lon = float(request.args.get('lon', 0))
@@ -140,18 +267,141 @@ def daily_forecast():
             'days': days
         })
 
-        forecast_data = get_daily_forecast(lat, lon, days)
+        period = request.args.get('period', 'day')
+        forecast_data = get_daily_forecast(lat, lon, days, requested_fields(), period, **requested_window())
         return jsonify(forecast_data)
+    except (CircuitOpenError, RateLimitError) as e:
+        return upstream_unavailable(e)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         logger.exception('Error fetching daily forecast: %s', str(e))
         return jsonify({"error": str(e)}), 500
 
-@app.route('/weather/codes', methods=['GET'])
+@api.route('/weather/ensemble', methods=['GET'])
+def weather_ensemble():
+    """
+    Compare the hourly forecasts of several models, with mean, min/max, spread and agreement per hour
+
+    `models` is a comma separated list of Open-Meteo models (ensemble.ENSEMBLE_MODELS
+    by default); `fields`, `hours`, `start` and `end` work as for the hourly forecast.
+    """
+    try:
+        lat = float(request.args.get('lat', 0))
+        lon = float(request.args.get('lon', 0))
+        hours = int(request.args.get('hours', 24))
+        models = [model.strip() for model in request.args.get('models', '').split(',') if model.strip()]
+
+        logger.debug('Fetching ensemble forecast', extra={
+            'latitude': lat,
+            'longitude': lon,
+            'hours': hours
+        })
+
+        ensemble_data = get_ensemble(lat, lon, models or None, hours, requested_fields(), **requested_window())
+        return jsonify(ensemble_data)
+    except (CircuitOpenError, RateLimitError) as e:
+        return upstream_unavailable(e)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.exception('Error fetching ensemble forecast: %s', str(e))
+        return jsonify({"error": str(e)}), 500
+
+@api.route('/weather/alerts', methods=['GET'])
+def weather_alerts():
+    """Get weather alerts for a location, or for all favorite locations when lat/lon are not given"""
+    try:
+        hours = int(request.args.get('hours', 48))
+        if 'lat' in request.args or 'lon' in request.args:
+            lat = float(request.args.get('lat', 0))
+            lon = float(request.args.get('lon', 0))
+            return jsonify({"latitude": lat, "longitude": lon, "alerts": get_weather_alerts([(lat, lon)], hours)[0]})
+
+        favorites = []
+        if os.path.exists(FAVORITES_FILE):
+            with open(FAVORITES_FILE, 'r') as f:
+                favorites = json.load(f)
+        results = get_weather_alerts([(fav['latitude'], fav['longitude']) for fav in favorites], hours)
+        return jsonify({"locations": [
+            {"name": fav['name'], "latitude": fav['latitude'], "longitude": fav['longitude'], "alerts": found}
+            for fav, found in zip(favorites, results)
+        ]})
+    except (CircuitOpenError, RateLimitError) as e:
+        return upstream_unavailable(e)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.exception('Error evaluating weather alerts: %s', str(e))
+        return jsonify({"error": str(e)}), 500
+
+@api.route('/weather/tiles/<int:z>/<int:x>/<int:y>', methods=['GET'])
+def weather_tile(z, x, y):
+    """Get a map tile of current weather as float32 values (format=f32) or a grayscale PNG (format=png)"""
+    try:
+        layer = request.args.get('layer', 'temperature')
+        tile_format = request.args.get('format', 'f32')
+        if tile_format not in ('f32', 'png'):
+            raise ValueError(f"Unknown tile format: {tile_format}")
+        grid = get_tile(layer, z, x, y)
+    except (CircuitOpenError, RateLimitError) as e:
+        return upstream_unavailable(e)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.exception('Error building weather tile: %s', str(e))
+        return jsonify({"error": str(e)}), 500
+
+    low, high = TILE_LAYERS[layer][1]
+    headers = {
+        # Tiles are rebuilt with the next update of the current conditions
+        'Cache-Control': f'public, max-age={TILE_TTL - int(time.time()) % TILE_TTL}',
+        'X-Grid-Size': f'{grid.shape[1]}x{grid.shape[0]}',
+        'X-Value-Range': f'{low},{high}',
+        'Access-Control-Expose-Headers': 'X-Grid-Size, X-Value-Range'
+    }
+    if tile_format == 'png':
+        return Response(encode_png(grid, (low, high)), mimetype='image/png', headers=headers)
+    return Response(grid.astype('<f4').tobytes(), mimetype='application/octet-stream', headers=headers)
+
+@api.route('/geocode/search', methods=['GET'])
+def geocode_search():
+    """Search places by name prefix, most populous first"""
+    try:
+        query = request.args.get('q', '')
+        limit = max(1, min(int(request.args.get('limit', 10)), 50))
+        return jsonify(get_gazetteer().search(query, limit))
+    except FileNotFoundError:
+        return gazetteer_missing()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+@api.route('/geocode/reverse', methods=['GET'])
+def geocode_reverse():
+    """Get the nearest known place to a coordinate"""
+    try:
+        lat = float(request.args.get('lat', 0))
+        lon = float(request.args.get('lon', 0))
+        place = get_gazetteer().reverse(lat, lon)
+    except FileNotFoundError:
+        return gazetteer_missing()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if place is None:
+        return jsonify({"error": "No place found near this location"}), 404
+    return jsonify(place)
+
+def gazetteer_missing():
+    """503 response while the gazetteer index has not been built"""
+    logger.warning('Gazetteer index missing; build it with geocoding.py')
+    return jsonify({"error": "Geocoding is not available: the gazetteer index has not been built"}), 503
+
+@api.route('/weather/codes', methods=['GET'])
 def weather_codes():
-    """Get weather code descriptions"""
-    return jsonify(WEATHER_CODES)
+    """Get weather code descriptions, serialized once and cacheable by clients"""
+    return WEATHER_CODES_PAYLOAD.response()
 
-@app.route('/favorites', methods=['GET'])
+@api.route('/favorites', methods=['GET'])
 def get_favorites():
     """Get all favorite locations"""
     try:
@@ -164,7 +414,7 @@ def get_favorites():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@app.route('/favorites', methods=['POST'])
+@api.route('/favorites', methods=['POST'])
 def add_favorite():
     """Add a new favorite location"""
     try:
@@ -203,7 +453,7 @@ def add_favorite():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@app.route('/favorites/<int:index>', methods=['DELETE'])
+@api.route('/favorites/<int:index>', methods=['DELETE'])
 def delete_favorite(index):
     """Delete a favorite location by index"""
     try:
@@ -229,29 +479,104 @@ def delete_favorite(index):
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@app.route('/health', methods=['GET'])
+def pinned_cache_keys():
+    """Cache keys of the favorites' data, which cache snapshots keep first"""
+    try:
+        if os.path.exists(FAVORITES_FILE):
+            with open(FAVORITES_FILE, 'r') as f:
+                return favorite_cache_keys(json.load(f))
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.warning('Favorites not pinned in the cache snapshot: %s', str(e))
+    return []
+
+@api.route('/admin/profile', methods=['POST'])
+def admin_profile():
+    """
+    Profile the requests this worker handles for `seconds` (default 10), then return the stacks per route
+
+    `format=collapsed` (default) gives collapsed stacks for flamegraph tools,
+    `format=speedscope` a speedscope JSON file. Needs the X-Admin-Token header.
+    """
+    if not ADMIN_TOKEN:
+        return jsonify({'error': 'Not found'}), 404
+    if not hmac.compare_digest(request.headers.get('X-Admin-Token', ''), ADMIN_TOKEN):
+        return jsonify({'error': 'Forbidden'}), 403
+    output = request.args.get('format', 'collapsed')
+    if output not in ('collapsed', 'speedscope'):
+        return jsonify({'error': f'Unknown format: {output}'}), 400
+    try:
+        seconds = float(request.args.get('seconds', 10))
+        logger.info('Profiling requests for %s seconds', seconds)
+        counts = profiler.profile(seconds)
+    except ProfilerBusyError as e:
+        return jsonify({'error': str(e)}), 409
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    if output == 'speedscope':
+        stats = profiler.stats()
+        return jsonify(speedscope(counts, stats['duration'] / max(stats['samples'], 1)))
+    return Response(collapsed(counts), mimetype='text/plain')
+
+@api.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint that also returns performance metrics"""
     metrics = performance_monitor.get_metrics()
     return jsonify({
         'status': 'healthy',
-        'performance_metrics': metrics
+        'performance_metrics': metrics,
+        'cache': weather_cache.stats(),
+        'admission': request_admission.stats(),
+        'hedging': upstream_client.hedging_stats()
     })
 
-@app.errorhandler(404)
+@api.app_errorhandler(404)
 def not_found_error(error):
     logger.warning('404 error: %s', request.url)
     return jsonify({'error': 'Not found'}), 404
 
-@app.errorhandler(500)
+@api.app_errorhandler(500)
 def internal_error(error):
     logger.error('500 error: %s\n%s', str(error), traceback.format_exc())
     return jsonify({'error': 'Internal server error'}), 500
 
+def create_app(config=None):
+    """
+    Create the Flask application
+
+    Args:
+        config (dict): Flask settings; with TESTING set, logging and memory monitoring are left alone
+
+    Returns:
+        Flask: The application
+    """
+    app = Flask(__name__)
+    app.config.update(config or {})
+    # orjson-backed jsonify that encodes NumPy arrays directly
+    app.json = FastJSONProvider(app)
+    CORS(app)
+
+    # Set up error logging and memory monitoring
+    if not app.testing:
+        configure_logging()
+        start_memory_logging()
+    setup_error_logging(app)
+
+    # Ensure data directory exists
+    os.makedirs(os.path.dirname(FAVORITES_FILE), exist_ok=True)
+
+    app.register_blueprint(api)
+    return app
+
 if __name__ == '__main__':
-    # Create logs directory if it doesn't exist
-    os.makedirs('logs', exist_ok=True)
+    app = create_app()
+
+    # Start warm from the last cache snapshot and keep saving it (gunicorn.conf.py does this under gunicorn)
+    restore_cache()
+    snapshots = start_cache_snapshots(pinned_cache_keys)
+    if snapshots:
+        atexit.register(snapshots.stop)
 
-    # Start the server
+    # Start the development server (use gunicorn with gunicorn.conf.py in production)
     port = int(os.getenv('BACKEND_PORT', 5001))
     app.run(host='0.0.0.0', port=port, debug=True)
\ No newline at end of file
@@ -0,0 +1,155 @@
+"""
+Model Runs - When forecast data actually changes
+
+A forecast only changes when the upstream model publishes a new run, so a
+fixed TTL either keeps serving the previous run after an update or refetches
+unchanged data before one. ModelRuns tracks the latest run of each model from
+the upstream's run metadata (the meta.json of each dataset, with
+last_run_availability_time and update_interval_seconds) and falls back to the
+configured update schedule where no metadata is available.
+
+Cached forecasts are fresh until the run after the one they came from is
+available. stagger() spreads revalidation of different keys over a short
+window so a new run does not trigger every refetch at the same moment.
+
+WEATHER_MODEL_SCHEDULES adds or overrides schedules as JSON, e.g.
+{"icon_seamless": {"interval": 10800, "delay": 7200, "meta": "dwd_icon"}}.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+# Model -> seconds between runs, seconds from a run's start until it is served, and the meta.json dataset
+MODEL_SCHEDULES = {
+    # Combines several models; the upstream publishes something new about every hour
+    'best_match': {'interval': 3600, 'delay': 0},
+    'icon_seamless': {'interval': 3 * 3600, 'delay': 2 * 3600, 'meta': 'dwd_icon'},
+    'gfs_seamless': {'interval': 6 * 3600, 'delay': 4 * 3600, 'meta': 'ncep_gfs025'},
+    'ecmwf_ifs025': {'interval': 6 * 3600, 'delay': 7 * 3600, 'meta': 'ecmwf_ifs025'},
+}
+# Metadata is polled at most this often per model, and only once a run is due
+POLL_INTERVAL = 60
+# A run that is overdue according to the metadata is looked for again after this long
+LATE_RETRY = 300
+# Keys revalidate spread over this many seconds after a new run
+STAGGER_WINDOW = float(os.getenv('WEATHER_REVALIDATION_WINDOW', 300))
+
+
+def load_schedules():
+    """MODEL_SCHEDULES with the overrides from WEATHER_MODEL_SCHEDULES"""
+    schedules = {model: dict(schedule) for model, schedule in MODEL_SCHEDULES.items()}
+    overrides = os.getenv('WEATHER_MODEL_SCHEDULES')
+    if overrides:
+        for model, schedule in json.loads(overrides).items():
+            schedules.setdefault(model, dict(MODEL_SCHEDULES['best_match'])).update(schedule)
+    return schedules
+
+
+def stagger(key):
+    """Offset in [0, STAGGER_WINDOW) seconds, fixed per key"""
+    digest = hashlib.blake2b(key.encode(), digest_size=4).digest()
+    return int.from_bytes(digest, 'little') / 2 ** 32 * STAGGER_WINDOW
+
+
+class ModelRuns:
+    """Latest and next expected run of each forecast model"""
+
+    def __init__(self, schedules=None, fetch_meta=None, poll_interval=POLL_INTERVAL, late_retry=LATE_RETRY):
+        """
+        Args:
+            schedules (dict): Model -> {'interval', 'delay', optional 'meta'}, see MODEL_SCHEDULES
+            fetch_meta (callable): Returns the meta.json dict of a dataset, None to use the schedules only
+            poll_interval (float): Least seconds between metadata requests per model
+            late_retry (float): Seconds until an overdue run is looked for again
+        """
+        self.schedules = schedules if schedules is not None else load_schedules()
+        self.fetch_meta = fetch_meta
+        self.poll_interval = poll_interval
+        self.late_retry = late_retry
+        self._lock = threading.Lock()
+        # Model -> availability time of the newest run seen in its metadata
+        self._runs = {}
+        self._intervals = {}
+        self._polled = {}
+
+    def _schedule(self, model):
+        return self.schedules.get(model) or self.schedules['best_match']
+
+    def interval(self, model):
+        """Seconds between runs, as published in the metadata or configured"""
+        return self._intervals.get(model) or self._schedule(model)['interval']
+
+    def scheduled_run(self, model, now):
+        """Availability time of the newest run the schedule says is out"""
+        schedule = self._schedule(model)
+        interval, delay = schedule['interval'], schedule['delay']
+        return math.floor((now - delay) / interval) * interval + delay
+
+    def _poll(self, model, now):
+        dataset = self._schedule(model).get('meta')
+        if self.fetch_meta is None or dataset is None:
+            return
+        with self._lock:
+            if now - self._polled.get(model, -math.inf) < self.poll_interval:
+                return
+            self._polled[model] = now
+        try:
+            meta = self.fetch_meta(dataset)
+            available = float(meta['last_run_availability_time'])
+            interval = float(meta.get('update_interval_seconds') or 0)
+        except Exception as e:
+            logging.warning(f"Run metadata of {dataset} unavailable: {str(e)}")
+            return
+        with self._lock:
+            self._runs[model] = max(self._runs.get(model, available), available)
+            if interval > 0:
+                self._intervals[model] = interval
+
+    def latest_run(self, model, now=None):
+        """
+        Availability time of the newest run of a model
+
+        The metadata is asked when nothing is known yet or the next run is
+        due, at most every poll_interval seconds. Without metadata the
+        schedule decides.
+
+        Args:
+            model (str): Forecast model
+            now (float): Current time, time.time() by default
+
+        Returns:
+            float: Unix time
+        """
+        now = time.time() if now is None else now
+        known = self._runs.get(model)
+        if known is None or now >= known + self.interval(model):
+            self._poll(model, now)
+            known = self._runs.get(model)
+        return self.scheduled_run(model, now) if known is None else known
+
+    def next_update(self, model, run, now=None):
+        """
+        When data from a run is superseded
+
+        Args:
+            model (str): Forecast model
+            run (float): Availability time of the run the data came from
+            now (float): Current time, time.time() by default
+
+        Returns:
+            float: Unix time the newer run appeared or is expected; in the past if it is already out
+        """
+        now = time.time() if now is None else now
+        latest = self.latest_run(model, now)
+        if latest > run:
+            return latest
+        expected = run + self.interval(model)
+        if expected > now or model not in self._runs:
+            return expected
+        # The metadata shows the run is late, so the data is still current; look again later
+        return now + self.late_retry
@@ -5,18 +5,107 @@ This is a basic implementation of a client to fetch data from the Open-Meteo API
 It provides core functionality to get weather data and format it for the frontend.
 """
 
+import os
 import requests
 import logging
+import threading
 from datetime import datetime
 import traceback
 
-API_URL = "https://api.open-meteo.com/v1/forecast"
+import numpy as np
+import openmeteo_requests
+from openmeteo_requests import CircuitBreaker, Hedger, RateLimiter
+
+import solar
+from admission import upstream_timeout
+from forecast import Forecast
+
+# Overridable so the backend can be pointed at a local stand-in (see upstream_standin.py)
+API_URL = os.getenv("OPEN_METEO_API_URL", "https://api.open-meteo.com/v1/forecast")
+ARCHIVE_API_URL = os.getenv("OPEN_METEO_ARCHIVE_URL", "https://archive-api.open-meteo.com/v1/archive")
+# Run metadata of each model dataset, {model} is replaced by the dataset name
+META_URL = os.getenv("OPEN_METEO_META_URL", "https://api.open-meteo.com/data/{model}/static/meta.json")
+REQUEST_TIMEOUT = float(os.getenv("OPEN_METEO_TIMEOUT", 10))
+
+def create_rate_limiter():
+    """
+    Create the upstream rate limiter from the environment
+
+    OPEN_METEO_RATE_LIMIT and OPEN_METEO_RATE_BURST set the sustained requests per
+    second and the burst size. Set OPEN_METEO_RATE_LIMIT_FILE to a local path to
+    share one budget between all worker processes on the host.
+    """
+    return RateLimiter(
+        rate=float(os.getenv("OPEN_METEO_RATE_LIMIT", 10)),
+        burst=float(os.getenv("OPEN_METEO_RATE_BURST", 20)),
+        max_wait=float(os.getenv("OPEN_METEO_RATE_MAX_WAIT", 2)),
+        path=os.getenv("OPEN_METEO_RATE_LIMIT_FILE") or None,
+    )
+
+def create_circuit_breaker():
+    """Create the upstream circuit breaker from the environment"""
+    return CircuitBreaker(
+        failure_threshold=int(os.getenv("OPEN_METEO_BREAKER_THRESHOLD", 5)),
+        recovery_timeout=float(os.getenv("OPEN_METEO_BREAKER_RECOVERY", 30)),
+    )
+
+def create_hedger():
+    """
+    Create the upstream request hedger from the environment, None unless OPEN_METEO_HEDGING is set
+
+    A GET that has not answered after the OPEN_METEO_HEDGE_PERCENTILE of recent
+    latencies (default 95) is sent again and the first answer is used.
+    OPEN_METEO_HEDGE_BUDGET caps the duplicates as a share of all calls
+    (default 0.05).
+    """
+    if os.getenv("OPEN_METEO_HEDGING", "0").lower() in ("0", "false", "no", ""):
+        return None
+    return Hedger(
+        percentile=float(os.getenv("OPEN_METEO_HEDGE_PERCENTILE", 95)),
+        budget=float(os.getenv("OPEN_METEO_HEDGE_BUDGET", 0.05)),
+    )
 
 class OpenMeteoClient:
     """A simple client for the Open-Meteo API"""
 
-    def __init__(self):
+    def __init__(self, rate_limiter=None, circuit_breaker=None, hedger=None):
         self.api_url = API_URL
+        self.archive_url = ARCHIVE_API_URL
+        self.meta_url = META_URL
+        self._rate_limiter = rate_limiter
+        self._circuit_breaker = circuit_breaker
+        self._hedger = hedger
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self):
+        """
+        The shared upstream client, created on the first request
+
+        Requests go through it so they are rate limited and fail fast with
+        CircuitOpenError while the upstream is down. The limiter may map a
+        shared file, so nothing is opened just by importing the service.
+
+        Every call is given the time left to the current request (see
+        admission.py), so it cannot outlast the request's deadline. With
+        hedging enabled, slow GETs are sent a second time (see create_hedger).
+        """
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = openmeteo_requests.Client(
+                        rate_limiter=self._rate_limiter or create_rate_limiter(),
+                        circuit_breaker=self._circuit_breaker or create_circuit_breaker(),
+                        timeout=REQUEST_TIMEOUT,
+                        hedger=self._hedger or create_hedger(),
+                    )
+        return self._client
+
+    def hedging_stats(self):
+        """Calls, hedges sent and won and the hedge delay, None without hedging or before the first request"""
+        hedger = self._client.hedger if self._client is not None else None
+        return hedger.stats() if hedger is not None else None
 
     def get_weather(self, params):
         """
@@ -29,7 +118,7 @@ class OpenMeteoClient:
             dict: Weather data response
         """
         try:
-            response = requests.get(self.api_url, params=params)
+            response = self.client.request(self.api_url, params, timeout=upstream_timeout())
             response.raise_for_status()  # Raise an error for bad responses
             return response.json()
         except requests.exceptions.RequestException as e:
@@ -37,6 +126,57 @@ class OpenMeteoClient:
             logging.error(traceback.format_exc())
             raise
 
+    def get_weather_raw(self, params):
+        """
+        Fetch weather data as raw FlatBuffers frames
+
+        The frames are compact enough to cache as they are; decode them with
+        weather_frames.decode_response when the data is needed.
+
+        Args:
+            params (dict): Parameters for the API request
+
+        Returns:
+            bytes: Length-prefixed FlatBuffers frames
+        """
+        try:
+            return self.client.fetch_raw(self.api_url, params, timeout=upstream_timeout())
+        except requests.exceptions.RequestException as e:
+            logging.error(f"Error fetching weather data: {str(e)}")
+            logging.error(traceback.format_exc())
+            raise
+
+    def get_archive_raw(self, params):
+        """
+        Fetch historical weather data as raw FlatBuffers frames
+
+        Args:
+            params (dict): Parameters for the archive API request, with start_date and end_date
+
+        Returns:
+            bytes: Length-prefixed FlatBuffers frames
+        """
+        try:
+            return self.client.fetch_raw(self.archive_url, params, timeout=upstream_timeout())
+        except requests.exceptions.RequestException as e:
+            logging.error(f"Error fetching historical weather data: {str(e)}")
+            logging.error(traceback.format_exc())
+            raise
+
+    def get_model_meta(self, dataset):
+        """
+        Fetch the run metadata of a model dataset
+
+        Args:
+            dataset (str): Dataset name, e.g. 'dwd_icon'
+
+        Returns:
+            dict: meta.json with last_run_availability_time and update_interval_seconds
+        """
+        response = self.client.request(self.meta_url.format(model=dataset), {}, timeout=upstream_timeout())
+        response.raise_for_status()
+        return response.json()
+
 def format_current_weather(response):
     """
     Format the current weather data from the API response
@@ -77,84 +217,75 @@ def format_current_weather(response):
         logging.error(traceback.format_exc())
         raise
 
-def format_hourly_forecast(response, hours=24):
+def format_hourly_forecast(response, hours=24, fields=None):
     """
     Format the hourly forecast data from the API response
 
+    Missing columns are filled with reasonable defaults and the apparent
+    temperature and wind gusts are estimated when the upstream has none.
+    is_day is computed from the sun's position at the forecast's location
+    when the upstream does not send it (see solar.py). All of it is computed
+    on float32 columns (see forecast.py).
+
     Args:
-        response (dict): API response from Open-Meteo
+        response: Hourly Forecast, or an API response dict from Open-Meteo
         hours (int): Number of hours to return
+        fields (list): Forecast fields to include, None for all
 
     Returns:
-        dict: Formatted hourly forecast data
+        Forecast: Formatted hourly forecast data, with the times under 'timestamps'
     """
     try:
-        hourly = response.get('hourly', {})
-
-        # Limit data to the requested number of hours
-        timestamps = hourly.get('time', [])[:hours]
-        temperature = hourly.get('temperature_2m', [])[:hours]
-        humidity = hourly.get('relative_humidity_2m', [])[:hours]
-        precip_prob = hourly.get('precipitation_probability', [])[:hours]
-        precipitation = hourly.get('precipitation', [])[:hours]
-        weather_code = hourly.get('weather_code', [])[:hours]
-        wind_speed = hourly.get('wind_speed_10m', [])[:hours]
-        wind_direction = hourly.get('wind_direction_10m', [])[:hours]
-        is_day = hourly.get('is_day', [])[:hours]
-
-        # Some hourly data might not be available - fill with reasonable defaults
-        if not wind_speed and 'hourly' in response:
-            wind_speed = [5.0] * len(timestamps)
-
-        if not wind_direction and 'hourly' in response:
-            wind_direction = [0] * len(timestamps)
-
-        if not is_day and 'hourly' in response:
-            is_day = [(1 if 6 <= datetime.fromisoformat(t).hour < 20 else 0) for t in timestamps]
-
-        # Calculate apparent temperature using a simple formula if not available
-        apparent_temp = []
-        for i in range(len(temperature)):
-            t = temperature[i]
-            h = humidity[i] if i < len(humidity) else 50
-            w = wind_speed[i] if i < len(wind_speed) else 5.0
-
-            # Simple heat index formula
-            feels_like = t
-
-            # Wind chill effect for cold temperatures
-            if t < 10:
-                feels_like -= (w * 0.1)
-
-            # Heat index effect for warm temperatures
-            if t > 20:
-                feels_like += (h * 0.05)
-
-            apparent_temp.append(round(feels_like, 1))
-
-        wind_gusts = hourly.get('wind_gusts_10m', [])[:hours]
-        if not wind_gusts:
-            # If wind gusts are not available, estimate them as wind speed + 30%
-            wind_gusts = [speed * 1.3 for speed in wind_speed]
+        hourly = response if isinstance(response, Forecast) else Forecast.from_json(response, 'hourly')
+        hourly = hourly.slice(0, hours)
+        columns = hourly.columns
+        count = len(hourly.time)
 
-        return {
-            "timestamps": timestamps,
-            "temperature_2m": temperature,
-            "apparent_temperature": apparent_temp,
-            "precipitation_probability": precip_prob if precip_prob else [0] * len(timestamps),
-            "precipitation": precipitation if precipitation else [0] * len(timestamps),
-            "weather_code": weather_code if weather_code else [0] * len(timestamps),
-            "wind_speed_10m": wind_speed,
-            "wind_direction_10m": wind_direction,
-            "relative_humidity_2m": humidity if humidity else [50] * len(timestamps),
-            "is_day": is_day,
-            "wind_gusts_10m": wind_gusts,
-            "latitude": response.get('latitude'),
-            "longitude": response.get('longitude'),
-            "elevation": response.get('elevation'),
-            "timezone": response.get('timezone')
-        }
+        def column(name, default):
+            return columns[name] if name in columns else np.full(count, default, dtype=np.float32)
+
+        wind_speed = column('wind_speed_10m', 5.0)
+        humidity = column('relative_humidity_2m', 50)
+        is_day = columns.get('is_day')
+        latitude, longitude = hourly.location.get('latitude'), hourly.location.get('longitude')
+        if is_day is None and latitude is not None and longitude is not None:
+            is_day = solar.is_day(hourly.time, latitude, longitude)
+        elif is_day is None:
+            # Without a location, the hours of a typical day
+            local_hour = (hourly.time + hourly.utc_offset) // 3600 % 24
+            is_day = ((6 <= local_hour) & (local_hour < 20)).astype(np.float32)
+
+        forecast = Forecast(hourly.time, {}, hourly.utc_offset, hourly.location, time_key='timestamps')
+        if 'temperature_2m' in columns:
+            forecast.set_column('temperature_2m', columns['temperature_2m'])
+
+            # Calculate apparent temperature using a simple formula if not available
+            if fields is None or 'apparent_temperature' in fields:
+                t = columns['temperature_2m'].astype(np.float64)
+                h = np.where(np.isnan(humidity), 50, humidity)
+                w = np.where(np.isnan(wind_speed), 5.0, wind_speed)
+
+                # Wind chill effect for cold temperatures, heat index effect for warm temperatures
+                feels_like = t - np.where(t < 10, w * 0.1, 0) + np.where(t > 20, h * 0.05, 0)
+                forecast.set_column('apparent_temperature', np.round(feels_like, 1))
+
+        forecast.set_column('precipitation_probability', column('precipitation_probability', 0))
+        forecast.set_column('precipitation', column('precipitation', 0))
+        forecast.set_column('weather_code', column('weather_code', 0))
+        forecast.set_column('wind_speed_10m', wind_speed)
+        forecast.set_column('wind_direction_10m', column('wind_direction_10m', 0))
+        forecast.set_column('relative_humidity_2m', humidity)
+        forecast.set_column('is_day', is_day)
+        # If wind gusts are not available, estimate them as wind speed + 30%
+        gusts = columns.get('wind_gusts_10m')
+        if gusts is None:
+            gusts = np.round(wind_speed.astype(np.float64) * 1.3, 2)
+        forecast.set_column('wind_gusts_10m', gusts)
+
+        if fields is not None:
+            forecast = forecast.select(fields)
+        return forecast
     except Exception as e:
         logging.error(f"Error formatting hourly forecast: {str(e)}")
         logging.error(traceback.format_exc())
-        raise
\ No newline at end of file
+        raise
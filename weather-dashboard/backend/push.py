@@ -0,0 +1,181 @@
+"""
+Push - Server-Sent Events for current weather, multiplexed by location
+
+Instead of every open tab polling /weather/current, clients subscribe to a
+location with /weather/stream. Subscriptions are grouped into cells (the
+location rounded like the cache keys), and one background thread per worker
+reloads each subscribed cell through the cache every `interval` seconds.
+The cache decides when the upstream is asked again, so one upstream refresh
+per cell fans out to all of its subscribers, and only fields that changed
+are sent. Request volume follows weather changes instead of open tabs.
+"""
+
+import json
+import logging
+import queue
+import threading
+
+from weather_service import COORDINATE_PRECISION, get_current_weather
+
+# How often subscribed cells are reloaded from the cache
+REFRESH_INTERVAL = 60
+# Comment lines keep proxies from closing idle streams and detect disconnected clients
+KEEPALIVE_INTERVAL = 15
+
+
+def cell_key(latitude, longitude):
+    """Subscription cell of a location, matching the cache key rounding"""
+    return (round(latitude, COORDINATE_PRECISION), round(longitude, COORDINATE_PRECISION))
+
+
+def diff(old, new):
+    """
+    Fields of new that differ from old
+
+    Args:
+        old (dict): Previously sent data
+        new (dict): Current data
+
+    Returns:
+        dict: Changed and added fields, removed fields set to None
+    """
+    changes = {key: value for key, value in new.items() if key not in old or old[key] != value}
+    changes.update({key: None for key in old if key not in new})
+    return changes
+
+
+def format_event(event, data):
+    """Encode one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class Subscription:
+    """A subscriber's queue of events for one cell"""
+
+    def __init__(self, cell):
+        self.cell = cell
+        self.events = queue.Queue()
+
+
+class LocationHub:
+    """Fan out current weather updates to the subscribers of each location cell"""
+
+    def __init__(self, load=get_current_weather, interval=REFRESH_INTERVAL, max_subscribers=64):
+        """
+        Args:
+            load (callable): Returns the current weather for (latitude, longitude)
+            interval (float): Seconds between reloads of subscribed cells
+            max_subscribers (int): Streams per worker; each one holds a server thread
+        """
+        self.load = load
+        self.interval = interval
+        self.max_subscribers = max_subscribers
+        self._cells = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def subscriber_count(self):
+        """Number of open subscriptions"""
+        with self._lock:
+            return sum(len(cell['subscribers']) for cell in self._cells.values())
+
+    def subscribe(self, latitude, longitude):
+        """
+        Subscribe to a location
+
+        The first event is a snapshot of the current data; later events are
+        diffs. Cells already subscribed to reuse their last loaded data.
+
+        Args:
+            latitude (float): The latitude of the location
+            longitude (float): The longitude of the location
+
+        Returns:
+            Subscription: The subscription, to pass to events() and unsubscribe()
+
+        Raises:
+            OverflowError: If the worker has max_subscribers open streams
+        """
+        if self.subscriber_count() >= self.max_subscribers:
+            raise OverflowError("Too many open streams")
+        key = cell_key(latitude, longitude)
+        with self._lock:
+            cell = self._cells.get(key)
+        if cell is None:
+            data = self.load(*key)
+            with self._lock:
+                cell = self._cells.setdefault(key, {'subscribers': set(), 'data': data})
+        subscription = Subscription(key)
+        with self._lock:
+            cell['subscribers'].add(subscription)
+            subscription.events.put(('snapshot', cell['data']))
+        self._ensure_thread()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Remove a subscription, and its cell when it was the last one"""
+        with self._lock:
+            cell = self._cells.get(subscription.cell)
+            if cell is None:
+                return
+            cell['subscribers'].discard(subscription)
+            if not cell['subscribers']:
+                del self._cells[subscription.cell]
+
+    def refresh(self):
+        """Reload every subscribed cell once and push the changed fields"""
+        with self._lock:
+            keys = list(self._cells)
+        for key in keys:
+            try:
+                data = self.load(*key)
+            except Exception as e:
+                logging.warning(f"Could not refresh {key} for subscribers: {str(e)}")
+                continue
+            with self._lock:
+                cell = self._cells.get(key)
+                if cell is None:
+                    continue
+                changes = diff(cell['data'], data)
+                cell['data'] = data
+                if changes:
+                    for subscription in cell['subscribers']:
+                        subscription.events.put(('update', changes))
+
+    def events(self, subscription, keepalive=KEEPALIVE_INTERVAL):
+        """
+        Generate the Server-Sent Events of a subscription until the client disconnects
+
+        Args:
+            subscription (Subscription): From subscribe()
+            keepalive (float): Seconds of silence before a comment line is sent
+
+        Yields:
+            str: Encoded events
+        """
+        try:
+            while not self._stop.is_set():
+                try:
+                    event, data = subscription.events.get(timeout=keepalive)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_event(event, data)
+        finally:
+            self.unsubscribe(subscription)
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='location-hub', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.refresh()
+
+    def stop(self):
+        """Stop the refresh thread and end all streams"""
+        self._stop.set()
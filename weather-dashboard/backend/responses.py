@@ -0,0 +1,92 @@
+"""
+Responses - Fast JSON encoding and precomputed payloads
+
+Serializing forecasts is one of the larger CPU costs per request. The app's
+JSON provider uses orjson when it is installed: it is several times faster
+than the standard library and encodes NumPy arrays directly, so columns built
+with NumPy never have to become Python lists. Without orjson the standard
+library is used and arrays are converted on the way out. Forecasts (see
+forecast.py) are encoded through their to_dict() shape.
+
+Payloads that never change, such as the weather code table, are serialized
+once at startup and served with a long cache lifetime and an ETag.
+"""
+
+import hashlib
+import json
+import math
+
+import numpy as np
+from flask import Response, request
+from flask.json.provider import JSONProvider
+
+from forecast import Forecast
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+# Static payloads only change with a deploy
+STATIC_MAX_AGE = 24 * 3600
+
+
+def _default(value):
+    """Encode forecasts and NumPy values the encoder does not know, NaN becoming null"""
+    if isinstance(value, Forecast):
+        return value.to_dict()
+    if isinstance(value, np.ndarray):
+        if value.dtype == np.float32:
+            # Through the shortest decimal form, so 12.3 does not become 12.300000190734863
+            value = value.astype(str).astype(np.float64)
+        if value.dtype.kind == 'f':
+            return [None if math.isnan(v) else v for v in value.tolist()]
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps_bytes(value):
+    """
+    Serialize a value to compact JSON bytes
+
+    Args:
+        value: Plain Python values, NumPy arrays and scalars, forecasts
+
+    Returns:
+        bytes: UTF-8 JSON; NaN is encoded as null
+    """
+    if orjson is not None:
+        return orjson.dumps(value, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, default=_default, separators=(',', ':')).encode()
+
+
+class FastJSONProvider(JSONProvider):
+    """Flask JSON provider backed by dumps_bytes, used by jsonify"""
+
+    def dumps(self, obj, **kwargs):
+        return dumps_bytes(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s) if orjson is not None else json.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj), mimetype='application/json')
+
+
+class StaticPayload:
+    """A JSON payload serialized once and served with HTTP caching"""
+
+    def __init__(self, value, max_age=STATIC_MAX_AGE):
+        self.body = dumps_bytes(value)
+        self.etag = hashlib.blake2b(self.body, digest_size=8).hexdigest()
+        self.max_age = max_age
+
+    def response(self):
+        """Response for the current request, 304 when the client has this version"""
+        headers = {'Cache-Control': f'public, max-age={self.max_age}', 'ETag': f'"{self.etag}"'}
+        if self.etag in request.if_none_match:
+            return Response(status=304, headers=headers)
+        return Response(self.body, mimetype='application/json', headers=headers)
@@ -0,0 +1,137 @@
+"""
+Solar - Sun position, day and night, sunrise and sunset
+
+Sunrise, sunset and whether it is day are pure astronomy, so the backend
+computes them instead of asking the upstream: the hourly request carries no
+daily section, and the fields are there even when the upstream leaves them
+out. The equations are those of the NOAA solar calculator, accurate to about
+a minute for sunrise and sunset between 72° north and south and still
+sensible at the poles.
+
+All functions take NumPy arrays and broadcast times against locations, so a
+forecast, or a grid of locations over a forecast, is one vectorized pass:
+
+    sun_elevation(timestamps[:, None], latitudes[None, :], longitudes[None, :])
+"""
+
+import numpy as np
+
+# Zenith of the sun's center at sunrise and sunset: 90° plus refraction (34') and the sun's radius (16')
+SUNRISE_ZENITH = 90.833
+# Sun elevation in degrees above which it counts as day, matching sunrise and sunset
+DAY_ELEVATION = 90 - SUNRISE_ZENITH
+
+
+def _sun(timestamps):
+    """
+    Declination and equation of time at the given moments
+
+    Args:
+        timestamps (np.ndarray): Unix seconds
+
+    Returns:
+        tuple: (declination in radians, equation of time in minutes)
+    """
+    century = (np.asarray(timestamps, dtype=np.float64) / 86400 + 2440587.5 - 2451545) / 36525
+    mean_longitude = np.radians((280.46646 + century * (36000.76983 + century * 0.0003032)) % 360)
+    mean_anomaly = np.radians(357.52911 + century * (35999.05029 - 0.0001537 * century))
+    eccentricity = 0.016708634 - century * (0.000042037 + 0.0000001267 * century)
+    center = (np.sin(mean_anomaly) * (1.914602 - century * (0.004817 + 0.000014 * century))
+              + np.sin(2 * mean_anomaly) * (0.019993 - 0.000101 * century)
+              + np.sin(3 * mean_anomaly) * 0.000289)
+    node = np.radians(125.04 - 1934.136 * century)
+    apparent_longitude = np.radians(np.degrees(mean_longitude) + center - 0.00569 - 0.00478 * np.sin(node))
+    mean_obliquity = 23 + (26 + (21.448 - century * (46.815 + century * (0.00059 - century * 0.001813))) / 60) / 60
+    obliquity = np.radians(mean_obliquity + 0.00256 * np.cos(node))
+    declination = np.arcsin(np.sin(obliquity) * np.sin(apparent_longitude))
+
+    y = np.tan(obliquity / 2) ** 2
+    equation_of_time = 4 * np.degrees(
+        y * np.sin(2 * mean_longitude)
+        - 2 * eccentricity * np.sin(mean_anomaly)
+        + 4 * eccentricity * y * np.sin(mean_anomaly) * np.cos(2 * mean_longitude)
+        - 0.5 * y ** 2 * np.sin(4 * mean_longitude)
+        - 1.25 * eccentricity ** 2 * np.sin(2 * mean_anomaly)
+    )
+    return declination, equation_of_time
+
+
+def sun_elevation(timestamps, latitude, longitude):
+    """
+    Elevation of the sun's center above the horizon, without refraction
+
+    Args:
+        timestamps (np.ndarray): Unix seconds
+        latitude: Degrees north, broadcast against timestamps
+        longitude: Degrees east, broadcast against timestamps
+
+    Returns:
+        np.ndarray: Degrees, negative at night
+    """
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    declination, equation_of_time = _sun(timestamps)
+    solar_minutes = (timestamps % 86400 / 60 + equation_of_time + 4 * np.asarray(longitude)) % 1440
+    hour_angle = np.radians(solar_minutes / 4 - 180)
+    latitude = np.radians(latitude)
+    cos_zenith = (np.sin(latitude) * np.sin(declination)
+                  + np.cos(latitude) * np.cos(declination) * np.cos(hour_angle))
+    return 90 - np.degrees(np.arccos(np.clip(cos_zenith, -1, 1)))
+
+
+def is_day(timestamps, latitude, longitude):
+    """
+    Whether the sun is up, as the upstream's is_day variable
+
+    Args:
+        timestamps (np.ndarray): Unix seconds
+        latitude: Degrees north, broadcast against timestamps
+        longitude: Degrees east, broadcast against timestamps
+
+    Returns:
+        np.ndarray: float32 1 between sunrise and sunset, 0 otherwise
+    """
+    return (sun_elevation(timestamps, latitude, longitude) > DAY_ELEVATION).astype(np.float32)
+
+
+def _sun_events(moments, latitude, longitude):
+    """Solar noon and half the day length in seconds, for the days around the given moments"""
+    declination, equation_of_time = _sun(moments)
+    # The solar noon nearest to each moment
+    noon = moments // 86400 * 86400 + (720 - 4 * longitude - equation_of_time) * 60
+    noon += np.round((moments - noon) / 86400) * 86400
+    latitude = np.radians(latitude)
+    cos_hour_angle = (np.cos(np.radians(SUNRISE_ZENITH)) / (np.cos(latitude) * np.cos(declination))
+                      - np.tan(latitude) * np.tan(declination))
+    # Above 1 the sun stays down all day (polar night), below -1 it stays up (midnight sun)
+    half_day = np.degrees(np.arccos(np.clip(cos_hour_angle, -1, 1))) * 240
+    return noon, half_day
+
+
+def sun_times(day_starts, latitude, longitude):
+    """
+    Sunrise, sunset and daylight duration of whole days
+
+    In polar night sunrise and sunset both fall on solar noon and the day
+    has no daylight; under the midnight sun they are 12 hours before and
+    after solar noon.
+
+    Args:
+        day_starts (np.ndarray): Unix seconds of each day's local midnight
+        latitude: Degrees north, broadcast against day_starts
+        longitude: Degrees east, broadcast against day_starts
+
+    Returns:
+        dict: 'sunrise' and 'sunset' as int64 unix seconds, 'daylight_duration' as float32 seconds
+    """
+    longitude = np.asarray(longitude, dtype=np.float64)
+    noon, half_day = _sun_events(np.asarray(day_starts, dtype=np.float64) + 43200, latitude, longitude)
+    # The sun moves on between noon and sunrise or sunset; one more step at each gets within a minute
+    sunrise = noon - half_day
+    sunset = noon + half_day
+    sunrise = np.subtract(*_sun_events(sunrise, latitude, longitude))
+    sunset = np.add(*_sun_events(sunset, latitude, longitude))
+    return {
+        'sunrise': np.rint(sunrise).astype(np.int64),
+        'sunset': np.rint(sunset).astype(np.int64),
+        'daylight_duration': np.clip(sunset - sunrise, 0, 86400).astype(np.float32),
+    }
@@ -0,0 +1,53 @@
+"""
+Shared fixtures for tests against the upstream stand-in
+"""
+
+import unittest
+import os
+import sys
+import tempfile
+from unittest import mock
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import weather_service
+from cache import SharedMemoryCache
+from upstream_standin import build_flatbuffers_response
+
+MONDAY = 1704067200  # 2024-01-01T00:00Z
+HOURLY = ['temperature_2m', 'relative_humidity_2m', 'weather_code', 'wind_speed_10m', 'is_day']
+
+
+def standin_fetch(params):
+    """Frames from the upstream stand-in for API request parameters"""
+    query = {key: [','.join(value) if isinstance(value, list) else str(value)] for key, value in params.items()}
+    return build_flatbuffers_response(query)
+
+
+def standin_frames(**sections):
+    """Raw frames for Berlin from the upstream stand-in"""
+    query = {'latitude': ['52.52'], 'longitude': ['13.41'], 'forecast_days': ['2']}
+    query.update({name: [','.join(variables)] for name, variables in sections.items()})
+    return build_flatbuffers_response(query)
+
+
+class StandInTestCase(unittest.TestCase):
+    """Weather service backed by the stand-in and a fresh shared memory cache
+
+    self.fetch is the mocked upstream call; patch() adds patches that are undone after the test.
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.cache = SharedMemoryCache(os.path.join(self.temp_dir.name, 'cache'), slot_count=16, slot_size=64 * 1024)
+        self.addCleanup(self.cache.close)
+        self.patch(weather_service, 'cache', self.cache)
+        self.fetch = self.patch(weather_service.om, 'get_weather_raw', side_effect=standin_fetch)
+
+    def patch(self, target, attribute, *args, **kwargs):
+        """Patch an attribute for the rest of the test, like mock.patch.object"""
+        patcher = mock.patch.object(target, attribute, *args, **kwargs)
+        self.addCleanup(patcher.stop)
+        return patcher.start()
@@ -0,0 +1,127 @@
+"""
+Unit tests for admission control, request deadlines and load shedding
+"""
+
+import unittest
+import os
+import sys
+import tempfile
+import threading
+import time
+from unittest import mock
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import admission
+import main
+import weather_service
+from admission import AdmissionControl, OverloadedError
+from cache import SharedMemoryCache
+from openmeteo_client import OpenMeteoClient
+from upstream_standin import UpstreamStandIn
+
+
+class TestAdmissionControl(unittest.TestCase):
+    """Test cases for concurrency limits and request budgets"""
+
+    def test_limit_per_route_class(self):
+        """Test that a full class turns requests away without affecting other classes"""
+        control = AdmissionControl({'forecast': 2, 'alerts': 1}, queue_timeout=0.01)
+        self.assertTrue(control.acquire('forecast'))
+        self.assertTrue(control.acquire('forecast'))
+        self.assertFalse(control.acquire('forecast'))
+        self.assertTrue(control.acquire('alerts'))
+        self.assertEqual(control.stats()['forecast'], {'limit': 2, 'active': 2, 'shed': 1})
+
+        control.release('forecast')
+        self.assertTrue(control.acquire('forecast'))
+
+    def test_waiting_request_gets_a_released_slot(self):
+        """Test that a request waits up to the queue timeout for a slot"""
+        control = AdmissionControl({'forecast': 1}, queue_timeout=1)
+        control.acquire('forecast')
+        threading.Timer(0.05, control.release, ['forecast']).start()
+        self.assertTrue(control.acquire('forecast'))
+
+    def test_upstream_timeout_follows_the_budget(self):
+        """Test the time handed to upstream calls inside and outside a request"""
+        self.assertIsNone(admission.upstream_timeout())
+
+        token = admission.begin(deadline=2)
+        try:
+            self.assertTrue(1.5 < admission.upstream_timeout() <= 2)
+        finally:
+            admission.end(token)
+
+        for budget in ({'deadline': 0}, {'cache_only': True}):
+            token = admission.begin(**budget)
+            try:
+                with self.assertRaises(OverloadedError):
+                    admission.upstream_timeout()
+            finally:
+                admission.end(token)
+        self.assertIsNone(admission.upstream_timeout())
+
+
+class TestLoadShedding(unittest.TestCase):
+    """Test cases for requests against a slow upstream stand-in"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache = SharedMemoryCache(os.path.join(self.temp_dir.name, 'cache'), slot_count=16, slot_size=64 * 1024)
+        self.standin = UpstreamStandIn(latency_ms=0, jitter=0).start()
+        client = OpenMeteoClient()
+        client.api_url = self.standin.url
+        self.patchers = [
+            mock.patch.object(weather_service, 'cache', self.cache),
+            mock.patch.object(weather_service, 'om', client),
+            # Entries are stale as soon as they are stored, so every request tries the upstream first
+            mock.patch.object(weather_service, 'CACHE_TTL', dict(weather_service.CACHE_TTL, current=0)),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+        self.client = main.create_app({'TESTING': True}).test_client()
+
+    def tearDown(self):
+        for patcher in self.patchers:
+            patcher.stop()
+        self.standin.stop()
+        self.cache.close()
+        self.temp_dir.cleanup()
+
+    def test_full_class_sheds_or_serves_stale(self):
+        """Test that a full route class answers from the cache, 503 without it, and cheap routes stay up"""
+        full = AdmissionControl({'forecast': 0, 'alerts': 0})
+        with mock.patch.object(main, 'request_admission', full):
+            response = self.client.get('/weather/current?lat=1&lon=2')
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response.headers['Retry-After'], str(admission.RETRY_AFTER))
+            self.assertEqual(self.client.get('/weather/codes').status_code, 200)
+            self.assertEqual(self.client.get('/health').json['admission']['forecast']['shed'], 1)
+        self.assertEqual(self.standin.request_count, 0)
+
+        self.assertEqual(self.client.get('/weather/current?lat=1&lon=2').status_code, 200)
+        with mock.patch.object(main, 'request_admission', full):
+            stale = self.client.get('/weather/current?lat=1&lon=2')
+        self.assertEqual(stale.status_code, 200)
+        self.assertEqual(self.standin.request_count, 1)
+
+    def test_deadline_bounds_a_slow_upstream(self):
+        """Test that an upstream call gives up at the request deadline and stale data is served"""
+        self.assertEqual(self.client.get('/weather/current?lat=1&lon=2').status_code, 200)
+        self.standin.latency_ms = 2000
+
+        control = AdmissionControl({'forecast': 4, 'alerts': 1}, deadline=0.2)
+        with mock.patch.object(main, 'request_admission', control):
+            start = time.monotonic()
+            stale = self.client.get('/weather/current?lat=1&lon=2')
+            elapsed = time.monotonic() - start
+
+        self.assertEqual(stale.status_code, 200)
+        self.assertLess(elapsed, 1)
+        self.assertEqual(control.stats()['forecast'], {'limit': 4, 'active': 0, 'shed': 0})
+
+
+if __name__ == '__main__':
+    unittest.main()
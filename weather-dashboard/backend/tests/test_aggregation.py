@@ -0,0 +1,116 @@
+"""
+Unit tests for daily and weekly aggregation of hourly data
+"""
+
+import unittest
+import os
+import sys
+
+import numpy as np
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import weather_service
+from aggregation import _reduce, aggregate, bucket_starts, source_variables
+from tests.standin import MONDAY, StandInTestCase
+
+
+class TestAggregation(unittest.TestCase):
+    """Test cases for the vectorized rollups"""
+
+    def test_day_buckets_follow_the_utc_offset(self):
+        """Test that days start at local midnight"""
+        timestamps = MONDAY + 3600 * np.arange(48)
+        starts, labels = bucket_starts(timestamps, -5 * 3600)
+        self.assertEqual(starts.tolist(), [0, 5, 29])
+        self.assertEqual(labels.astype(str).tolist(), ['2023-12-31', '2024-01-01', '2024-01-02'])
+
+    def test_week_buckets_start_on_monday(self):
+        """Test ISO week bucketing"""
+        timestamps = MONDAY + 86400 * np.arange(-2, 9)
+        starts, labels = bucket_starts(timestamps, 0, 'week')
+        self.assertEqual(starts.tolist(), [0, 2, 9])
+        self.assertEqual(labels.astype(str).tolist(), ['2023-12-25', '2024-01-01', '2024-01-08'])
+        with self.assertRaises(ValueError):
+            bucket_starts(timestamps, 0, 'month')
+
+    def test_day_buckets_follow_daylight_saving_changes(self):
+        """Test that days after a DST change start at the new local midnight"""
+        # Berlin moves from +01:00 to +02:00 on 2024-03-31; the upstream's offset is the winter one
+        midnight = 1711753200  # 2024-03-30T00:00+01:00
+        timestamps = midnight + 3600 * np.arange(71)
+        starts, labels = bucket_starts(timestamps, 3600, timezone='Europe/Berlin')
+        self.assertEqual(starts.tolist(), [0, 24, 47])
+        self.assertEqual(labels.astype(str).tolist(), ['2024-03-30', '2024-03-31', '2024-04-01'])
+        # Without the timezone, or with one the tz database does not know, the offset stays fixed
+        self.assertEqual(bucket_starts(timestamps, 3600)[0].tolist(), [0, 24, 48])
+        self.assertEqual(bucket_starts(timestamps, 3600, timezone='Nowhere/Else')[0].tolist(), [0, 24, 48])
+
+    def test_reductions_skip_missing_hours(self):
+        """Test min/max/sum/mean/hours with NaN values"""
+        values = np.array([1.0, np.nan, 3.0, 0.0, np.nan, np.nan])
+        starts = np.array([0, 3, 4])
+        np.testing.assert_array_equal(_reduce(values, starts, 'max'), [3.0, 0.0, np.nan])
+        np.testing.assert_array_equal(_reduce(values, starts, 'sum'), [4.0, 0.0, np.nan])
+        np.testing.assert_array_equal(_reduce(values, starts, 'mean'), [2.0, 0.0, np.nan])
+        np.testing.assert_array_equal(_reduce(values, starts, 'hours'), [2.0, 0.0, np.nan])
+
+    def test_dominant_direction_is_a_circular_mean(self):
+        """Test that 350° and 10° average to north, weighted by speed"""
+        directions = np.array([350.0, 10.0, 90.0, 180.0])
+        result = _reduce(directions, np.array([0, 2]), 'dominant', np.array([1.0, 1.0, 3.0, 1.0]))
+        self.assertAlmostEqual(result[0] % 360, 0.0, places=6)
+        self.assertAlmostEqual(result[1], 90 + np.degrees(np.arctan2(1, 3)), places=6)
+
+    def test_aggregate_returns_json_lists(self):
+        """Test the full rollup with integer variables"""
+        hourly = {
+            'time': MONDAY + 3600 * np.arange(48),
+            'temperature_2m': np.arange(48, dtype=np.float32),
+            'weather_code': np.where(np.arange(48) == 30, 95, 3).astype(np.float32),
+        }
+        daily = aggregate(hourly, 0, ['temperature_2m_max', 'weather_code', 'rain_sum'])
+        self.assertEqual(daily, {
+            'time': ['2024-01-01', '2024-01-02'],
+            'temperature_2m_max': [23.0, 47.0],
+            'weather_code': [3, 95],
+        })
+        self.assertEqual(source_variables(['wind_direction_10m_dominant', 'wind_speed_10m_max']),
+                         ['wind_direction_10m', 'wind_speed_10m'])
+
+
+class TestDailyFromHourly(StandInTestCase):
+    """Test cases for serving the daily forecast from cached hourly data"""
+
+    def test_daily_values_match_hourly_data(self):
+        """Test that the daily forecast is a rollup of the hourly forecast"""
+        daily = weather_service.get_daily_forecast(52.52, 13.41, 2)
+        hourly = weather_service.get_hourly_forecast(52.52, 13.41, 48, ['temperature_2m'])
+
+        self.assertEqual(daily['time'], [hourly['timestamps'][0][:10], hourly['timestamps'][24][:10]])
+        self.assertEqual(daily['temperature_2m_max'][1], max(hourly['temperature_2m'][24:48]))
+        # Computed for the location, not requested from the upstream
+        self.assertTrue(daily['time'][0] == daily['sunrise'][0][:10] == daily['sunset'][0][:10])
+        self.assertLess(daily['sunrise'][0], daily['sunset'][0])
+        self.assertNotIn('daily', self.fetch.call_args[0][0])
+        self.assertEqual(len(daily['wind_direction_10m_dominant']), 2)
+
+    def test_hourly_and_daily_share_one_cache_entry(self):
+        """Test that after one widening fetch both endpoints are served from cache"""
+        for _ in range(2):
+            weather_service.get_daily_forecast(52.52, 13.41)
+            weather_service.get_hourly_forecast(52.52, 13.41, 48)
+        self.assertEqual(self.fetch.call_count, 2)
+
+    def test_weekly_rollup(self):
+        """Test the weekly period and its restrictions"""
+        weekly = weather_service.get_daily_forecast(52.52, 13.41, 14, ['precipitation_sum'], 'week')
+        self.assertIn(len(weekly['time']), (2, 3))
+        self.assertEqual(set(weekly), {'time', 'precipitation_sum', 'latitude', 'longitude', 'elevation', 'timezone'})
+        with self.assertRaises(ValueError):
+            weather_service.get_daily_forecast(52.52, 13.41, 14, ['sunrise'], 'week')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+"""
+Unit tests for vectorized weather alert evaluation
+"""
+
+import unittest
+import json
+import os
+import sys
+
+import numpy as np
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+import weather_service
+from alerts import evaluate_alerts, heat_index, qualifying_hours, source_variables
+from tests.standin import StandInTestCase
+from weather_service import calculate_feels_like_temperature
+
+
+def local_times(locations, hours):
+    """ISO hour strings starting at 2024-01-01T00:00"""
+    hours = np.datetime64('2024-01-01T00:00') + np.arange(hours).astype('timedelta64[h]')
+    times = np.datetime_as_string(hours, unit='m')
+    return np.tile(times.astype(object), (locations, 1))
+
+
+class TestAlertRules(unittest.TestCase):
+    """Test cases for the rule evaluation"""
+
+    def test_runs_shorter_than_the_duration_do_not_qualify(self):
+        """Test run-length detection over several rows"""
+        mask = np.array([
+            [1, 1, 0, 1, 1, 1, 0, 1],
+            [0, 0, 0, 0, 0, 0, 1, 1],
+        ], dtype=bool)
+        expected = np.array([
+            [0, 0, 0, 1, 1, 1, 0, 0],
+            [0, 0, 0, 0, 0, 0, 0, 0],
+        ], dtype=bool)
+        np.testing.assert_array_equal(qualifying_hours(mask, 3), expected)
+        np.testing.assert_array_equal(qualifying_hours(mask, 1), mask)
+
+    def test_heat_index_matches_feels_like(self):
+        """Test that the vectorized heat index agrees with the scalar formula in hot weather"""
+        temperature = np.array([28.0, 30.0, 35.0])
+        humidity = np.array([50.0, 60.0, 70.0])
+        expected = [calculate_feels_like_temperature(t, rh, 0) for t, rh in zip(temperature, humidity)]
+        np.testing.assert_allclose(heat_index(temperature, humidity), expected)
+        self.assertEqual(heat_index(np.array([20.0]), np.array([90.0])).tolist(), [20.0])
+
+    def test_alerts_per_location(self):
+        """Test duration rules, code rules and quiet locations in one batch"""
+        gusts = np.zeros((3, 12))
+        gusts[0, 2:6] = [65, 72, 80, 61]
+        gusts[1, 2:4] = 70
+        codes = np.zeros((3, 12))
+        codes[2, 9] = 66
+        alerts = evaluate_alerts({'wind_gusts_10m': gusts, 'weather_code': codes}, local_times(3, 12))
+
+        self.assertEqual([alert['title'] for alert in alerts[0]], ['High Wind Warning'])
+        self.assertEqual(alerts[0][0]['start'], '2024-01-01T02:00')
+        self.assertEqual(alerts[0][0]['end'], '2024-01-01T06:00')
+        self.assertIn('80 km/h for 4 hours', alerts[0][0]['description'])
+        self.assertEqual(alerts[1], [])
+        self.assertEqual([(alert['id'], alert['severity']) for alert in alerts[2]],
+                         [('freezing-rain-2024-01-01T09:00', 'severe')])
+
+    def test_separate_events_are_separate_alerts(self):
+        """Test that two runs in one window do not merge over the gap between them"""
+        gusts = np.zeros((2, 24))
+        gusts[0, 1:4] = [62, 75, 64]
+        gusts[0, 15:19] = [61, 66, 68, 63]
+        gusts[1, 20:24] = 70
+        alerts = evaluate_alerts({'wind_gusts_10m': gusts}, local_times(2, 24))
+
+        self.assertEqual([(alert['start'], alert['end']) for alert in alerts[0]],
+                         [('2024-01-01T01:00', '2024-01-01T04:00'), ('2024-01-01T15:00', '2024-01-01T19:00')])
+        self.assertIn('75 km/h for 3 hours', alerts[0][0]['description'])
+        self.assertIn('68 km/h for 4 hours', alerts[0][1]['description'])
+        self.assertEqual(len({alert['id'] for alert in alerts[0]}), 2)
+        self.assertEqual([(alert['start'], alert['end']) for alert in alerts[1]],
+                         [('2024-01-01T20:00', '2024-01-01T23:00')])
+
+    def test_missing_hours_never_match(self):
+        """Test that padding beyond the data neither matches nor becomes the end time"""
+        temperature = np.full((1, 8), np.nan)
+        temperature[0, :6] = -12
+        times = local_times(1, 8)
+        times[0, 6:] = ''
+        alerts = evaluate_alerts({'temperature_2m': temperature}, times)
+        self.assertEqual(alerts[0][0]['title'], 'Hard Freeze Warning')
+        self.assertEqual(alerts[0][0]['end'], '2024-01-01T05:00')
+        self.assertEqual(source_variables()[:2], ['wind_gusts_10m', 'weather_code'])
+
+
+class TestAlertsEndpoint(StandInTestCase):
+    """Test cases for /weather/alerts"""
+
+    def setUp(self):
+        super().setUp()
+        favorites = os.path.join(self.temp_dir.name, 'favorites.json')
+        with open(favorites, 'w') as f:
+            json.dump([{'name': 'Berlin', 'latitude': 52.52, 'longitude': 13.41},
+                       {'name': 'Quito', 'latitude': -0.18, 'longitude': -78.47}], f)
+        self.patch(main, 'FAVORITES_FILE', favorites)
+        self.client = main.create_app({'TESTING': True}).test_client()
+
+    def test_alerts_for_all_favorites(self):
+        """Test batch evaluation of the favorites, served from cache the second time"""
+        for _ in range(2):
+            response = self.client.get('/weather/alerts')
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual([location['name'] for location in response.json['locations']], ['Berlin', 'Quito'])
+        self.assertEqual(response.json['locations'][0]['alerts'], [])
+        self.assertEqual(self.fetch.call_count, 2)
+
+    def test_alerts_for_one_location(self):
+        """Test the single location form"""
+        response = self.client.get('/weather/alerts?lat=52.52&lon=13.41&hours=24')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json, {'latitude': 52.52, 'longitude': 13.41, 'alerts': []})
+
+
+if __name__ == '__main__':
+    unittest.main()
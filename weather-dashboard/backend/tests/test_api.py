@@ -7,6 +7,9 @@ import json
 import os
 import sys
 import tempfile
+from unittest import mock
+
+from openmeteo_requests import CircuitOpenError
 
 # Add parent directory to path to allow imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -18,8 +21,7 @@ class TestFavoritesAPI(unittest.TestCase):
 
     def setUp(self):
         """Set up test client and temporary favorites file"""
-        self.app = main.app
-        self.app.config['TESTING'] = True
+        self.app = main.create_app({'TESTING': True})
         self.client = self.app.test_client()
 
         # Create a temp file for favorites
@@ -107,5 +109,45 @@ class TestFavoritesAPI(unittest.TestCase):
 
         self.assertEqual(duplicate_response.status_code, 409)  # Conflict status code
 
+class TestUpstreamGuards(unittest.TestCase):
+    """Test cases for requests refused by the rate limiter or circuit breaker"""
+
+    def setUp(self):
+        """Set up test client"""
+        self.client = main.create_app({'TESTING': True}).test_client()
+
+    def test_circuit_open_returns_503(self):
+        """Test that an open circuit is reported as 503 with Retry-After"""
+        with mock.patch.object(main, 'get_current_weather', side_effect=CircuitOpenError(12.2)):
+            response = self.client.get('/weather/current?lat=1&lon=2')
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '13')
+        self.assertIn('Circuit open', response.json['error'])
+
+class TestFieldProjection(unittest.TestCase):
+    """Test cases for the fields query parameter on the forecast endpoints"""
+
+    def setUp(self):
+        """Set up test client"""
+        self.client = main.create_app({'TESTING': True}).test_client()
+
+    def test_fields_are_passed_to_the_service(self):
+        """Test that fields are split and forwarded"""
+        with mock.patch.object(main, 'get_hourly_forecast', return_value={}) as forecast:
+            response = self.client.get('/weather/forecast/hourly?lat=1&lon=2&hours=12&fields=temperature_2m,%20is_day')
+
+        self.assertEqual(response.status_code, 200)
+        forecast.assert_called_once_with(1.0, 2.0, 12, ['temperature_2m', 'is_day'])
+
+    def test_unknown_field_returns_400(self):
+        """Test that unsupported fields are rejected before any upstream call"""
+        with mock.patch('weather_service.cached_fetch') as fetch:
+            response = self.client.get('/weather/forecast/daily?lat=1&lon=2&fields=temperature_2m_max,bogus')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('bogus', response.json['error'])
+        fetch.assert_not_called()
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
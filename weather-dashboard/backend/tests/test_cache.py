@@ -0,0 +1,307 @@
+"""
+Unit tests for the cache backends and cached weather fetching
+"""
+
+import unittest
+import os
+import sys
+import socketserver
+import tempfile
+import threading
+import time
+from unittest import mock
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openmeteo_requests import CircuitOpenError
+
+import weather_service
+from cache import RedisCache, SharedMemoryCache, dumps, loads, restore_snapshot, write_snapshot
+from tests.standin import standin_fetch
+
+
+class RespStandIn(socketserver.ThreadingTCPServer):
+    """Minimal Redis-protocol server supporting GET, SET (with PX), DEL and SELECT"""
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self):
+        self.data = {}
+        super().__init__(('127.0.0.1', 0), RespHandler)
+
+    @property
+    def url(self):
+        return 'redis://127.0.0.1:%d/1' % self.server_address[1]
+
+
+class RespHandler(socketserver.StreamRequestHandler):
+    def read_command(self):
+        header = self.rfile.readline()
+        if not header:
+            return None
+        args = []
+        for _ in range(int(header[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def handle(self):
+        data = self.server.data
+        while True:
+            args = self.read_command()
+            if args is None:
+                return
+            name = args[0].upper()
+            if name == b'GET':
+                value, expires = data.get(args[1], (None, 0))
+                if value is None or expires < time.time():
+                    self.wfile.write(b'$-1\r\n')
+                else:
+                    self.wfile.write(b'$%d\r\n%s\r\n' % (len(value), value))
+            elif name == b'SET':
+                data[args[1]] = (args[2], time.time() + int(args[4]) / 1000)
+                self.wfile.write(b'+OK\r\n')
+            elif name == b'DEL':
+                self.wfile.write(b':%d\r\n' % (data.pop(args[1], None) is not None))
+            elif name == b'SELECT':
+                self.wfile.write(b'+OK\r\n')
+            else:
+                self.wfile.write(b'-ERR unknown command\r\n')
+
+
+class TestSharedMemoryCache(unittest.TestCase):
+    """Test cases for the mmap-backed cache"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, 'cache')
+        self.cache = SharedMemoryCache(self.path, slot_count=16, slot_size=256)
+
+    def tearDown(self):
+        self.cache.close()
+        self.temp_dir.cleanup()
+
+    def test_set_get_delete(self):
+        """Test the basic round trip"""
+        self.assertIsNone(self.cache.get('a'))
+        self.assertTrue(self.cache.set('a', b'value', 60))
+        self.assertEqual(self.cache.get('a'), b'value')
+        self.cache.set('a', b'updated', 60)
+        self.assertEqual(self.cache.get('a'), b'updated')
+        self.cache.delete('a')
+        self.assertIsNone(self.cache.get('a'))
+        self.assertEqual(self.cache.stats()['hits'], 2)
+
+    def test_expiry_and_oversized_values(self):
+        """Test that expired entries miss and oversized values are refused"""
+        self.cache.set('short', b'x', 0.01)
+        time.sleep(0.02)
+        self.assertIsNone(self.cache.get('short'))
+        self.assertFalse(self.cache.set('big', b'x' * 1024, 60))
+
+    def test_eviction_when_full(self):
+        """Test that a full table evicts the entry closest to expiry"""
+        for i in range(64):
+            self.assertTrue(self.cache.set(f'key{i}', b'v%d' % i, 60 + i))
+        self.assertEqual(self.cache.get('key63'), b'v63')
+
+    def test_shared_between_instances(self):
+        """Test that a second mapping of the same file sees the entries"""
+        self.cache.set('shared', b'hello', 60)
+        other = SharedMemoryCache(self.path, slot_count=999, slot_size=999)
+        try:
+            self.assertEqual(other.slot_count, 16)
+            self.assertEqual(other.get('shared'), b'hello')
+        finally:
+            other.close()
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'requires fork')
+    def test_shared_between_processes(self):
+        """Test that an entry written by a child process is visible to the parent"""
+        pid = os.fork()
+        if pid == 0:
+            self.cache.set('from-child', b'child', 60)
+            os._exit(0)
+        os.waitpid(pid, 0)
+        self.assertEqual(self.cache.get('from-child'), b'child')
+
+
+class TestCacheSnapshot(unittest.TestCase):
+    """Test cases for saving and restoring the shared memory cache"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.snapshot = os.path.join(self.temp_dir.name, 'snapshot')
+        self.cache = SharedMemoryCache(os.path.join(self.temp_dir.name, 'cache'), slot_count=16, slot_size=256)
+
+    def tearDown(self):
+        self.cache.close()
+        self.temp_dir.cleanup()
+
+    def restarted(self):
+        """A fresh, empty cache standing in for the table after a restart"""
+        return SharedMemoryCache(os.path.join(self.temp_dir.name, 'restarted'), slot_count=16, slot_size=256)
+
+    def test_round_trip_skips_expired_entries(self):
+        """Test that live entries survive a restart and expired ones are dropped"""
+        self.cache.set('live', b'value', 60)
+        self.cache.set('short', b'x', 0.05)
+        self.assertEqual(write_snapshot(self.cache, self.snapshot), 2)
+        time.sleep(0.06)
+
+        restarted = self.restarted()
+        try:
+            self.assertEqual(restore_snapshot(restarted, self.snapshot), 1)
+            self.assertEqual(restarted.get('live'), b'value')
+            self.assertIsNone(restarted.get('short'))
+        finally:
+            restarted.close()
+
+    def test_pinned_and_most_used_entries_first(self):
+        """Test that max_entries keeps pinned keys, then the entries with the most hits"""
+        for key in ('favorite', 'popular', 'rare'):
+            self.cache.set(key, key.encode(), 60)
+        for _ in range(3):
+            self.cache.get('popular')
+        self.cache.get('rare')
+        self.assertEqual(write_snapshot(self.cache, self.snapshot, ['favorite'], max_entries=2), 2)
+
+        restarted = self.restarted()
+        try:
+            restore_snapshot(restarted, self.snapshot)
+            self.assertEqual(restarted.get('favorite'), b'favorite')
+            self.assertEqual(restarted.get('popular'), b'popular')
+            self.assertIsNone(restarted.get('rare'))
+        finally:
+            restarted.close()
+
+    def test_restore_keeps_live_entries(self):
+        """Test that a snapshot never replaces newer data, and that bad files are ignored"""
+        self.cache.set('key', b'old', 60)
+        write_snapshot(self.cache, self.snapshot)
+        self.cache.set('key', b'new', 60)
+        self.assertEqual(restore_snapshot(self.cache, self.snapshot), 0)
+        self.assertEqual(self.cache.get('key'), b'new')
+
+        self.assertEqual(restore_snapshot(self.cache, os.path.join(self.temp_dir.name, 'missing')), 0)
+        with open(self.snapshot, 'wb') as f:
+            f.write(b'not a snapshot')
+        self.assertEqual(restore_snapshot(self.cache, self.snapshot), 0)
+
+    def test_favorite_keys_match_requests(self):
+        """Test that the pinned keys are the ones the current and hourly endpoints use"""
+        with mock.patch.object(weather_service, 'cache', self.cache), \
+                mock.patch.object(weather_service, 'cached_fetch', wraps=weather_service.cached_fetch) as fetch, \
+                mock.patch.object(weather_service.om, 'get_weather_raw', side_effect=standin_fetch):
+            weather_service.get_current_weather(52.52, 13.41)
+            weather_service.get_hourly_forecast(52.52, 13.41)
+        used = {weather_service.cache_key(kind, params) for (kind, params, _), _ in fetch.call_args_list}
+        keys = weather_service.favorite_cache_keys([{'name': 'Berlin', 'latitude': 52.52, 'longitude': 13.41}])
+        self.assertEqual(set(keys), used)
+
+
+class TestRedisCache(unittest.TestCase):
+    """Test cases for the Redis-protocol cache against a local stand-in"""
+
+    def setUp(self):
+        self.server = RespStandIn()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.cache = RedisCache(self.server.url)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_round_trip(self):
+        """Test set, get and delete"""
+        self.assertTrue(self.cache.set('k', b'\x00binary\r\n', 60))
+        self.assertEqual(self.cache.get('k'), b'\x00binary\r\n')
+        self.assertIn(b'weather:k', self.server.data)
+        self.cache.delete('k')
+        self.assertIsNone(self.cache.get('k'))
+
+    def test_unreachable_server_is_a_miss(self):
+        """Test that cache failures degrade to misses"""
+        cache = RedisCache('redis://127.0.0.1:1/0', timeout=0.1)
+        self.assertIsNone(cache.get('k'))
+        self.assertFalse(cache.set('k', b'v', 60))
+
+
+class TestCachedFetch(unittest.TestCase):
+    """Test cases for caching in the weather service"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache = SharedMemoryCache(os.path.join(self.temp_dir.name, 'cache'), slot_count=16, slot_size=1024)
+        self.patcher = mock.patch.object(weather_service, 'cache', self.cache)
+        self.patcher.start()
+        self.params = {'latitude': 52.52001, 'longitude': 13.40499, 'current': ['temperature_2m']}
+
+    def tearDown(self):
+        self.patcher.stop()
+        self.cache.close()
+        self.temp_dir.cleanup()
+
+    def test_serialization_round_trip(self):
+        """Test that cache values survive serialization"""
+        value = {'time': ['2024-01-01T00:00'], 'temperature_2m': [1.5], 'latitude': None}
+        self.assertEqual(loads(dumps(value)), value)
+
+    def test_second_call_is_served_from_cache(self):
+        """Test that a hit skips the upstream fetch, also for nearby coordinates"""
+        fetch = mock.Mock(return_value={'temperature': 20.0})
+        self.assertEqual(weather_service.cached_fetch('current', self.params, fetch), {'temperature': 20.0})
+        nearby = dict(self.params, latitude=52.5203)
+        self.assertEqual(weather_service.cached_fetch('current', nearby, fetch), {'temperature': 20.0})
+        self.assertEqual(fetch.call_count, 1)
+
+    def test_superset_entry_serves_subsets(self):
+        """Test that an entry fetched with more variables satisfies a request for fewer"""
+        fetch = mock.Mock(return_value=b'frames')
+        wide = dict(self.params, current=['temperature_2m', 'weather_code'])
+        weather_service.cached_fetch('current', wide, fetch)
+        self.assertEqual(weather_service.cached_fetch('current', self.params, fetch), b'frames')
+        fetch.assert_called_once_with(wide)
+
+    def test_missing_variables_widen_the_entry(self):
+        """Test that a request for new variables refetches the union"""
+        fetch = mock.Mock(return_value=b'frames')
+        weather_service.cached_fetch('current', self.params, fetch)
+        weather_service.cached_fetch('current', dict(self.params, current=['weather_code']), fetch)
+        self.assertEqual(fetch.call_args.args[0]['current'], ['weather_code', 'temperature_2m'])
+        # Both subsets are now covered by the single entry
+        weather_service.cached_fetch('current', self.params, fetch)
+        self.assertEqual(fetch.call_count, 2)
+
+    def test_section_holds_the_variables(self):
+        """Test a kind whose variables are in another parameter, as for the archive's daily values"""
+        fetch = mock.Mock(return_value=b'frames')
+        params = {'latitude': 52.52, 'longitude': 13.4, 'start_date': '2024-01-01',
+                  'daily': ['rain_sum', 'snowfall_sum']}
+        weather_service.cached_fetch('archive', params, fetch, section='daily')
+        subset = dict(params, daily=['rain_sum'])
+        self.assertEqual(weather_service.cached_fetch('archive', subset, fetch, section='daily'), b'frames')
+        self.assertNotEqual(weather_service.cache_key('archive', dict(params, start_date='2024-02-01'), 'daily'),
+                            weather_service.cache_key('archive', params, 'daily'))
+        fetch.assert_called_once_with(params)
+
+    def test_stale_entry_served_when_circuit_open(self):
+        """Test that an expired entry is served when the upstream is refused"""
+        with mock.patch.dict(weather_service.CACHE_TTL, {'current': -1}):
+            weather_service.cached_fetch('current', self.params, lambda params: {'temperature': 20.0})
+            # Already stale, so this refetches
+            weather_service.cached_fetch('current', self.params, lambda params: {'temperature': 21.0})
+            failing = mock.Mock(side_effect=CircuitOpenError(30))
+            self.assertEqual(weather_service.cached_fetch('current', self.params, failing), {'temperature': 21.0})
+            failing.assert_called_once()
+
+    def test_no_entry_propagates_upstream_error(self):
+        """Test that without cached data the upstream error is raised"""
+        with self.assertRaises(CircuitOpenError):
+            weather_service.cached_fetch('current', self.params, mock.Mock(side_effect=CircuitOpenError(30)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+"""
+Unit tests for the multi-model ensemble
+"""
+
+import unittest
+import os
+import sys
+import warnings
+from unittest import mock
+
+import numpy as np
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+import weather_service
+from cache import SharedMemoryCache
+from ensemble import MAX_ENSEMBLE_MODELS, get_ensemble, resolve_models, spread_statistics
+from model_runs import ModelRuns
+from tests.standin import StandInTestCase
+
+HOUR = 3600
+
+
+class TestSpreadStatistics(unittest.TestCase):
+    """Test cases for the vectorized statistics over (model x time)"""
+
+    def test_statistics_skip_missing_members(self):
+        """Test mean, min/max, spread and agreement with models missing at some hours"""
+        members = np.array([[10.0, 0.0, np.nan],
+                            [12.0, 4.0, np.nan],
+                            [14.0, np.nan, np.nan]], dtype=np.float32)
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            statistics = spread_statistics(members, tolerance=2.0)
+
+        np.testing.assert_allclose(statistics['mean'][:2], [12.0, 2.0])
+        np.testing.assert_allclose(statistics['min'][:2], [10.0, 0.0])
+        np.testing.assert_allclose(statistics['max'][:2], [14.0, 4.0])
+        np.testing.assert_allclose(statistics['spread'][:2], [np.sqrt(8 / 3), 2.0], rtol=1e-6)
+        np.testing.assert_allclose(statistics['agreement'][:2], [1.0, 1.0])
+        self.assertTrue(all(np.isnan(values[2]) for values in statistics.values()))
+        self.assertEqual(spread_statistics(members, tolerance=1.0)['agreement'][0], np.float32(1 / 3))
+
+    def test_resolve_models(self):
+        """Test defaults, duplicates and unknown models"""
+        self.assertEqual(resolve_models(['gfs_seamless', 'icon_seamless', 'gfs_seamless']),
+                         ['gfs_seamless', 'icon_seamless'])
+        self.assertEqual(len(resolve_models(None)), 3)
+        too_many = ['best_match', 'ecmwf_ifs025', 'gfs_seamless', 'icon_seamless', 'jma_seamless']
+        for models in (['gfs_seamless', 'no_such_model'], ['undefined'], too_many):
+            with self.assertRaises(ValueError):
+                resolve_models(models)
+
+
+class TestEnsemble(StandInTestCase):
+    """Test cases for ensembles from the upstream stand-in"""
+
+    def setUp(self):
+        super().setUp()
+        self.patch(weather_service, 'model_runs', ModelRuns({model: {'interval': 6 * HOUR, 'delay': 0} for model in (
+            'best_match', 'ecmwf_ifs025', 'gfs_seamless', 'icon_seamless')}))
+
+    def test_members_on_a_common_axis(self):
+        """Test that all models come from one upstream call and shorter models end in missing values"""
+        ensemble = get_ensemble(52.52, 13.41, hours=6)
+        self.assertEqual(ensemble['models'], ['ecmwf_ifs025', 'gfs_seamless', 'icon_seamless'])
+        self.assertEqual(len(ensemble['timestamps']), 6)
+        members = ensemble['temperature_2m']['members']
+        # The stand-in biases every later model by 0.8°
+        np.testing.assert_allclose(members['gfs_seamless'] - members['ecmwf_ifs025'], 0.8, atol=1e-5)
+        np.testing.assert_allclose(ensemble['temperature_2m']['mean'], members['gfs_seamless'], atol=1e-5)
+        self.assertEqual(self.fetch.call_count, 1)
+        self.assertEqual(self.fetch.call_args[0][0]['models'], ['ecmwf_ifs025', 'gfs_seamless', 'icon_seamless'])
+
+        # The same models in another order are served from the same entry, in the order asked for
+        reordered = get_ensemble(52.52, 13.41, models=['icon_seamless', 'ecmwf_ifs025', 'gfs_seamless'], hours=6)
+        self.assertEqual(reordered['models'], ['icon_seamless', 'ecmwf_ifs025', 'gfs_seamless'])
+        self.assertEqual(list(reordered['temperature_2m']['members']), reordered['models'])
+        np.testing.assert_array_equal(reordered['temperature_2m']['members']['gfs_seamless'], members['gfs_seamless'])
+        self.assertEqual(self.fetch.call_count, 1)
+
+        # The stand-in's icon_seamless ends after 7 days, the others after 16
+        late = get_ensemble(52.52, 13.41, start=7 * 24 - 1, end=7 * 24 + 2, fields=['precipitation'])
+        self.assertEqual(list(late['precipitation']), ['mean', 'min', 'max', 'spread', 'agreement', 'members'])
+        self.assertNotIn('temperature_2m', late)
+        icon = late['precipitation']['members']['icon_seamless']
+        self.assertFalse(np.isnan(icon[0]))
+        self.assertTrue(np.isnan(icon[1:]).all())
+        self.assertEqual(self.fetch.call_count, 1)
+
+    def test_largest_ensemble_fits_a_cache_slot(self):
+        """Test that an entry of the most models with every variable is cached in a default size slot"""
+        self.cache = SharedMemoryCache(os.path.join(self.temp_dir.name, 'default'))
+        self.addCleanup(self.cache.close)
+        self.patch(weather_service, 'cache', self.cache)
+        models = ['best_match', 'ecmwf_ifs025', 'gfs_seamless', 'icon_seamless'][:MAX_ENSEMBLE_MODELS]
+        for _ in range(2):
+            get_ensemble(52.52, 13.41, models=models)
+        self.assertEqual(self.fetch.call_count, 1)
+
+    def test_entry_expires_with_the_first_new_run(self):
+        """Test that an ensemble entry is fresh until any of its models publishes a run"""
+        runs = ModelRuns({'gfs': {'interval': 6 * HOUR, 'delay': 0}, 'icon': {'interval': 3 * HOUR, 'delay': 0}})
+        with mock.patch.object(weather_service, 'model_runs', runs), \
+                mock.patch('weather_service.stagger', return_value=0):
+            fresh_until, run = weather_service.freshness('ensemble', 'key', 7 * HOUR, models=['gfs', 'icon'])
+        self.assertEqual(run, 6 * HOUR)
+        self.assertEqual(fresh_until, 9 * HOUR)
+
+    def test_route(self):
+        """Test the JSON shape and bad requests"""
+        client = main.create_app({'TESTING': True}).test_client()
+        response = client.get('/weather/ensemble?lat=52.52&lon=13.41&hours=3&models=gfs_seamless,icon_seamless'
+                              '&fields=temperature_2m')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['models'], ['gfs_seamless', 'icon_seamless'])
+        self.assertEqual(len(response.json['temperature_2m']['spread']), 3)
+        self.assertEqual(response.json['temperature_2m']['agreement'], [1.0, 1.0, 1.0])
+        self.assertEqual(response.json['latitude'], 52.52)
+
+        for query in ('models=gfs_seamless,no_such_model', 'fields=snowfall', 'start=1000'):
+            self.assertEqual(client.get(f'/weather/ensemble?lat=52.52&lon=13.41&{query}').status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
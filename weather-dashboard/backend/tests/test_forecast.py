@@ -0,0 +1,132 @@
+"""
+Unit tests for the compact Forecast container
+"""
+
+import unittest
+import json
+import os
+import sys
+import warnings
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+import numpy as np
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+import responses
+import weather_service
+from forecast import Forecast
+from responses import dumps_bytes
+from tests.standin import HOURLY, MONDAY, StandInTestCase, standin_frames
+from weather_service import resolve_window
+from weather_frames import LazyWeatherResponse, decode_response
+
+
+def list_size(values):
+    """Bytes of a list of boxed Python values"""
+    return sys.getsizeof(values) + sum(sys.getsizeof(value) for value in values)
+
+
+class TestForecast(unittest.TestCase):
+    """Test cases for columns, slicing and serialization"""
+
+    def setUp(self):
+        self.data = standin_frames(hourly=HOURLY)
+        self.forecast = Forecast.from_frames(LazyWeatherResponse(self.data), 'hourly', HOURLY)
+
+    def test_serializes_like_the_list_version(self):
+        """Test that the JSON shape matches the dicts of lists it replaces"""
+        decoded = decode_response(self.data, hourly=HOURLY)
+        expected = dict(decoded['hourly'], **{name: decoded[name] for name in self.forecast.location})
+
+        for orjson in (responses.orjson, None):
+            with mock.patch.object(responses, 'orjson', orjson):
+                self.assertEqual(json.loads(dumps_bytes(self.forecast)), expected)
+        self.assertEqual(self.forecast.as_list('weather_code'), decoded['hourly']['weather_code'])
+        self.assertIsInstance(self.forecast.as_list('weather_code')[0], int)
+
+    def test_compact_columns_and_slices(self):
+        """Test float32 columns on one time axis, views into the frames, and the memory saved"""
+        self.assertFalse(hasattr(self.forecast, '__dict__'))
+        self.assertEqual(self.forecast['temperature_2m'].dtype, np.float32)
+        self.assertTrue(np.shares_memory(self.forecast['temperature_2m'], np.frombuffer(self.data, dtype=np.uint8)))
+
+        day = self.forecast.slice(24, 48)
+        self.assertEqual(len(day['time']), 24)
+        self.assertTrue(np.shares_memory(day['temperature_2m'], self.forecast['temperature_2m']))
+
+        decoded = decode_response(self.data, hourly=HOURLY)['hourly']
+        as_lists = sum(list_size(values) for values in decoded.values())
+        self.assertGreater(as_lists, 4 * self.forecast.nbytes)
+
+    def test_columns_are_padded_and_checked(self):
+        """Test short, missing and oversized columns"""
+        forecast = Forecast.from_json({'hourly': {'time': ['2024-01-01T00:00', '2024-01-01T01:00'],
+                                                  'temperature_2m': [1.5, None], 'weather_code': [3]}}, 'hourly')
+        # Missing integers are masked without casting NaN
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            self.assertEqual(forecast.to_dict()['weather_code'], [3, None])
+        self.assertEqual(json.loads(dumps_bytes(forecast))['temperature_2m'], [1.5, None])
+        self.assertEqual(forecast['time'], ['2024-01-01T00:00', '2024-01-01T01:00'])
+        with self.assertRaises(ValueError):
+            forecast.set_column('precipitation', [0, 0, 0])
+
+
+class TestForecastWindows(StandInTestCase):
+    """Test cases for start/end windows cut from one cached fetch"""
+
+    def setUp(self):
+        super().setUp()
+        self.today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+
+    def local(self, hours, unit='minutes'):
+        """Local ISO time of an hour from the start of today (the stand-in is on GMT)"""
+        moment = self.today + timedelta(hours=hours)
+        return moment.date().isoformat() if unit == 'date' else moment.isoformat(timespec=unit)
+
+    def test_resolve_window(self):
+        """Test offsets, ISO bounds and clamping by index arithmetic on the axis"""
+        axis = (MONDAY - 48 * 3600, MONDAY + 16 * 86400, 3600)
+        now = MONDAY + 5000
+        self.assertEqual(resolve_window(axis, 0, now=now), (48, 72))
+        self.assertEqual(resolve_window(axis, 0, 12, 36, now=now), (60, 84))
+        self.assertEqual(resolve_window(axis, 0, '-6', length=3, now=now), (42, 45))
+        self.assertEqual(resolve_window(axis, 0, 'now', length=3, now=now), (49, 52))
+        self.assertEqual(resolve_window(axis, 3600, '2024-01-01T01:00', '2024-01-01T03:00', now=now), (48, 50))
+        self.assertEqual(resolve_window(axis, 0, 1, length=2, step=86400, now=now), (72, 120))
+        self.assertEqual(resolve_window(axis, 0, -100, 2, step=86400, now=now), (0, 96))
+        for start, end in ((36, 12), (500, 600), ('soon', None)):
+            with self.assertRaises(ValueError):
+                resolve_window(axis, 0, start, end, now=now)
+
+    def test_windows_share_one_fetch(self):
+        """Test that different horizons and windows, past hours included, are served from one cache entry"""
+        for hours in (24, 36, 48, 300):
+            self.assertEqual(len(weather_service.get_hourly_forecast(52.52, 13.41, hours)['timestamps']), hours)
+        window = weather_service.get_hourly_forecast(52.52, 13.41, fields=['temperature_2m'], start='12', end='36')
+        past = weather_service.get_hourly_forecast(52.52, 13.41, start=-6, end=self.local(2))
+        daily = weather_service.get_daily_forecast(52.52, 13.41, fields=['temperature_2m_max', 'sunrise'],
+                                                   start=1, end=self.local(72, 'date'))
+
+        self.assertEqual(window['timestamps'][0], self.local(12))
+        self.assertEqual(len(window['timestamps']), 24)
+        self.assertEqual(past['timestamps'][0], self.local(-6))
+        self.assertEqual(len(past['timestamps']), 8)
+        self.assertEqual(daily['time'], [self.local(24, 'date'), self.local(48, 'date')])
+        self.assertEqual([sunrise[:10] for sunrise in daily['sunrise']], daily['time'])
+        self.assertEqual(self.fetch.call_count, 1)
+
+    def test_invalid_window_returns_400(self):
+        """Test that a window outside the forecast is rejected"""
+        client = main.create_app({'TESTING': True}).test_client()
+        response = client.get('/weather/forecast/hourly?lat=1&lon=2&start=1000')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('outside', response.json['error'])
+
+
+if __name__ == '__main__':
+    unittest.main()
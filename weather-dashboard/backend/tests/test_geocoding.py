@@ -0,0 +1,96 @@
+"""
+Unit tests for the local gazetteer
+"""
+
+import unittest
+import os
+import sys
+import tempfile
+from unittest import mock
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+from geocoding import Gazetteer, build_index, normalize
+
+# geonameid, name, asciiname, alternatenames, lat, lon, class, code, country, cc2, admin1, admin2, admin3, admin4,
+# population, ...
+PLACES = [
+    ('2950159', 'Berlin', 'Berlin', '', '52.52437', '13.41053', 'P', 'PPLC', 'DE', '', '16', '', '', '', '3426354'),
+    ('2657896', 'Zürich', 'Zurich', '', '47.36667', '8.55', 'P', 'PPLA', 'CH', '', 'ZH', '', '', '', '341730'),
+    ('2950096', 'Bernau bei Berlin', 'Bernau bei Berlin', '', '52.67982', '13.58708', 'P', 'PPL', 'DE', '', '11',
+     '', '', '', '34165'),
+    ('2661552', 'Bern', 'Bern', '', '46.94809', '7.44744', 'P', 'PPLC', 'CH', '', 'BE', '', '', '', '121631'),
+    ('5809844', 'Seattle', 'Seattle', '', '47.60621', '-122.33207', 'P', 'PPLA2', 'US', '', 'WA', '', '', '',
+     '737015'),
+    ('2193733', 'Auckland', 'Auckland', '', '-36.84853', '174.76349', 'P', 'PPLA', 'NZ', '', 'E7', '', '', '',
+     '417910'),
+]
+COUNTRIES = ['#ISO\tISO3\tISO-Numeric\tfips\tCountry', 'DE\tDEU\t276\tGM\tGermany', 'CH\tCHE\t756\tSZ\tSwitzerland']
+ADMIN1 = ['DE.16\tBerlin\tBerlin\t2950157', 'CH.ZH\tZurich\tZurich\t2657895']
+
+
+class TestGazetteer(unittest.TestCase):
+    """Test cases for prefix search and reverse lookup"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dir = tempfile.TemporaryDirectory()
+        places = os.path.join(cls.temp_dir.name, 'cities.txt')
+        with open(places, 'w', encoding='utf-8') as f:
+            f.write(''.join('\t'.join(row) + '\n' for row in PLACES))
+        countries = os.path.join(cls.temp_dir.name, 'countryInfo.txt')
+        with open(countries, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(COUNTRIES) + '\n')
+        with open(os.path.join(cls.temp_dir.name, 'admin1CodesASCII.txt'), 'w', encoding='utf-8') as f:
+            f.write('\n'.join(ADMIN1) + '\n')
+        cls.index = os.path.join(cls.temp_dir.name, 'gazetteer')
+        build_index(places, cls.index, countries)
+        cls.gazetteer = Gazetteer(cls.index)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.temp_dir.cleanup()
+
+    def test_normalize(self):
+        """Test case and accent folding"""
+        self.assertEqual(normalize('Zürich'), 'zurich')
+        self.assertEqual(normalize('SÃO Paulo'), 'sao paulo')
+
+    def test_prefix_search_orders_by_population(self):
+        """Test prefix matching, ranking and limits"""
+        results = self.gazetteer.search('ber')
+        self.assertEqual([place['name'] for place in results], ['Berlin', 'Bern', 'Bernau bei Berlin'])
+        self.assertEqual((results[0]['country'], results[0]['state']), ('Germany', 'Berlin'))
+        self.assertEqual(self.gazetteer.search('BER', limit=1)[0]['name'], 'Berlin')
+        self.assertEqual(self.gazetteer.search('zür')[0]['name'], 'Zürich')
+        self.assertEqual(self.gazetteer.search('zur')[0]['country'], 'Switzerland')
+        self.assertEqual(self.gazetteer.search('x'), [])
+        self.assertEqual(self.gazetteer.search(' '), [])
+        self.assertEqual(self.gazetteer.search('ber', limit=0), [])
+        self.assertEqual(self.gazetteer.search('ber', limit=-1), [])
+
+    def test_reverse_finds_the_nearest_place(self):
+        """Test reverse lookup across cells, the antimeridian and the search radius"""
+        place = self.gazetteer.reverse(52.66, 13.57)
+        self.assertEqual(place['name'], 'Bernau bei Berlin')
+        self.assertLess(place['distance_km'], 5)
+        self.assertEqual(self.gazetteer.reverse(47.0, 7.99)['name'], 'Bern')
+        self.assertEqual(self.gazetteer.reverse(-36.9, -179.9, max_distance_km=2000)['country'], 'NZ')
+        self.assertIsNone(self.gazetteer.reverse(0.0, 0.0))
+
+    def test_endpoints(self):
+        """Test the API routes, including a missing index"""
+        client = main.create_app({'TESTING': True}).test_client()
+        with mock.patch.object(main, 'get_gazetteer', return_value=self.gazetteer):
+            self.assertEqual(client.get('/geocode/search?q=sea').json[0]['name'], 'Seattle')
+            self.assertEqual(len(client.get('/geocode/search?q=ber&limit=-1').json), 1)
+            self.assertEqual(client.get('/geocode/reverse?lat=47.6&lon=-122.3').json['name'], 'Seattle')
+            self.assertEqual(client.get('/geocode/reverse?lat=0&lon=0').status_code, 404)
+        with mock.patch.object(main, 'get_gazetteer', side_effect=FileNotFoundError):
+            self.assertEqual(client.get('/geocode/search?q=sea').status_code, 503)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+"""
+Tests for the load test harness and the upstream stand-in
+"""
+
+import unittest
+import random
+import os
+import sys
+
+import requests
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from load_test import percentile, pick_request, recommend, TRAFFIC_MIX
+from upstream_standin import UpstreamStandIn
+
+
+class TestLoadTest(unittest.TestCase):
+    """Test cases for the load test helpers"""
+
+    def test_percentile(self):
+        """Test nearest-rank percentiles"""
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile(values, 100), 100)
+        self.assertEqual(percentile([], 99), 0.0)
+
+    def test_pick_request_covers_mix(self):
+        """Test that every route in the traffic mix gets picked"""
+        rng = random.Random(1)
+        paths = {pick_request(rng)[1].split('?')[0] for _ in range(500)}
+        self.assertEqual(paths, {template.split('?')[0] for _, _, template in TRAFFIC_MIX})
+
+    def test_recommend_respects_slo(self):
+        """Test that the recommendation ignores steps over the p99 objective"""
+        steps = [
+            {'concurrency': 1, 'rps': 20, 'p99_ms': 50, 'errors': 0},
+            {'concurrency': 16, 'rps': 70, 'p99_ms': 400, 'errors': 0},
+            {'concurrency': 64, 'rps': 75, 'p99_ms': 1200, 'errors': 0},
+        ]
+        self.assertEqual(recommend(steps, 500)['concurrency'], 16)
+        self.assertIsNone(recommend(steps, 10))
+
+
+class TestUpstreamStandIn(unittest.TestCase):
+    """Test cases for the fake Open-Meteo API"""
+
+    def test_forecast_shape(self):
+        """Test that the stand-in answers in the Open-Meteo response shape"""
+        with UpstreamStandIn(latency_ms=0) as standin:
+            response = requests.get(standin.url, params={
+                'latitude': 52.52,
+                'longitude': 13.41,
+                'current': ['temperature_2m', 'is_day'],
+                'hourly': ['temperature_2m', 'weather_code'],
+                'daily': ['sunrise', 'precipitation_sum'],
+                'forecast_days': 2,
+            }, timeout=5)
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertIn('temperature_2m', data['current'])
+        self.assertEqual(len(data['hourly']['time']), 48)
+        self.assertEqual(len(data['hourly']['weather_code']), 48)
+        self.assertEqual(len(data['daily']['sunrise']), 2)
+        self.assertEqual(standin.request_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
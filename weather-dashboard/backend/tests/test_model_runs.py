@@ -0,0 +1,126 @@
+"""
+Unit tests for model-run-aware cache freshness
+"""
+
+import unittest
+import os
+import sys
+import tempfile
+import time
+from unittest import mock
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import model_runs
+import weather_service
+from cache import SharedMemoryCache
+from model_runs import ModelRuns, stagger
+from openmeteo_client import OpenMeteoClient
+from upstream_standin import UpstreamStandIn
+
+HOUR = 3600
+SCHEDULES = {
+    'best_match': {'interval': HOUR, 'delay': 0},
+    'icon': {'interval': 3 * HOUR, 'delay': 2 * HOUR, 'meta': 'dwd_icon'},
+}
+
+
+class TestModelRuns(unittest.TestCase):
+    """Test cases for run tracking from schedules and metadata"""
+
+    def test_schedule_without_metadata(self):
+        """Test that runs follow the interval and availability delay"""
+        runs = ModelRuns(SCHEDULES)
+        # 00 UTC run of a model every 3 hours is out at 02:00, the 03 UTC run at 05:00
+        now = 4.5 * HOUR
+        self.assertEqual(runs.latest_run('icon', now), 2 * HOUR)
+        self.assertEqual(runs.next_update('icon', 2 * HOUR, now), 5 * HOUR)
+        # Data of an older run is superseded already
+        self.assertLessEqual(runs.next_update('icon', -HOUR, now), now)
+        self.assertEqual(runs.latest_run('unknown', now), 4 * HOUR)
+
+    def test_metadata_runs_and_late_runs(self):
+        """Test early and late runs reported by the metadata, and the poll limit"""
+        meta = {'last_run_availability_time': 2.2 * HOUR, 'update_interval_seconds': 3 * HOUR}
+        fetch = mock.Mock(side_effect=lambda dataset: dict(meta))
+        runs = ModelRuns(SCHEDULES, fetch, poll_interval=60, late_retry=300)
+
+        self.assertEqual(runs.latest_run('icon', 3 * HOUR), 2.2 * HOUR)
+        fetch.assert_called_once_with('dwd_icon')
+        self.assertEqual(runs.next_update('icon', 2.2 * HOUR, 3 * HOUR), 5.2 * HOUR)
+        self.assertEqual(fetch.call_count, 1)
+
+        # Overdue: the data stays fresh while the metadata is polled, at most once a minute
+        late = 5.5 * HOUR
+        self.assertEqual(runs.next_update('icon', 2.2 * HOUR, late), late + 300)
+        self.assertEqual(runs.next_update('icon', 2.2 * HOUR, late + 30), late + 330)
+        self.assertEqual(fetch.call_count, 2)
+
+        meta['last_run_availability_time'] = 5.6 * HOUR
+        self.assertEqual(runs.next_update('icon', 2.2 * HOUR, 5.7 * HOUR), 5.6 * HOUR)
+
+    def test_failing_metadata_falls_back_to_the_schedule(self):
+        """Test that unreachable metadata does not break freshness"""
+        runs = ModelRuns(SCHEDULES, mock.Mock(side_effect=OSError('down')))
+        self.assertEqual(runs.latest_run('icon', 4.5 * HOUR), 2 * HOUR)
+
+    def test_stagger_spreads_keys(self):
+        """Test that revalidation offsets are fixed per key and spread over the window"""
+        offsets = [stagger(f'hourly:{i}') for i in range(200)]
+        self.assertEqual(offsets[0], stagger('hourly:0'))
+        self.assertTrue(all(0 <= offset < model_runs.STAGGER_WINDOW for offset in offsets))
+        self.assertGreater(max(offsets) - min(offsets), model_runs.STAGGER_WINDOW * 0.8)
+
+
+class TestRunAwareCaching(unittest.TestCase):
+    """Test cases for cached forecasts against a stand-in that publishes runs"""
+
+    RUN_INTERVAL = 0.5
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache = SharedMemoryCache(os.path.join(self.temp_dir.name, 'cache'), slot_count=16, slot_size=64 * 1024)
+        self.standin = UpstreamStandIn(latency_ms=0, run_interval=self.RUN_INTERVAL).start()
+        client = OpenMeteoClient()
+        client.api_url = self.standin.url
+        client.meta_url = self.standin.meta_url
+        runs = ModelRuns({'best_match': {'interval': HOUR, 'delay': 0},
+                          'standin': {'interval': HOUR, 'delay': 0, 'meta': 'standin'}},
+                         client.get_model_meta, poll_interval=0)
+        self.patchers = [
+            mock.patch.object(weather_service, 'cache', self.cache),
+            mock.patch.object(weather_service, 'om', client),
+            mock.patch.object(weather_service, 'model_runs', runs),
+            mock.patch.object(weather_service, 'FORECAST_MODEL', 'standin'),
+            mock.patch.object(model_runs, 'STAGGER_WINDOW', 0),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+
+    def tearDown(self):
+        for patcher in self.patchers:
+            patcher.stop()
+        self.standin.stop()
+        self.cache.close()
+        self.temp_dir.cleanup()
+
+    def wait_for_next_run(self):
+        time.sleep(self.RUN_INTERVAL - time.time() % self.RUN_INTERVAL + 0.05)
+
+    def test_entries_expire_with_the_next_run(self):
+        """Test that a forecast is served from cache within a run and refetched right after the next"""
+        self.wait_for_next_run()
+        first = weather_service.get_hourly_forecast(52.52, 13.41, 6)
+        second = weather_service.get_hourly_forecast(52.52, 13.41, 6)
+        self.assertEqual(self.standin.request_count, 1)
+        self.assertEqual(second['temperature_2m'].tolist(), first['temperature_2m'].tolist())
+
+        self.wait_for_next_run()
+        third = weather_service.get_hourly_forecast(52.52, 13.41, 6)
+        self.assertEqual(self.standin.request_count, 2)
+        self.assertNotEqual(third['temperature_2m'].tolist(), first['temperature_2m'].tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+"""
+Unit tests for the sampling profiler and its admin endpoint
+"""
+
+import unittest
+import os
+import sys
+import threading
+import time
+from unittest import mock
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+from utils.profiler import ProfilerBusyError, SamplingProfiler, collapsed, speedscope
+
+
+def busy_handler(profiler, route, seconds):
+    """Spin like a slow request of `route`"""
+    profiler.enter(route)
+    try:
+        end = time.monotonic() + seconds
+        while time.monotonic() < end:
+            sum(range(1000))
+    finally:
+        profiler.leave()
+
+
+class TestSamplingProfiler(unittest.TestCase):
+    """Test cases for sampling and the output formats"""
+
+    def profile_busy_request(self, profiler, seconds=0.3):
+        # The request starts once the profile is running
+        worker = threading.Timer(0.05, busy_handler, [profiler, 'api.hourly_forecast', seconds])
+        worker.start()
+        counts = profiler.profile(seconds)
+        worker.join()
+        return counts
+
+    def test_stacks_are_counted_per_route(self):
+        """Test that only request threads are sampled, with their route and frames"""
+        profiler = SamplingProfiler(interval=0.005)
+        self.assertFalse(profiler.active)
+        profiler.enter('api.current_weather')
+        self.assertEqual(profiler._routes, {})
+
+        counts = self.profile_busy_request(profiler)
+        self.assertEqual(list(counts), ['api.hourly_forecast'])
+        stacks = counts['api.hourly_forecast']
+        self.assertTrue(any('busy_handler' in frame for stack in stacks for frame in stack))
+        self.assertFalse(profiler.active)
+
+        lines = collapsed(counts).splitlines()
+        self.assertTrue(lines[0].startswith('api.hourly_forecast;'))
+        self.assertEqual(sum(int(line.rsplit(' ', 1)[1]) for line in lines), sum(stacks.values()))
+
+        document = speedscope(counts, 0.005)
+        profile = document['profiles'][0]
+        self.assertEqual(profile['name'], 'api.hourly_forecast')
+        self.assertEqual(len(profile['samples']), len(profile['weights']))
+        self.assertTrue(all(index < len(document['shared']['frames']) for sample in profile['samples']
+                            for index in sample))
+
+    def test_overhead_is_bounded(self):
+        """Test that sampling backs off when reading stacks is slow"""
+        profiler = SamplingProfiler(interval=0.001, max_overhead=0.1)
+        with mock.patch.object(profiler, '_sample', side_effect=lambda: time.sleep(0.01)) as sample:
+            profiler.profile(0.3)
+        # 10 ms per sample at most 10% of the time: one sample per 100 ms
+        self.assertLessEqual(sample.call_count, 4)
+
+    def test_one_profile_at_a_time(self):
+        """Test that a second profile is refused while one is running and bounds are checked"""
+        profiler = SamplingProfiler()
+        thread = threading.Thread(target=profiler.profile, args=(0.2,))
+        thread.start()
+        time.sleep(0.05)
+        with self.assertRaises(ProfilerBusyError):
+            profiler.profile(0.1)
+        thread.join()
+        for seconds in (0, 3600):
+            with self.assertRaises(ValueError):
+                profiler.profile(seconds)
+
+
+class TestProfileEndpoint(unittest.TestCase):
+    """Test cases for /admin/profile"""
+
+    def setUp(self):
+        self.client = main.create_app({'TESTING': True}).test_client()
+
+    def test_off_without_a_token(self):
+        """Test that the endpoint does not exist unless ADMIN_TOKEN is set, and checks the token"""
+        with mock.patch.object(main, 'ADMIN_TOKEN', None):
+            self.assertEqual(self.client.post('/admin/profile?seconds=0.1').status_code, 404)
+        with mock.patch.object(main, 'ADMIN_TOKEN', 'secret'):
+            response = self.client.post('/admin/profile?seconds=0.1', headers={'X-Admin-Token': 'wrong'})
+            self.assertEqual(response.status_code, 403)
+        self.assertFalse(main.profiler.active)
+
+    def test_profiles_requests_per_route(self):
+        """Test collapsed and speedscope output while another thread handles a request"""
+        headers = {'X-Admin-Token': 'secret'}
+        with mock.patch.object(main, 'ADMIN_TOKEN', 'secret'):
+            worker = threading.Timer(0.05, busy_handler, [main.profiler, 'api.weather_codes', 0.2])
+            worker.start()
+            response = self.client.post('/admin/profile?seconds=0.3', headers=headers)
+            worker.join()
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.mimetype, 'text/plain')
+            self.assertIn('api.weather_codes;', response.get_data(as_text=True))
+            self.assertNotIn('admin_profile', response.get_data(as_text=True))
+
+            response = self.client.post('/admin/profile?seconds=0.1&format=speedscope', headers=headers)
+            self.assertEqual(response.json['$schema'], 'https://www.speedscope.app/file-format-schema.json')
+            for query in ('seconds=0', 'format=pprof'):
+                self.assertEqual(self.client.post(f'/admin/profile?{query}', headers=headers).status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+"""
+Unit tests for Server-Sent Events push of current weather
+"""
+
+import unittest
+import json
+import os
+import sys
+from unittest import mock
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+from push import LocationHub, diff
+
+
+class FakeWeather:
+    """Current weather per cell that tests can change, counting loads"""
+
+    def __init__(self):
+        self.data = {'temperature_2m': 20.0, 'weather_code': 1}
+        self.calls = []
+
+    def __call__(self, latitude, longitude):
+        self.calls.append((latitude, longitude))
+        return dict(self.data)
+
+
+def parse_event(chunk):
+    """(event, data) of an encoded Server-Sent Event"""
+    lines = dict(line.split(': ', 1) for line in chunk.strip().split('\n'))
+    return lines['event'], json.loads(lines['data'])
+
+
+class TestLocationHub(unittest.TestCase):
+    """Test cases for subscription fan-out"""
+
+    def setUp(self):
+        self.weather = FakeWeather()
+        self.hub = LocationHub(self.weather, interval=3600, max_subscribers=3)
+
+    def tearDown(self):
+        self.hub.stop()
+
+    def test_diff(self):
+        """Test changed, added and removed fields"""
+        self.assertEqual(diff({'a': 1, 'b': 2, 'c': 3}, {'a': 1, 'b': 5, 'd': 4}), {'b': 5, 'd': 4, 'c': None})
+        self.assertEqual(diff({'a': 1}, {'a': 1}), {})
+
+    def test_one_load_fans_out_to_every_subscriber_of_a_cell(self):
+        """Test that nearby subscribers share a cell and receive only changes"""
+        first = self.hub.subscribe(52.521, 13.409)
+        second = self.hub.subscribe(52.519, 13.411)
+        self.assertEqual(first.events.get_nowait(), ('snapshot', self.weather.data))
+        second.events.get_nowait()
+        self.assertEqual(self.weather.calls, [(52.52, 13.41)])
+
+        self.hub.refresh()
+        self.assertTrue(first.events.empty())
+
+        self.weather.data['temperature_2m'] = 21.5
+        self.hub.refresh()
+        self.assertEqual(len(self.weather.calls), 3)
+        for subscription in (first, second):
+            self.assertEqual(subscription.events.get_nowait(), ('update', {'temperature_2m': 21.5}))
+
+    def test_stream_ends_with_unsubscribe(self):
+        """Test keepalives, closing the stream and the subscriber limit"""
+        subscription = self.hub.subscribe(52.52, 13.41)
+        stream = self.hub.events(subscription, keepalive=0.01)
+        self.assertEqual(parse_event(next(stream))[0], 'snapshot')
+        self.assertEqual(next(stream), ': keepalive\n\n')
+        stream.close()
+        self.assertEqual(self.hub.subscriber_count(), 0)
+
+        for _ in range(3):
+            self.hub.subscribe(48.1, 9.3)
+        with self.assertRaises(OverflowError):
+            self.hub.subscribe(48.1, 9.3)
+
+
+class TestStreamEndpoint(unittest.TestCase):
+    """Test cases for /weather/stream"""
+
+    def setUp(self):
+        self.weather = FakeWeather()
+        self.hub = LocationHub(self.weather, interval=3600, max_subscribers=1)
+        self.patcher = mock.patch.object(main, 'location_hub', self.hub)
+        self.patcher.start()
+        self.client = main.create_app({'TESTING': True}).test_client()
+
+    def tearDown(self):
+        self.patcher.stop()
+        self.hub.stop()
+
+    def test_stream_starts_with_a_snapshot(self):
+        """Test the event stream response and the fallback when full"""
+        response = self.client.get('/weather/stream?lat=52.52&lon=13.41', buffered=False)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        event, data = parse_event(next(response.response).decode())
+        self.assertEqual((event, data), ('snapshot', self.weather.data))
+
+        full = self.client.get('/weather/stream?lat=52.52&lon=13.41')
+        self.assertEqual(full.status_code, 503)
+        response.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
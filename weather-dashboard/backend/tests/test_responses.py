@@ -0,0 +1,74 @@
+"""
+Unit tests for JSON encoding and precomputed payloads
+"""
+
+import unittest
+import json
+import os
+import sys
+from unittest import mock
+
+import numpy as np
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+import responses
+from openmeteo_client import format_hourly_forecast
+from responses import dumps_bytes
+
+
+class TestEncoding(unittest.TestCase):
+    """Test cases for dumps_bytes with and without orjson"""
+
+    VALUE = {'values': np.array([1.5, np.nan], dtype=np.float64), 'codes': np.full(2, 3), 'n': np.int64(4)}
+
+    def test_numpy_values_are_encoded(self):
+        """Test arrays, scalars and NaN as null"""
+        self.assertEqual(json.loads(dumps_bytes(self.VALUE)), {'values': [1.5, None], 'codes': [3, 3], 'n': 4})
+
+    def test_standard_library_fallback(self):
+        """Test the same output without orjson"""
+        with mock.patch.object(responses, 'orjson', None):
+            self.assertEqual(json.loads(dumps_bytes(self.VALUE)), {'values': [1.5, None], 'codes': [3, 3], 'n': 4})
+
+
+class TestHourlyFallbacks(unittest.TestCase):
+    """Test cases for the fallback columns of the hourly forecast"""
+
+    def test_fallback_columns_match_the_list_version(self):
+        """Test that array columns serialize like the lists they replace"""
+        response = {'hourly': {
+            'time': ['2024-01-01T00:00', '2024-01-01T12:00'],
+            'temperature_2m': [5.0, 25.0],
+            'relative_humidity_2m': [80],
+        }}
+        forecast = json.loads(dumps_bytes(format_hourly_forecast(response, 24)))
+        self.assertEqual(forecast['wind_speed_10m'], [5.0, 5.0])
+        self.assertEqual(forecast['wind_gusts_10m'], [6.5, 6.5])
+        self.assertEqual(forecast['precipitation'], [0, 0])
+        self.assertEqual(forecast['is_day'], [0, 1])
+        self.assertEqual(forecast['apparent_temperature'], [4.5, 27.5])
+
+
+class TestWeatherCodes(unittest.TestCase):
+    """Test cases for the precomputed /weather/codes payload"""
+
+    def setUp(self):
+        self.client = main.create_app({'TESTING': True}).test_client()
+
+    def test_codes_are_cacheable(self):
+        """Test the long cache lifetime and conditional requests"""
+        response = self.client.get('/weather/codes')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['95'], 'Thunderstorm')
+        self.assertIn('max-age=86400', response.headers['Cache-Control'])
+
+        cached = self.client.get('/weather/codes', headers={'If-None-Match': response.headers['ETag']})
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.data, b'')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+"""
+Unit tests for the solar position engine
+"""
+
+import unittest
+import os
+import sys
+
+import numpy as np
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import solar
+from forecast import Forecast
+from openmeteo_client import format_hourly_forecast
+from weather_frames import format_times
+
+
+def local_midnight(date, utc_offset):
+    """Unix seconds of a local midnight"""
+    return int(np.datetime64(date, 's').astype(np.int64)) - utc_offset
+
+
+class TestSolar(unittest.TestCase):
+    """Test cases against published sunrise and sunset times"""
+
+    def assertSunTimes(self, date, latitude, longitude, utc_offset, sunrise, sunset):
+        times = solar.sun_times(np.array([local_midnight(date, utc_offset)]), latitude, longitude)
+        for name, expected in (('sunrise', sunrise), ('sunset', sunset)):
+            actual = np.datetime64(format_times(times[name], utc_offset, 's')[0])
+            self.assertLessEqual(abs(actual - np.datetime64(expected)), np.timedelta64(90, 's'), name)
+
+    def test_sunrise_and_sunset(self):
+        """Test midsummer in Berlin, midwinter in New York and midsummer in Sydney"""
+        self.assertSunTimes('2024-06-21', 52.52, 13.405, 7200, '2024-06-21T04:43', '2024-06-21T21:33')
+        self.assertSunTimes('2024-01-01', 40.71, -74.006, -18000, '2024-01-01T07:20', '2024-01-01T16:39')
+        self.assertSunTimes('2024-12-21', -33.87, 151.21, 39600, '2024-12-21T05:41', '2024-12-21T20:05')
+
+    def test_polar_day_and_night(self):
+        """Test daylight in Tromsø at the solstices"""
+        starts = np.array([local_midnight('2024-12-21', 3600), local_midnight('2024-06-21', 7200)])
+        times = solar.sun_times(starts, 69.65, 18.96)
+        self.assertEqual(times['daylight_duration'].tolist(), [0, 86400])
+        self.assertEqual(times['sunrise'][0], times['sunset'][0])
+
+    def test_broadcast_over_times_and_locations(self):
+        """Test one pass over a day of hours at two locations, and elevation at the equinox"""
+        hours = local_midnight('2024-03-20', 0) + 3600 * np.arange(24)
+        day = solar.is_day(hours[:, None], np.array([52.52, -33.87]), np.array([13.41, 151.21]))
+        self.assertEqual(day.shape, (24, 2))
+        self.assertEqual(np.flatnonzero(day[:, 0]).tolist(), list(range(6, 18)))
+        self.assertEqual(day[0, 1], 1)
+        self.assertAlmostEqual(float(solar.sun_elevation(local_midnight('2024-03-20T12:07', 0), 0, 0)), 90, delta=0.5)
+
+    def test_hourly_forecast_uses_the_location(self):
+        """Test that is_day follows the sun where the upstream sends none"""
+        hours = local_midnight('2024-06-21', 0) + 3600 * np.arange(24)
+        hourly = Forecast(hours, {'temperature_2m': np.zeros(24)}, 0, {'latitude': 69.65, 'longitude': 18.96})
+        self.assertEqual(format_hourly_forecast(hourly, 24)['is_day'].tolist(), [1] * 24)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+Import-time budget for the backend
+
+Every worker boot and test process starts by importing main, so importing it
+must not set up logging, start threads, create files or start tracemalloc, and
+the import has to stay within IMPORT_BUDGET_MS as measured by -X importtime.
+"""
+
+import unittest
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# About 280 ms here (515 ms when main set up logging, psutil and tracemalloc on import); override on slow machines
+IMPORT_BUDGET_MS = float(os.getenv('IMPORT_BUDGET_MS', 400))
+# Only needed by specific requests, never on import
+LAZY_MODULES = ['pandas', 'psutil', 'pyarrow']
+
+PROBE = f"""
+import json, os, sys, threading, tracemalloc
+import main
+print(json.dumps({{
+    'threads': threading.active_count(),
+    'tracing': tracemalloc.is_tracing(),
+    'modules': [name for name in {LAZY_MODULES!r} if name in sys.modules],
+    'files': os.listdir('.'),
+}}))
+"""
+
+
+def import_main(workdir):
+    """Import main in a fresh interpreter; returns the probe result and the import time in ms"""
+    env = dict(
+        os.environ,
+        PYTHONPATH=os.pathsep.join(filter(None, [BACKEND_DIR, os.getenv('PYTHONPATH')])),
+        FAVORITES_FILE=os.path.join(workdir, 'data', 'favorites.json'),
+        WEATHER_CACHE_PATH=os.path.join(workdir, 'cache'),
+        OPEN_METEO_RATE_LIMIT_FILE=os.path.join(workdir, 'rate-limit'),
+    )
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', PROBE], cwd=workdir, env=env,
+                            capture_output=True, text=True, check=True)
+    # "import time: <self us> | <cumulative us> | <module>", nested imports are indented
+    cumulative = [int(line.split('|')[1]) for line in result.stderr.splitlines()
+                  if line.startswith('import time:') and line.split('|')[2].strip() == 'main']
+    return json.loads(result.stdout), cumulative[0] / 1000
+
+
+class TestStartup(unittest.TestCase):
+    """Test cases for the cost of importing the application"""
+
+    def test_import_has_no_side_effects(self):
+        """Test that importing main starts nothing and touches no files"""
+        with tempfile.TemporaryDirectory() as workdir:
+            probe, _ = import_main(workdir)
+        self.assertEqual(probe['threads'], 1)
+        self.assertFalse(probe['tracing'])
+        self.assertEqual(probe['modules'], [])
+        self.assertEqual(probe['files'], [])
+
+    def test_import_time_budget(self):
+        """Test that importing main stays within the budget, best of five runs"""
+        with tempfile.TemporaryDirectory() as workdir:
+            elapsed = min(import_main(workdir)[1] for _ in range(5))
+        self.assertLess(elapsed, IMPORT_BUDGET_MS,
+                        f"Importing main took {elapsed:.0f} ms; run python -X importtime -c 'import main' to see why")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+"""
+Unit tests for gridded map tiles
+"""
+
+import unittest
+import os
+import struct
+import sys
+import zlib
+
+import numpy as np
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+from tests.standin import StandInTestCase
+from tiles import GRID_SIZE, encode_png, tile_points
+
+
+def decode_png(data):
+    """Pixels of an 8-bit grayscale PNG written by encode_png"""
+    width, height = struct.unpack('>II', data[16:24])
+    length = struct.unpack('>I', data[33:37])[0]
+    raw = np.frombuffer(zlib.decompress(data[41:41 + length]), dtype=np.uint8)
+    return raw.reshape(height, width + 1)[:, 1:]
+
+
+class TestTileGrid(unittest.TestCase):
+    """Test cases for tile sampling and encoding"""
+
+    def test_tile_points_cover_the_tile(self):
+        """Test the grid of the world tile and of a zoomed-in tile"""
+        latitudes, longitudes = tile_points(0, 0, 0, 4)
+        self.assertEqual(latitudes.shape, (4, 4))
+        np.testing.assert_allclose(longitudes[0], [-135, -45, 45, 135])
+        self.assertGreater(latitudes[0, 0], latitudes[-1, 0])
+        self.assertAlmostEqual(latitudes[1, 0], -latitudes[2, 0])
+
+        latitudes, longitudes = tile_points(8, 137, 83)
+        self.assertTrue(((longitudes > 12.65) & (longitudes < 14.07)).all())
+        self.assertTrue(((latitudes > 52.48) & (latitudes < 53.33)).all())
+
+    def test_invalid_tiles(self):
+        """Test that missing tiles and zooms beyond MAX_ZOOM are refused"""
+        for z, x, y in ((1, 2, 0), (0, 0, -1), (9, 0, 0)):
+            with self.assertRaises(ValueError):
+                tile_points(z, x, y)
+
+    def test_png_encoding(self):
+        """Test the value scaling and the missing value pixel"""
+        grid = np.array([[-40.0, 5.0], [50.0, np.nan]], dtype=np.float32)
+        data = encode_png(grid, (-40.0, 50.0))
+        self.assertTrue(data.startswith(b'\x89PNG'))
+        np.testing.assert_array_equal(decode_png(data), [[1, 128], [255, 0]])
+
+
+class TestTileEndpoint(StandInTestCase):
+    """Test cases for /weather/tiles"""
+
+    def setUp(self):
+        super().setUp()
+        self.client = main.create_app({'TESTING': True}).test_client()
+
+    def test_tile_is_one_upstream_request_and_cached(self):
+        """Test that a tile batches all samples and is served from cache afterwards"""
+        for _ in range(2):
+            response = self.client.get('/weather/tiles/2/1/1?layer=temperature')
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.fetch.call_count, 1)
+        self.assertEqual(len(self.fetch.call_args[0][0]['latitude'].split(',')), GRID_SIZE ** 2)
+
+        grid = np.frombuffer(response.data, dtype='<f4').reshape(GRID_SIZE, GRID_SIZE)
+        self.assertEqual(response.headers['X-Grid-Size'], f'{GRID_SIZE}x{GRID_SIZE}')
+        # The stand-in gets colder away from the equator, which is the bottom edge of this tile
+        self.assertLess(grid[0, 0], grid[-1, 0])
+
+        png = self.client.get('/weather/tiles/2/1/1?layer=temperature&format=png')
+        self.assertEqual(png.mimetype, 'image/png')
+        self.assertEqual(self.fetch.call_count, 1)
+
+    def test_bad_requests(self):
+        """Test unknown layers, formats and tiles"""
+        for url in ('/weather/tiles/2/1/1?layer=snow', '/weather/tiles/2/1/1?format=gif', '/weather/tiles/2/4/1'):
+            self.assertEqual(self.client.get(url).status_code, 400)
+        self.fetch.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
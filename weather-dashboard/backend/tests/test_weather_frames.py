@@ -0,0 +1,85 @@
+"""
+Unit tests for lazy FlatBuffers decoding
+"""
+
+import unittest
+import os
+import sys
+import tempfile
+from unittest import mock
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openmeteo_sdk.Aggregation import Aggregation
+from openmeteo_sdk.Variable import Variable
+
+import weather_service
+from cache import NullCache, SharedMemoryCache, dumps
+from tests.standin import HOURLY, standin_frames
+from weather_frames import LazyWeatherResponse, decode_response, parse_variable
+
+
+class TestWeatherFrames(unittest.TestCase):
+    """Test cases for decoding raw upstream frames"""
+
+    def test_parse_variable(self):
+        """Test mapping of API variable names to FlatBuffers fields"""
+        self.assertEqual(parse_variable('temperature_2m'), (Variable.temperature, 2, Aggregation.none))
+        self.assertEqual(parse_variable('wind_direction_10m_dominant'),
+                         (Variable.wind_direction, 10, Aggregation.dominant))
+        self.assertEqual(parse_variable('precipitation_probability_max'),
+                         (Variable.precipitation_probability, 0, Aggregation.maximum))
+        self.assertEqual(parse_variable('precipitation_hours'), (Variable.precipitation_hours, 0, Aggregation.none))
+        with self.assertRaises(ValueError):
+            parse_variable('not_a_variable')
+
+    def test_only_requested_slice_is_materialized(self):
+        """Test that decoding honours the variable list and the hours slice"""
+        data = standin_frames(hourly=HOURLY)
+        response = decode_response(data, hourly=['temperature_2m', 'weather_code'], hours=6)
+
+        self.assertEqual(set(response['hourly']), {'time', 'temperature_2m', 'weather_code'})
+        self.assertEqual(len(response['hourly']['time']), 6)
+        self.assertTrue(response['hourly']['time'][0].endswith('T00:00'))
+        self.assertIsInstance(response['hourly']['weather_code'][0], int)
+        self.assertEqual(response['timezone'], 'GMT')
+
+    def test_daily_timestamps_and_missing_variables(self):
+        """Test sunrise decoding and that absent variables are skipped"""
+        data = standin_frames(daily=['sunrise', 'temperature_2m_max'])
+        daily = LazyWeatherResponse(data).series('daily', ['sunrise', 'temperature_2m_max', 'rain_sum'])
+
+        self.assertEqual(len(daily['time']), 2)
+        self.assertTrue(daily['sunrise'][0].endswith('T06:00'))
+        self.assertNotIn('rain_sum', daily)
+
+    def test_raw_frames_are_smaller_than_formatted_data(self):
+        """Test that caching the frames beats caching the formatted forecast"""
+        data = standin_frames(hourly=HOURLY)
+        with mock.patch.object(weather_service.om, 'get_weather_raw', return_value=data), \
+                tempfile.TemporaryDirectory() as temp_dir:
+            cache = SharedMemoryCache(os.path.join(temp_dir, 'cache'), slot_count=16, slot_size=64 * 1024)
+            with mock.patch.object(weather_service, 'cache', cache):
+                formatted = weather_service.get_hourly_forecast(52.52, 13.41, 48)
+            cache.close()
+
+        self.assertEqual(len(formatted['timestamps']), 48)
+        self.assertLess(len(data), len(dumps(formatted)))
+
+    def test_projected_forecast(self):
+        """Test that only requested fields are fetched and returned"""
+        data = standin_frames(hourly=['temperature_2m', 'relative_humidity_2m', 'wind_speed_10m'])
+        with mock.patch.object(weather_service.om, 'get_weather_raw', return_value=data) as fetch, \
+                mock.patch.object(weather_service, 'cache', NullCache()):
+            formatted = weather_service.get_hourly_forecast(52.52, 13.41, 24, ['feels_like_temperature'])
+
+        self.assertEqual(fetch.call_args.args[0]['hourly'],
+                         ['temperature_2m', 'wind_speed_10m', 'relative_humidity_2m'])
+        self.assertEqual(set(formatted), {'timestamps', 'feels_like_temperature', 'latitude', 'longitude',
+                                          'elevation', 'timezone'})
+        self.assertEqual(len(formatted['feels_like_temperature']), 24)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+"""
+Tiles - Gridded current weather for map tiles
+
+Map overlays are drawn from /weather/tiles/{z}/{x}/{y} instead of one point
+request per marker. Each Web Mercator tile is sampled on a GRID_SIZE x
+GRID_SIZE grid of cell centers, all of which go to the upstream in a single
+multi-coordinate request. The resulting value grid is cached per tile and
+update slot of the current conditions, so panning and other users hit
+prebuilt tiles, and is returned either as raw little-endian float32 values or
+as an 8-bit grayscale PNG scaled to the layer's value range.
+"""
+
+import math
+import struct
+import time
+import zlib
+
+import numpy as np
+from openmeteo_requests import decode_frames, to_numpy
+from openmeteo_sdk.WeatherApiResponse import WeatherApiResponse
+
+import weather_service
+
+# Samples per tile side; one upstream request carries GRID_SIZE ** 2 coordinates
+GRID_SIZE = 16
+# Below ~10 km per sample the forecast models have no more detail; higher zooms scale these tiles
+MAX_ZOOM = 8
+# Current conditions update every 15 minutes
+TILE_TTL = 900
+
+# Map layer -> (current variable, value range of the PNG encoding)
+TILE_LAYERS = {
+    'temperature': ('temperature_2m', (-40.0, 50.0)),
+    'precipitation': ('precipitation', (0.0, 50.0)),
+    'wind': ('wind_speed_10m', (0.0, 150.0)),
+    'clouds': ('cloud_cover', (0.0, 100.0)),
+}
+
+
+def tile_points(z, x, y, size=GRID_SIZE):
+    """
+    Latitudes and longitudes of the sample grid of a tile
+
+    Args:
+        z (int): Zoom level
+        x (int): Tile column
+        y (int): Tile row, 0 at the north edge
+        size (int): Samples per side
+
+    Returns:
+        tuple: (latitudes, longitudes) as (size, size) arrays, row 0 in the north
+
+    Raises:
+        ValueError: If the tile does not exist or the zoom is above MAX_ZOOM
+    """
+    tiles = 2 ** z
+    if not 0 <= z <= MAX_ZOOM or not 0 <= x < tiles or not 0 <= y < tiles:
+        raise ValueError(f"No tile {z}/{x}/{y}; zoom must be between 0 and {MAX_ZOOM}")
+    # Cell centers, evenly spaced in Web Mercator so that samples line up with pixels
+    steps = (np.arange(size) + 0.5) / size
+    longitudes = (x + steps) / tiles * 360.0 - 180.0
+    mercator = math.pi * (1 - 2 * (y + steps) / tiles)
+    latitudes = np.degrees(np.arctan(np.sinh(mercator)))
+    return np.meshgrid(latitudes, longitudes, indexing='ij')
+
+
+def fetch_grid(layer, latitudes, longitudes):
+    """Current values of a layer at many points, in one upstream request"""
+    variable = TILE_LAYERS[layer][0]
+    params = {
+        "latitude": ",".join(f"{v:.3f}" for v in latitudes.ravel()),
+        "longitude": ",".join(f"{v:.3f}" for v in longitudes.ravel()),
+        "current": [variable],
+    }
+    data = weather_service.om.get_weather_raw(params)
+    values = to_numpy(decode_frames(WeatherApiResponse, data), 'current').get(variable)
+    if values is None:
+        return np.full(latitudes.shape, np.nan, dtype=np.float32)
+    return values.astype(np.float32).reshape(latitudes.shape)
+
+
+def get_tile(layer, z, x, y):
+    """
+    Value grid of a map tile, from cache or one upstream request
+
+    Args:
+        layer (str): Key of TILE_LAYERS
+        z (int): Zoom level
+        x (int): Tile column
+        y (int): Tile row
+
+    Returns:
+        np.ndarray: (GRID_SIZE, GRID_SIZE) float32 values, NaN where missing, row 0 in the north
+
+    Raises:
+        ValueError: If the layer or tile is unknown
+    """
+    if layer not in TILE_LAYERS:
+        raise ValueError(f"Unknown map layer: {layer}")
+    latitudes, longitudes = tile_points(z, x, y)
+    key = f"tile:{layer}:{z}/{x}/{y}:{int(time.time()) // TILE_TTL}"
+    cached = weather_service.cache.get(key)
+    if cached is not None:
+        return np.frombuffer(cached, dtype='<f4').reshape(latitudes.shape)
+
+    grid = fetch_grid(layer, latitudes, longitudes)
+    weather_service.cache.set(key, grid.astype('<f4').tobytes(), TILE_TTL)
+    return grid
+
+
+def encode_png(grid, value_range):
+    """
+    Encode a value grid as an 8-bit grayscale PNG
+
+    Pixel 0 means missing; 1 to 255 map linearly onto value_range.
+
+    Args:
+        grid (np.ndarray): 2-D values
+        value_range (tuple): (lowest, highest) value
+
+    Returns:
+        bytes: PNG file
+    """
+    low, high = value_range
+    scaled = np.clip((grid - low) / (high - low), 0.0, 1.0) * 254 + 1
+    pixels = np.where(np.isnan(grid), 0, np.rint(np.nan_to_num(scaled))).astype(np.uint8)
+    height, width = pixels.shape
+    # Every scanline starts with filter type 0 (none)
+    raw = np.hstack([np.zeros((height, 1), dtype=np.uint8), pixels]).tobytes()
+
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 0, 0, 0, 0)
+    return b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) + chunk(b'IDAT', zlib.compress(raw)) + chunk(b'IEND', b'')
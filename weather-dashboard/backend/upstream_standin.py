@@ -0,0 +1,392 @@
+"""
+Upstream Stand-in - Local fake of the Open-Meteo forecast API
+
+Serves synthetic but well-formed Open-Meteo responses, as JSON or as
+FlatBuffers frames (format=flatbuffers), so the backend can be exercised
+(load tests, integration tests) without touching the real service. Point the
+backend at it with the OPEN_METEO_API_URL environment variable.
+
+With a `models` list it returns one frame per location and model, each
+model with its own slight bias and forecast horizon (MODEL_HORIZONS), so the
+ensemble endpoint sees members that differ and do not line up.
+
+With run_interval set it also simulates model runs: a new run is published
+every run_interval seconds, shifts the forecast temperatures, and is reported
+by /data/<model>/static/meta.json like the real run metadata
+(OPEN_METEO_META_URL).
+"""
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import flatbuffers
+import numpy as np
+from openmeteo_sdk.Model import Model
+
+from weather_frames import TIMESTAMP_VARIABLES, parse_variable
+
+
+# Forecast days of models that end before the requested forecast_days
+MODEL_HORIZONS = {'icon_seamless': 7}
+
+
+def _split_variables(query, name):
+    """Return the requested variable names for a section (comma separated or repeated)."""
+    variables = []
+    for value in query.get(name, []):
+        variables.extend(v for v in value.split(',') if v)
+    return variables
+
+
+def _split_numbers(query, name):
+    """Return a list of coordinates (comma separated or repeated)."""
+    return [float(v) for v in _split_variables(query, name)] or [0.0]
+
+
+def _synthetic_value(variable, index, latitude, run=0, member=0):
+    """Produce a plausible value for a variable at a given step of a model run; members of an ensemble differ"""
+    phase = math.sin(index / 24 * 2 * math.pi)
+    if variable.startswith('temperature') or variable.startswith('apparent_temperature'):
+        return round(15 - abs(latitude) / 6 + 6 * phase + run % 10 / 10 + member * 0.8, 1)
+    if variable.startswith('relative_humidity'):
+        return round(65 - 20 * phase)
+    if variable.startswith('precipitation_probability'):
+        return (index * 7) % 100
+    if variable in ('precipitation', 'rain', 'precipitation_sum', 'rain_sum'):
+        return round(max(0.0, (1.5 + member * 0.5) * math.sin(index / 5)), 1)
+    if variable.startswith('snowfall'):
+        return 0.0
+    if variable.startswith('weather_code'):
+        return (0, 1, 2, 3, 61, 80)[index % 6]
+    if variable.startswith('wind_speed') or variable.startswith('wind_gusts'):
+        return round(12 + 5 * phase + member * 1.5, 1)
+    if variable.startswith('wind_direction'):
+        return (index * 15) % 360
+    if variable == 'is_day':
+        return 1 if 6 <= index % 24 < 20 else 0
+    if variable.startswith('uv_index'):
+        return round(max(0.0, 5 * phase), 1)
+    if variable == 'surface_pressure':
+        return 1013.2
+    return round(phase, 2)
+
+
+def build_forecast_response(query, run=0, member=0):
+    """
+    Build a JSON forecast response for the given parsed query string
+
+    Args:
+        query (dict): Query parameters as returned by urllib.parse.parse_qs
+        run (int): Model run, later runs have slightly different temperatures
+        member (int): Position of the model in the models list, later models are biased upwards
+
+    Returns:
+        dict: Response body in the shape of the Open-Meteo forecast API
+    """
+    latitude = float(query.get('latitude', ['0'])[0])
+    longitude = float(query.get('longitude', ['0'])[0])
+    forecast_days = int(query.get('forecast_days', ['7'])[0])
+    model = (query.get('models') or [None])[0]
+    forecast_days = min(forecast_days, MODEL_HORIZONS.get(model, forecast_days))
+    past_days = int(query.get('past_days', ['0'])[0])
+    start = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0, tzinfo=None)
+    # Time series begin at midnight past_days before today
+    midnight = start.replace(hour=0) - timedelta(days=past_days)
+    days = past_days + forecast_days
+
+    response = {
+        'latitude': latitude,
+        'longitude': longitude,
+        'elevation': 38.0,
+        'generationtime_ms': 0.1,
+        'utc_offset_seconds': 0,
+        'timezone': 'GMT',
+        'timezone_abbreviation': 'GMT',
+    }
+    if model is not None:
+        response['model'] = model
+
+    current = _split_variables(query, 'current')
+    if current:
+        response['current'] = {'time': start.isoformat(timespec='minutes'), 'interval': 900}
+        for variable in current:
+            response['current'][variable] = _synthetic_value(variable, start.hour, latitude, run, member)
+
+    hourly = _split_variables(query, 'hourly')
+    if hourly:
+        steps = days * 24
+        response['hourly'] = {
+            'time': [(midnight + timedelta(hours=i)).isoformat(timespec='minutes') for i in range(steps)]
+        }
+        for variable in hourly:
+            response['hourly'][variable] = [_synthetic_value(variable, i, latitude, run, member) for i in range(steps)]
+
+    daily = _split_variables(query, 'daily')
+    if daily:
+        response['daily'] = {'time': [(midnight + timedelta(days=i)).date().isoformat() for i in range(days)]}
+        for variable in daily:
+            if variable in ('sunrise', 'sunset'):
+                hour = 6 if variable == 'sunrise' else 20
+                response['daily'][variable] = [
+                    (midnight + timedelta(days=i, hours=hour)).isoformat(timespec='minutes')
+                    for i in range(days)
+                ]
+            else:
+                response['daily'][variable] = [
+                    _synthetic_value(variable, i * 24 + 12, latitude, run, member) for i in range(days)
+                ]
+
+    return response
+
+
+def _epoch(local_iso, utc_offset):
+    """Local ISO date or date-time to unix seconds"""
+    local = datetime.fromisoformat(local_iso).replace(tzinfo=timezone.utc)
+    return int(local.timestamp()) - utc_offset
+
+
+def _encode_variable(builder, name, utc_offset, values=None, value=None):
+    variable, altitude, aggregation = parse_variable(name)
+    vector = int64_vector = None
+    if values is not None and variable in TIMESTAMP_VARIABLES:
+        int64_vector = builder.CreateNumpyVector(
+            np.array([_epoch(v, utc_offset) for v in values], dtype=np.int64)
+        )
+    elif values is not None:
+        vector = builder.CreateNumpyVector(
+            np.array([np.nan if v is None else v for v in values], dtype=np.float32)
+        )
+    builder.StartObject(13)
+    builder.PrependUint8Slot(0, variable, 0)
+    if value is not None:
+        builder.PrependFloat32Slot(2, value, 0.0)
+    if vector is not None:
+        builder.PrependUOffsetTRelativeSlot(3, vector, 0)
+    if int64_vector is not None:
+        builder.PrependUOffsetTRelativeSlot(4, int64_vector, 0)
+    builder.PrependInt16Slot(5, altitude, 0)
+    builder.PrependUint8Slot(6, aggregation, 0)
+    return builder.EndObject()
+
+
+def _encode_section(builder, section, interval, utc_offset, scalar):
+    names = [name for name in section if name not in ('time', 'interval')]
+    if scalar:
+        offsets = [_encode_variable(builder, name, utc_offset, value=section[name]) for name in names]
+        start = _epoch(section['time'], utc_offset)
+        end = start + interval
+    else:
+        offsets = [_encode_variable(builder, name, utc_offset, values=section[name]) for name in names]
+        start = _epoch(section['time'][0], utc_offset)
+        end = _epoch(section['time'][-1], utc_offset) + interval
+    builder.StartVector(4, len(offsets), 4)
+    for offset in reversed(offsets):
+        builder.PrependUOffsetTRelative(offset)
+    variables = builder.EndVector()
+    builder.StartObject(4)
+    builder.PrependInt64Slot(0, start, 0)
+    builder.PrependInt64Slot(1, end, 0)
+    builder.PrependInt32Slot(2, interval, 0)
+    builder.PrependUOffsetTRelativeSlot(3, variables, 0)
+    return builder.EndObject()
+
+
+def encode_flatbuffers(response):
+    """
+    Encode a JSON-shaped response as one length-prefixed FlatBuffers frame
+
+    Args:
+        response (dict): Response as produced by build_forecast_response
+
+    Returns:
+        bytes: Frame in the format the upstream uses for format=flatbuffers
+    """
+    builder = flatbuffers.Builder(4096)
+    utc_offset = response['utc_offset_seconds']
+    timezone_name = builder.CreateString(response['timezone'])
+    abbreviation = builder.CreateString(response['timezone_abbreviation'])
+    sections = {}
+    # Table slots of WeatherApiResponse.current/daily/hourly
+    for slot, name, interval in ((9, 'current', 900), (10, 'daily', 86400), (11, 'hourly', 3600)):
+        if name in response:
+            sections[slot] = _encode_section(builder, response[name], interval, utc_offset, name == 'current')
+
+    builder.StartObject(15)
+    builder.PrependFloat32Slot(0, response['latitude'], 0.0)
+    builder.PrependFloat32Slot(1, response['longitude'], 0.0)
+    builder.PrependFloat32Slot(2, response['elevation'], 0.0)
+    builder.PrependFloat32Slot(3, response['generationtime_ms'], 0.0)
+    if 'model' in response:
+        builder.PrependUint8Slot(5, getattr(Model, response['model'], Model.undefined), 0)
+    builder.PrependInt32Slot(6, utc_offset, 0)
+    builder.PrependUOffsetTRelativeSlot(7, timezone_name, 0)
+    builder.PrependUOffsetTRelativeSlot(8, abbreviation, 0)
+    for slot, offset in sections.items():
+        builder.PrependUOffsetTRelativeSlot(slot, offset, 0)
+    builder.Finish(builder.EndObject())
+    payload = bytes(builder.Output())
+    return len(payload).to_bytes(4, 'little') + payload
+
+
+def build_flatbuffers_response(query, run=0):
+    """
+    Build a FlatBuffers response with one frame per requested location and model
+
+    Args:
+        query (dict): Query parameters as returned by urllib.parse.parse_qs
+        run (int): Model run, see build_forecast_response
+
+    Returns:
+        bytes: Concatenated length-prefixed frames
+    """
+    frames = []
+    models = _split_variables(query, 'models') or [None]
+    for latitude, longitude in zip(_split_numbers(query, 'latitude'), _split_numbers(query, 'longitude')):
+        for member, model in enumerate(models):
+            location_query = dict(query, latitude=[str(latitude)], longitude=[str(longitude)],
+                                  models=[model] if model else [])
+            frames.append(encode_flatbuffers(build_forecast_response(location_query, run, member)))
+    return b''.join(frames)
+
+
+class UpstreamStandIn:
+    """
+    Threaded HTTP server that mimics the Open-Meteo forecast endpoint
+
+    Each response is delayed by a latency drawn from a log-normal distribution
+    around `latency_ms`, so slow upstream calls show up in backend percentiles
+    the same way they do in production.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency_ms=30.0, jitter=0.3, run_interval=None):
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.run_interval = run_interval
+        self.request_count = 0
+        self.meta_count = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        """Base forecast URL to use as OPEN_METEO_API_URL"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1/forecast"
+
+    @property
+    def meta_url(self):
+        """Run metadata URL template to use as OPEN_METEO_META_URL"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/data/{{model}}/static/meta.json"
+
+    def current_run(self):
+        """Number of the latest simulated model run, 0 without run_interval"""
+        return int(time.time() // self.run_interval) if self.run_interval else 0
+
+    def run_metadata(self):
+        """meta.json of the simulated model"""
+        interval = self.run_interval or 3600
+        available = self.current_run() * interval if self.run_interval else 0
+        return {
+            'last_run_initialisation_time': available,
+            'last_run_modification_time': available,
+            'last_run_availability_time': available,
+            'update_interval_seconds': interval,
+        }
+
+    def _make_handler(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                if parsed.path.startswith('/data/') and parsed.path.endswith('/static/meta.json'):
+                    with standin._lock:
+                        standin.meta_count += 1
+                    body = json.dumps(standin.run_metadata()).encode()
+                    content_type = 'application/json'
+                elif parsed.path != '/v1/forecast':
+                    self.send_error(404)
+                    return
+                else:
+                    with standin._lock:
+                        standin.request_count += 1
+                    standin._sleep()
+                    query = parse_qs(parsed.query)
+                    if query.get('format') == ['flatbuffers']:
+                        body = build_flatbuffers_response(query, standin.current_run())
+                        content_type = 'application/octet-stream'
+                    else:
+                        body = json.dumps(build_forecast_response(query, standin.current_run())).encode()
+                        content_type = 'application/json'
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def _sleep(self):
+        if self.latency_ms > 0:
+            delay = random.lognormvariate(math.log(self.latency_ms), self.jitter)
+            time.sleep(delay / 1000)
+
+    def serve_forever(self):
+        """Serve requests on the calling thread until interrupted"""
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.server_close()
+
+    def start(self):
+        """Start serving in a background thread"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the server and release the socket"""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    """Run the stand-in from the command line"""
+    parser = argparse.ArgumentParser(description='Local stand-in for the Open-Meteo forecast API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency-ms', type=float, default=30.0, help='Median simulated upstream latency')
+    parser.add_argument('--run-interval', type=float, help='Seconds between simulated model runs')
+    args = parser.parse_args()
+
+    standin = UpstreamStandIn(args.host, args.port, latency_ms=args.latency_ms, run_interval=args.run_interval)
+    print(f"Serving fake Open-Meteo API at {standin.url}", flush=True)
+    print(f"Run metadata at {standin.meta_url}", flush=True)
+    standin.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
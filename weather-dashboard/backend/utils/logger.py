@@ -1,8 +1,18 @@
+"""
+Logging and performance monitoring for the backend
+
+Nothing here has side effects on import: configure_logging() sets up the log
+files and start_memory_logging() starts tracemalloc and its thread. Both are
+called by main.create_app(), so tests and tools that only import modules do
+not pay for them.
+"""
+
 import logging
 import sys
+import threading
 import time
+import traceback
 import tracemalloc
-import psutil
 import os
 from datetime import datetime
 from functools import wraps
@@ -16,33 +26,49 @@ LOG_LEVEL = logging.DEBUG if os.getenv('FLASK_ENV') == 'development' else loggin
 LOG_FILE = 'logs/weather_dashboard.log'
 MAX_LOG_SIZE = 10 * 1024 * 1024  # 10MB
 BACKUP_COUNT = 5
-
-# Ensure logs directory exists
-os.makedirs('logs', exist_ok=True)
-
-# Configure the root logger
-logging.basicConfig(
-    level=LOG_LEVEL,
-    format=LOG_FORMAT,
-    handlers=[
-        RotatingFileHandler(
-            LOG_FILE,
-            maxBytes=MAX_LOG_SIZE,
-            backupCount=BACKUP_COUNT
-        ),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+MEMORY_LOG_INTERVAL = 300
 
 logger = logging.getLogger('weather_dashboard')
 
-# Start memory tracking
-tracemalloc.start()
+_logging_configured = False
+_memory_logging_started = False
+
+def configure_logging():
+    """Send log records to the rotating log file and stdout; repeated calls do nothing"""
+    global _logging_configured
+    if _logging_configured:
+        return
+    _logging_configured = True
+
+    # Ensure logs directory exists
+    os.makedirs(os.path.dirname(LOG_FILE), exist_ok=True)
+
+    # Configure the root logger
+    logging.basicConfig(
+        level=LOG_LEVEL,
+        format=LOG_FORMAT,
+        handlers=[
+            RotatingFileHandler(
+                LOG_FILE,
+                maxBytes=MAX_LOG_SIZE,
+                backupCount=BACKUP_COUNT
+            ),
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
 
 class PerformanceMonitor:
     def __init__(self):
         self.metrics: Dict[str, Dict[str, float]] = {}
-        self.process = psutil.Process()
+        self._process = None
+
+    @property
+    def process(self):
+        """This process for CPU and RSS readings; psutil is imported on first use"""
+        if self._process is None:
+            import psutil
+            self._process = psutil.Process()
+        return self._process
 
     def start_metric(self, name: str) -> float:
         """Start timing a metric"""
@@ -152,12 +178,17 @@ def setup_error_logging(app):
         return {'error': str(e)}, 500
 
 def start_memory_logging():
-    """Start periodic memory usage logging"""
+    """Start memory tracking and log its usage every MEMORY_LOG_INTERVAL seconds; repeated calls do nothing"""
+    global _memory_logging_started
+    if _memory_logging_started:
+        return
+    _memory_logging_started = True
+    tracemalloc.start()
+
     def log_memory():
-        performance_monitor.log_memory_usage()
-        # Schedule next log in 5 minutes
-        time.sleep(300)
+        while True:
+            performance_monitor.log_memory_usage()
+            time.sleep(MEMORY_LOG_INTERVAL)
 
-    import threading
-    thread = threading.Thread(target=log_memory, daemon=True)
-    thread.start()
\ No newline at end of file
+    thread = threading.Thread(target=log_memory, name='memory-logging', daemon=True)
+    thread.start()
@@ -0,0 +1,200 @@
+"""
+Sampling profiler for requests in production
+
+PerformanceMonitor only keeps averages, and external profilers cannot be
+attached inside the containers. SamplingProfiler is switched on for a few
+seconds at a time: a background thread reads the stacks of the threads that
+are handling a request (sys._current_frames) at a fixed interval and counts
+them per route. Nothing is sampled or recorded while it is off, and a
+request costs one attribute check then.
+
+Sampling backs off when reading stacks takes more than max_overhead of the
+time, so a busy worker with deep stacks is not slowed down by the profiler.
+
+Results are collapsed stacks (one `route;outer;...;inner count` line per
+stack, for flamegraph.pl and most flamegraph viewers) or a speedscope file
+with one profile per route (https://www.speedscope.app).
+"""
+
+import collections
+import os
+import sys
+import threading
+import time
+
+# Seconds between samples
+SAMPLE_INTERVAL = float(os.getenv('PROFILER_INTERVAL', 0.01))
+# Longest profile in seconds
+MAX_DURATION = 60
+# Largest share of wall time spent reading stacks
+MAX_OVERHEAD = 0.02
+# Innermost frames kept per stack
+MAX_DEPTH = 128
+
+
+class ProfilerBusyError(RuntimeError):
+    """A profile is already being recorded"""
+
+
+def _frame_name(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Thread-based stack sampler, with stacks counted per route"""
+
+    def __init__(self, interval=SAMPLE_INTERVAL, max_overhead=MAX_OVERHEAD, max_depth=MAX_DEPTH):
+        """
+        Args:
+            interval (float): Seconds between samples
+            max_overhead (float): Largest share of the time spent sampling, e.g. 0.02
+            max_depth (int): Innermost frames kept per stack
+        """
+        self.interval = interval
+        self.max_overhead = max_overhead
+        self.max_depth = max_depth
+        self.active = False
+        self._lock = threading.Lock()
+        # Thread id -> route of the request it is handling, only filled while active
+        self._routes = {}
+        self._counts = collections.defaultdict(collections.Counter)
+        self._names = {}
+        self._samples = 0
+        self._duration = 0.0
+
+    def enter(self, route):
+        """Mark the calling thread as handling a request of `route`"""
+        if self.active:
+            self._routes[threading.get_ident()] = route
+
+    def leave(self):
+        """The calling thread is done with its request"""
+        if self._routes:
+            self._routes.pop(threading.get_ident(), None)
+
+    def _stack(self, frame):
+        """Frame names from the outermost to the innermost frame"""
+        names = []
+        while frame is not None and len(names) < self.max_depth:
+            code = frame.f_code
+            name = self._names.get(code)
+            if name is None:
+                name = self._names[code] = _frame_name(code)
+            names.append(name)
+            frame = frame.f_back
+        names.reverse()
+        return tuple(names)
+
+    def _sample(self):
+        frames = sys._current_frames()
+        for ident, route in list(self._routes.items()):
+            frame = frames.get(ident)
+            if frame is not None:
+                self._counts[route][self._stack(frame)] += 1
+        self._samples += 1
+
+    def profile(self, seconds):
+        """
+        Sample the request threads for `seconds`, blocking the caller
+
+        Args:
+            seconds (float): Duration, at most MAX_DURATION
+
+        Returns:
+            dict: Route -> Counter of stacks (tuples of frame names, outermost first)
+
+        Raises:
+            ProfilerBusyError: If another profile is being recorded
+            ValueError: If seconds is out of range
+        """
+        if not 0 < seconds <= MAX_DURATION:
+            raise ValueError(f"seconds must be between 0 and {MAX_DURATION}")
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusyError("A profile is already being recorded")
+        try:
+            self._counts = collections.defaultdict(collections.Counter)
+            self._samples = 0
+            self.active = True
+            start = time.monotonic()
+            end = start + seconds
+            while True:
+                now = time.monotonic()
+                if now >= end:
+                    break
+                self._sample()
+                spent = time.monotonic() - now
+                # Wait at least long enough for the time spent sampling to stay below max_overhead
+                time.sleep(min(max(self.interval, spent / self.max_overhead - spent), max(end - now, 0)))
+            self._duration = time.monotonic() - start
+            return dict(self._counts)
+        finally:
+            self.active = False
+            self._routes.clear()
+            self._lock.release()
+
+    def stats(self):
+        """Samples taken and duration of the last profile"""
+        return {'samples': self._samples, 'duration': self._duration, 'active': self.active}
+
+
+def collapsed(counts):
+    """
+    Collapsed stacks of a profile, the input format of flamegraph tools
+
+    Args:
+        counts (dict): Route -> Counter of stacks, as returned by SamplingProfiler.profile
+
+    Returns:
+        str: One `route;frame;...;frame count` line per stack, most frequent first
+    """
+    lines = []
+    for route, stacks in sorted(counts.items()):
+        for stack, count in stacks.most_common():
+            lines.append(f"{';'.join((route,) + stack)} {count}")
+    return '\n'.join(lines) + '\n' if lines else ''
+
+
+def speedscope(counts, interval, name='weather-dashboard'):
+    """
+    A profile in the speedscope file format, with one sampled profile per route
+
+    Args:
+        counts (dict): Route -> Counter of stacks, as returned by SamplingProfiler.profile
+        interval (float): Seconds between samples, the weight of one sample
+        name (str): Name of the profile
+
+    Returns:
+        dict: speedscope JSON document
+    """
+    frames = []
+    indexes = {}
+    profiles = []
+    for route, stacks in sorted(counts.items()):
+        samples = []
+        weights = []
+        for stack, count in stacks.most_common():
+            sample = []
+            for frame in stack:
+                if frame not in indexes:
+                    indexes[frame] = len(frames)
+                    frames.append({'name': frame})
+                sample.append(indexes[frame])
+            samples.append(sample)
+            weights.append(count * interval)
+        profiles.append({
+            'type': 'sampled',
+            'name': route,
+            'unit': 'seconds',
+            'startValue': 0,
+            'endValue': sum(weights),
+            'samples': samples,
+            'weights': weights,
+        })
+    return {
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'name': name,
+        'exporter': name,
+        'activeProfileIndex': 0,
+        'shared': {'frames': frames},
+        'profiles': profiles,
+    }
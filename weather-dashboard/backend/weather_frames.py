@@ -0,0 +1,259 @@
+"""
+Weather Frames - Lazy decoding of Open-Meteo FlatBuffers responses
+
+The upstream answers `format=flatbuffers` requests with length-prefixed
+FlatBuffers frames. They are several times smaller than the same data as
+Python lists, so the service caches the raw bytes and decodes them on every
+access. Only the variables and the time slice a request needs are turned into
+Python values; everything else is never touched.
+"""
+
+import functools
+import math
+
+import numpy as np
+from openmeteo_sdk.Aggregation import Aggregation
+from openmeteo_sdk.Variable import Variable
+from openmeteo_sdk.WeatherApiResponse import WeatherApiResponse
+
+AGGREGATION_SUFFIXES = {
+    'max': Aggregation.maximum,
+    'min': Aggregation.minimum,
+    'mean': Aggregation.mean,
+    'sum': Aggregation.sum,
+    'dominant': Aggregation.dominant,
+}
+
+# Sent as integers by the JSON API, so they are rounded to match
+INTEGER_VARIABLES = {
+    Variable.weather_code,
+    Variable.is_day,
+    Variable.relative_humidity,
+    Variable.precipitation_probability,
+    Variable.wind_direction,
+}
+
+# Values are unix timestamps (ValuesInt64) rather than floats
+TIMESTAMP_VARIABLES = {Variable.sunrise, Variable.sunset}
+
+SECTIONS = {
+    'current': WeatherApiResponse.Current,
+    'hourly': WeatherApiResponse.Hourly,
+    'daily': WeatherApiResponse.Daily,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def parse_variable(name):
+    """
+    Map an API variable name to its FlatBuffers description
+
+    Args:
+        name (str): Variable name as used in request parameters, e.g. 'temperature_2m_max'
+
+    Returns:
+        tuple: (Variable, altitude, Aggregation), e.g. (Variable.temperature, 2, Aggregation.maximum)
+    """
+    base, aggregation = name, Aggregation.none
+    head, _, tail = name.rpartition('_')
+    if head and tail in AGGREGATION_SUFFIXES:
+        base, aggregation = head, AGGREGATION_SUFFIXES[tail]
+
+    altitude = 0
+    head, _, tail = base.rpartition('_')
+    if head and tail.endswith('m') and tail[:-1].isdigit():
+        base, altitude = head, int(tail[:-1])
+
+    variable = getattr(Variable, base, None)
+    if not isinstance(variable, int):
+        raise ValueError(f"Unknown weather variable: {name}")
+    return variable, altitude, aggregation
+
+
+def values_to_list(variable, values):
+    """Convert a float32 array to JSON-ready Python values, NaN becoming None"""
+    values = values.astype(np.float64)
+    if variable in INTEGER_VARIABLES:
+        return [None if math.isnan(v) else int(v) for v in np.rint(values).tolist()]
+    result = np.round(values, 2).tolist()
+    if np.isnan(values).any():
+        result = [None if math.isnan(v) else v for v in result]
+    return result
+
+
+def format_times(timestamps, utc_offset, unit):
+    """Unix timestamps to local ISO strings ('m' for date and time, 'D' for dates)"""
+    local = (np.asarray(timestamps, dtype=np.int64) + utc_offset).astype('datetime64[s]')
+    return np.datetime_as_string(local, unit=unit).tolist()
+
+
+class LazyWeatherResponse:
+    """A single-location FlatBuffers response, decoded on access"""
+
+    def __init__(self, data, offset=0):
+        """
+        Args:
+            data (bytes): Length-prefixed frames as returned by the upstream
+            offset (int): Position of the frame's length prefix in data
+        """
+        self.data = data
+        self.response = WeatherApiResponse.GetRootAs(data, offset + 4)
+        self.utc_offset = self.response.UtcOffsetSeconds()
+        self._indexes = {}
+
+    def _section(self, name):
+        return SECTIONS[name](self.response)
+
+    def _index(self, name):
+        """Variable lookup for a section, built once per response"""
+        if name not in self._indexes:
+            index = {}
+            section = self._section(name)
+            for i in range(section.VariablesLength() if section is not None else 0):
+                variable = section.Variables(i)
+                key = (variable.Variable(), variable.Altitude(), variable.Aggregation())
+                index[key] = variable
+                # Also reachable without aggregation, for variables the upstream aggregates implicitly
+                index.setdefault(key[:2], variable)
+            self._indexes[name] = index
+        return self._indexes[name]
+
+    def variable(self, section, name):
+        """
+        Find a variable in a section
+
+        Args:
+            section (str): 'current', 'hourly' or 'daily'
+            name (str): Variable name, e.g. 'temperature_2m'
+
+        Returns:
+            VariableWithValues: The variable, or None if the response does not contain it
+        """
+        variable, altitude, aggregation = parse_variable(name)
+        index = self._index(section)
+        found = index.get((variable, altitude, aggregation))
+        if found is None and aggregation == Aggregation.none:
+            found = index.get((variable, altitude))
+        return found
+
+    def metadata(self):
+        """Location fields shared by every response shape"""
+        response = self.response
+        timezone = response.Timezone()
+        return {
+            'latitude': round(response.Latitude(), 4),
+            'longitude': round(response.Longitude(), 4),
+            'elevation': round(response.Elevation(), 1),
+            'timezone': timezone.decode() if timezone else None,
+            'utc_offset_seconds': self.utc_offset,
+        }
+
+    def current(self, variables):
+        """
+        Materialize current conditions
+
+        Args:
+            variables (list): Variable names to include
+
+        Returns:
+            dict: 'time' plus one value per variable found
+        """
+        section = self._section('current')
+        if section is None:
+            return {}
+        result = {'time': format_times([section.Time()], self.utc_offset, 'm')[0]}
+        for name in variables:
+            variable = self.variable('current', name)
+            if variable is not None:
+                result[name] = values_to_list(variable.Variable(), np.array([variable.Value()], dtype=np.float32))[0]
+        return result
+
+    def time_axis(self, section_name):
+        """
+        Time axis of a time series section
+
+        Args:
+            section_name (str): 'hourly' or 'daily'
+
+        Returns:
+            tuple: (first time, end time, interval) in unix seconds, None without the section
+        """
+        section = self._section(section_name)
+        if section is None:
+            return None
+        return section.Time(), section.TimeEnd(), section.Interval()
+
+    def arrays(self, section_name, variables):
+        """
+        Raw arrays of a time series section, for vectorized processing
+
+        Args:
+            section_name (str): 'hourly' or 'daily'
+            variables (list): Variable names to include
+
+        Returns:
+            dict: 'time' (unix seconds, int64) plus one float32 array per variable found
+        """
+        section = self._section(section_name)
+        if section is None:
+            return {}
+        result = {'time': np.arange(section.Time(), section.TimeEnd(), section.Interval(), dtype=np.int64)}
+        for name in variables:
+            variable = self.variable(section_name, name)
+            if variable is not None:
+                result[name] = variable.ValuesAsNumpy()
+        return result
+
+    def series(self, section_name, variables, start=0, stop=None):
+        """
+        Materialize a slice of a time series section
+
+        Args:
+            section_name (str): 'hourly' or 'daily'
+            variables (list): Variable names to include
+            start (int): First time step
+            stop (int): End of the slice (exclusive), None for all
+
+        Returns:
+            dict: 'time' plus one list per variable found
+        """
+        section = self._section(section_name)
+        if section is None:
+            return {}
+        times = np.arange(section.Time(), section.TimeEnd(), section.Interval(), dtype=np.int64)[start:stop]
+        result = {'time': format_times(times, self.utc_offset, 'm' if section.Interval() < 86400 else 'D')}
+        for name in variables:
+            variable = self.variable(section_name, name)
+            if variable is None:
+                continue
+            if variable.Variable() in TIMESTAMP_VARIABLES:
+                result[name] = format_times(variable.ValuesInt64AsNumpy()[start:stop], self.utc_offset, 'm')
+            else:
+                result[name] = values_to_list(variable.Variable(), variable.ValuesAsNumpy()[start:stop])
+        return result
+
+
+def decode_response(data, current=(), hourly=(), daily=(), hours=None, days=None):
+    """
+    Decode the requested parts of a raw response into the JSON API shape
+
+    Args:
+        data (bytes): Raw FlatBuffers frames
+        current (list): Current variables to include
+        hourly (list): Hourly variables to include
+        daily (list): Daily variables to include
+        hours (int): Number of hourly steps to include, None for all
+        days (int): Number of daily steps to include, None for all
+
+    Returns:
+        dict: Response in the shape of the Open-Meteo JSON API
+    """
+    response = LazyWeatherResponse(data)
+    result = response.metadata()
+    if current:
+        result['current'] = response.current(current)
+    if hourly:
+        result['hourly'] = response.series('hourly', hourly, 0, hours)
+    if daily:
+        result['daily'] = response.series('daily', daily, 0, days)
+    return result
@@ -3,19 +3,355 @@ Weather Service - Open-Meteo API Client Integration
 
 This module handles weather data fetching using the Open-Meteo API.
 It uses a basic implementation for stability and maintainability.
+
+It is the framework-agnostic weather core: fetching, caching, batching and
+formatting happen here and in the modules it imports, and nothing depends on
+an HTTP framework. The Flask app (main.py) and the FastAPI backend in the
+repository's backend/ directory are thin adapters over these functions, so on
+one host both share the cache (and, with OPEN_METEO_RATE_LIMIT_FILE, the
+upstream rate limit) instead of fetching the same data twice.
 """
 
+import hashlib
+import json
 import logging
+import os
+import time
 from datetime import datetime, timezone
 import traceback
 import math
+import re
+
+import numpy as np
+import requests
+from openmeteo_requests import CircuitOpenError, RateLimitError
 
 # Import our basic client implementation
 from openmeteo_client import OpenMeteoClient, format_current_weather, format_hourly_forecast
-
-# Initialize the client
+from cache import LazyCache, SnapshotThread, dumps, loads, restore_snapshot
+from weather_frames import LazyWeatherResponse, decode_response
+from forecast import LOCATION_FIELDS, Forecast
+from aggregation import DAILY_AGGREGATES, aggregate_arrays, local_days, source_variables
+from model_runs import ModelRuns, stagger
+import alerts
+import solar
+
+# Initialize the client; it sets up its connection and rate limiter on the first request
 om = OpenMeteoClient()
-logging.info("Using basic OpenMeteo client implementation")
+
+# Shared by all workers on the host (see cache/__init__.py for configuration), opened on first use
+cache = LazyCache()
+
+# Seconds a cached response is served before it is fetched again
+# Archive days only change while the reanalysis catches up with the last few days
+CACHE_TTL = {'current': 600, 'archive': 6 * 3600}
+# Kinds that are fresh until the forecast model publishes its next run instead (see model_runs.py)
+MODEL_RUN_KINDS = {'hourly', 'ensemble'}
+# Model whose runs the hourly data follows; anything but best_match is requested explicitly
+FORECAST_MODEL = os.getenv('WEATHER_FORECAST_MODEL', 'best_match')
+# Latest and next expected run of each model, polled from the upstream's run metadata
+model_runs = ModelRuns(fetch_meta=lambda dataset: om.get_model_meta(dataset))
+# Expired entries are kept this much longer and served while the upstream is unavailable
+STALE_TTL = 6 * 3600
+# Snapshot file for warm restarts (see cache/snapshot.py); snapshots are off when unset
+CACHE_SNAPSHOT = os.getenv('WEATHER_CACHE_SNAPSHOT')
+CACHE_SNAPSHOT_INTERVAL = float(os.getenv('WEATHER_CACHE_SNAPSHOT_INTERVAL', 300))
+CACHE_SNAPSHOT_ENTRIES = int(os.getenv('WEATHER_CACHE_SNAPSHOT_ENTRIES', 0)) or None
+# Coordinates are rounded for cache keys; 0.01° (~1 km) is finer than any forecast model grid
+COORDINATE_PRECISION = 2
+
+# Upstream variables requested when a client does not ask for specific fields
+CURRENT_VARIABLES = ["temperature_2m", "relative_humidity_2m", "precipitation", "weather_code",
+                     "wind_speed_10m", "wind_direction_10m", "is_day"]
+HOURLY_VARIABLES = ["temperature_2m", "precipitation_probability", "precipitation",
+                    "weather_code", "wind_speed_10m", "wind_direction_10m", "is_day",
+                    "relative_humidity_2m"]
+DAILY_VARIABLES = [
+    "temperature_2m_max", "temperature_2m_min",
+    "apparent_temperature_max", "apparent_temperature_min",
+    "sunrise", "sunset", "uv_index_max", "precipitation_sum",
+    "rain_sum", "snowfall_sum", "precipitation_probability_max",
+    "weather_code", "wind_speed_10m_max", "wind_direction_10m_dominant"
+]
+
+# Daily variables of the historical weather archive
+HISTORICAL_VARIABLES = [
+    "temperature_2m_max", "temperature_2m_min", "temperature_2m_mean",
+    "precipitation_sum", "rain_sum", "snowfall_sum",
+    "precipitation_hours", "weather_code"
+]
+
+# Daily values that cannot be aggregated from hourly data; they are computed from the sun's position (solar.py)
+SUN_VARIABLES = ["sunrise", "sunset", "daylight_duration"]
+DAILY_FIELDS = list(DAILY_AGGREGATES) + SUN_VARIABLES
+# Hourly data of a location is always fetched for the longest horizon, plus a few
+# past days, so every window of the hourly and the daily endpoint is a slice of
+# one cache entry
+FORECAST_DAYS = int(os.getenv('WEATHER_FORECAST_DAYS', 16))
+PAST_DAYS = int(os.getenv('WEATHER_PAST_DAYS', 2))
+
+# Hourly fields computed by the backend, with the upstream variables they are computed from
+HOURLY_DERIVED_FIELDS = {
+    "apparent_temperature": ["temperature_2m", "relative_humidity_2m", "wind_speed_10m"],
+    "feels_like_temperature": ["temperature_2m", "relative_humidity_2m", "wind_speed_10m"],
+    "wind_gusts_10m": ["wind_speed_10m"],
+}
+
+def resolve_fields(fields, variables, derived=None):
+    """
+    Work out which upstream variables a set of requested fields needs
+
+    Args:
+        fields (list): Requested output fields, None for all
+        variables (list): Upstream variables the endpoint supports
+        derived (dict): Fields computed from other variables, with their inputs
+
+    Returns:
+        list: Upstream variables to request, in the order of variables
+
+    Raises:
+        ValueError: If a field is not supported by the endpoint
+    """
+    if fields is None:
+        return list(variables)
+    derived = derived or {}
+    unknown = [field for field in fields if field not in variables and field not in derived]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    needed = set(fields)
+    for field in fields:
+        needed.update(derived.get(field, ()))
+    return [variable for variable in variables if variable in needed]
+
+def hourly_params(latitude, longitude, variables):
+    """
+    Upstream parameters for hourly data, shared by the hourly and daily forecasts
+
+    Args:
+        latitude (float): The latitude of the location
+        longitude (float): The longitude of the location
+        variables (list): Hourly variables
+
+    Returns:
+        dict: Parameters for the API request, for FORECAST_DAYS ahead and PAST_DAYS back
+    """
+    params = {
+        "latitude": latitude,
+        "longitude": longitude,
+        "hourly": variables,
+        "forecast_days": FORECAST_DAYS,
+        "past_days": PAST_DAYS,
+        "timezone": "auto"
+    }
+    if FORECAST_MODEL != 'best_match':
+        params["models"] = FORECAST_MODEL
+    return params
+
+def resolve_window(axis, utc_offset, start=None, end=None, length=24, step=3600, now=None):
+    """
+    Index range of a window on a regular time axis
+
+    Window bounds are offsets in steps from the start of today (local
+    midnight), e.g. hours 12 to 36 or -6 for six hours ago, local ISO
+    dates and times, or 'now' for the current hour (or day). They are
+    turned into indexes by arithmetic on the first time and interval of
+    the axis, without searching it.
+
+    Args:
+        axis (tuple): (first time, end time, interval) of the axis in unix seconds
+        utc_offset (int): Offset of the location's timezone in seconds
+        start: First step, offset, ISO string or 'now'; the start of today by default
+        end: End of the window (exclusive), offset, ISO string or 'now'; start + length steps by default
+        length (int): Steps in the window when end is not given
+        step (int): Seconds per offset, 3600 for hours or 86400 for days
+        now (float): Current time, time.time() by default
+
+    Returns:
+        tuple: (first index, stop index) on the axis
+
+    Raises:
+        ValueError: If a bound is malformed or the window is empty or outside the axis
+    """
+    now = time.time() if now is None else now
+    midnight = int((now + utc_offset) // 86400 * 86400 - utc_offset)
+
+    def bound(value):
+        if value == 'now':
+            return midnight + int(now - midnight) // step * step
+        if isinstance(value, int) or re.fullmatch(r'-?\d+', value):
+            return midnight + int(value) * step
+        try:
+            return int(np.datetime64(value, 's').astype(np.int64)) - utc_offset
+        except ValueError:
+            raise ValueError(f"Invalid window bound: {value}") from None
+
+    first = midnight if start is None else bound(start)
+    last = first + length * step if end is None else bound(end)
+    if last <= first:
+        raise ValueError("The window must end after it starts")
+
+    axis_start, axis_end, interval = axis
+    count = (axis_end - axis_start) // interval
+    begin = max(0, (first - axis_start) // interval)
+    stop = min(count, -(-(last - axis_start) // interval))
+    if begin >= stop:
+        raise ValueError("The window is outside the available forecast range")
+    return begin, stop
+
+def cache_key(kind, params, section=None):
+    """
+    Build the cache key for an upstream request
+
+    The variable list (params[section]) is not part of the key: one entry per
+    location holds every variable fetched so far, so a request for a subset is
+    served from it.
+
+    Args:
+        kind (str): Response kind, e.g. 'current' or 'hourly'
+        params (dict): Parameters for the API request
+        section (str): Parameter with the variable list, kind by default
+
+    Returns:
+        str: Cache key
+    """
+    location = f"{params['latitude']:.{COORDINATE_PRECISION}f},{params['longitude']:.{COORDINATE_PRECISION}f}"
+    rest = {k: v for k, v in params.items() if k not in ('latitude', 'longitude', section or kind)}
+    digest = hashlib.blake2b(json.dumps(rest, sort_keys=True).encode(), digest_size=8).hexdigest()
+    return f"{kind}:{location}:{digest}"
+
+def freshness(kind, key, now, run=None, models=None):
+    """
+    Until when a cache entry is fresh
+
+    Kinds in MODEL_RUN_KINDS stay fresh until the run after the one they came
+    from is out, plus a fixed stagger per key so that keys revalidate spread
+    out after a new run; other kinds use CACHE_TTL. An entry with several
+    models is fresh until the first of them publishes a new run, and its run
+    is the newest of their runs when it was fetched.
+
+    Args:
+        kind (str): Response kind
+        key (str): Cache key
+        now (float): Current time
+        run (float): Model run the entry came from, None for an entry fetched now
+        models (list): Models the entry came from, [FORECAST_MODEL] by default
+
+    Returns:
+        tuple: (fresh until, model run or None)
+    """
+    if kind not in MODEL_RUN_KINDS:
+        return now + CACHE_TTL[kind], None
+    models = models or [FORECAST_MODEL]
+    if run is None:
+        run = max(model_runs.latest_run(model, now) for model in models)
+    return min(model_runs.next_update(model, run, now) for model in models) + stagger(key), run
+
+def cached_fetch(kind, params, fetch, section=None):
+    """
+    Return cached data for a request, calling fetch(params) on a miss
+
+    An entry is a hit when it is fresh and was fetched with at least the
+    variables in params[kind]. On a miss the upstream is asked for the union of
+    the cached and the requested variables, so entries only ever grow and
+    alternating subset requests do not evict each other.
+
+    Freshness is decided by freshness(): forecast data expires with the
+    model run it came from, everything else after CACHE_TTL.
+
+    Stale entries are served when the upstream refuses or fails the refetch,
+    so an open circuit breaker degrades to slightly old data instead of errors.
+    The same goes for requests shed by admission control or out of time (see
+    admission.py).
+
+    Args:
+        kind (str): Response kind, one of CACHE_TTL or MODEL_RUN_KINDS
+        params (dict): Parameters for the API request, used for the key
+        fetch (callable): Produces the fresh value for the given parameters
+        section (str): Parameter with the variable list, kind by default
+
+    Returns:
+        Cached or freshly fetched data, e.g. raw FlatBuffers frames
+    """
+    section = section or kind
+    key = cache_key(kind, params, section)
+    models = params.get('models')
+    models = [models] if isinstance(models, str) else models
+    entry = cache.get(key)
+    envelope = loads(entry) if entry is not None else None
+    now = time.time()
+    requested = params.get(section, [])
+    covered = envelope is not None and set(requested) <= set(envelope.get('variables', ()))
+    if covered:
+        run = envelope.get('run')
+        fresh_until = envelope['fresh_until'] if run is None else freshness(kind, key, now, run, models)[0]
+        if fresh_until > now:
+            return envelope['value']
+
+    variables = list(requested)
+    if envelope is not None:
+        variables += [v for v in envelope.get('variables', ()) if v not in requested]
+
+    try:
+        value = fetch(dict(params, **{section: variables}))
+    except (CircuitOpenError, RateLimitError, requests.exceptions.RequestException) as e:
+        if not covered:
+            raise
+        logging.warning(f"Serving stale {kind} data, upstream unavailable: {str(e)}")
+        return envelope['value']
+
+    fresh_until, run = freshness(kind, key, now, models=models)
+    envelope = {'value': value, 'variables': variables, 'fresh_until': fresh_until, 'run': run}
+    cache.set(key, dumps(envelope), max(fresh_until - now, 0) + STALE_TTL)
+    return value
+
+def favorite_cache_keys(favorites):
+    """
+    Cache keys of the current and hourly data of saved locations
+
+    Args:
+        favorites (list): Favorites with latitude and longitude
+
+    Returns:
+        list: Cache keys
+    """
+    keys = []
+    for fav in favorites:
+        latitude, longitude = float(fav['latitude']), float(fav['longitude'])
+        keys.append(cache_key('current', {
+            "latitude": latitude,
+            "longitude": longitude,
+            "current": CURRENT_VARIABLES,
+            "timezone": "auto"
+        }))
+        keys.append(cache_key('hourly', hourly_params(latitude, longitude, HOURLY_VARIABLES)))
+    return keys
+
+def restore_cache():
+    """
+    Load the cache snapshot, if configured, so a restarted server starts warm
+
+    Returns:
+        int: Number of entries restored
+    """
+    if not CACHE_SNAPSHOT:
+        return 0
+    restored = restore_snapshot(cache, CACHE_SNAPSHOT)
+    logging.info(f"Restored {restored} cache entries from {CACHE_SNAPSHOT}")
+    return restored
+
+def start_cache_snapshots(pinned_keys=tuple):
+    """
+    Start writing cache snapshots every CACHE_SNAPSHOT_INTERVAL seconds
+
+    Args:
+        pinned_keys (callable): Returns keys to save before all others, e.g. favorite_cache_keys of the favorites
+
+    Returns:
+        SnapshotThread: Stop it with a final snapshot on shutdown, None if snapshots are not configured
+    """
+    if not CACHE_SNAPSHOT:
+        return None
+    return SnapshotThread(cache, CACHE_SNAPSHOT, CACHE_SNAPSHOT_INTERVAL, pinned_keys, CACHE_SNAPSHOT_ENTRIES).start()
 
 def calculate_feels_like_temperature(temperature, humidity, wind_speed):
     """
@@ -87,13 +423,13 @@ def get_current_weather(latitude, longitude):
         params = {
             "latitude": latitude,
             "longitude": longitude,
-            "current": ["temperature_2m", "relative_humidity_2m", "precipitation", "weather_code",
-                       "wind_speed_10m", "wind_direction_10m", "is_day"],
+            "current": CURRENT_VARIABLES,
             "timezone": "auto"
         }
 
-        # Using basic implementation
-        response = om.get_weather(params)
+        # Raw FlatBuffers frames are cached and decoded on access
+        data = cached_fetch('current', params, om.get_weather_raw)
+        response = decode_response(data, current=params["current"])
         weather_data = format_current_weather(response)
 
         # Calculate feels like temperature if we have the required data
@@ -113,45 +449,51 @@ def get_current_weather(latitude, longitude):
         logging.error(traceback.format_exc())
         raise
 
-def get_hourly_forecast(latitude, longitude, hours=48):
+def get_hourly_forecast(latitude, longitude, hours=48, fields=None, start=None, end=None):
     """
     Get hourly forecast data for a specific location
 
+    Every window is cut from the same cached fetch, see resolve_window().
+
     Args:
         latitude (float): The latitude of the location
         longitude (float): The longitude of the location
-        hours (int): Number of hours to forecast
+        hours (int): Number of hours to forecast when end is not given
+        fields (list): Forecast fields to include, None for all
+        start: First hour, from the start of today or as local ISO time; the start of today by default
+        end: End of the window (exclusive), like start
 
     Returns:
-        dict: Hourly forecast data
+        Forecast: Hourly forecast data, serialized like a dict of lists
+
+    Raises:
+        ValueError: If fields contains an unsupported field or the window is invalid
     """
+    variables = resolve_fields(fields, HOURLY_VARIABLES, HOURLY_DERIVED_FIELDS)
     try:
-        params = {
-            "latitude": latitude,
-            "longitude": longitude,
-            "hourly": ["temperature_2m", "precipitation_probability", "precipitation",
-                      "weather_code", "wind_speed_10m", "wind_direction_10m", "is_day",
-                      "relative_humidity_2m"],
-            "forecast_days": (hours + 23) // 24,  # Convert hours to days, rounding up
-            "timezone": "auto"
-        }
+        params = hourly_params(latitude, longitude, variables)
 
-        # Using basic implementation
-        response = om.get_weather(params)
-        forecast_data = format_hourly_forecast(response, hours)
+        # The requested hours are read from the cached frames as float32 columns, without copying
+        data = cached_fetch('hourly', params, om.get_weather_raw)
+        response = LazyWeatherResponse(data)
+        axis = response.time_axis('hourly')
+        first, stop = resolve_window(axis, response.utc_offset, start, end, hours) if axis else (0, 0)
+        hourly = Forecast.from_frames(response, 'hourly', variables, first, stop)
+        forecast_data = format_hourly_forecast(hourly, stop - first, fields)
 
         # Calculate feels like temperature for each hour if we have all required data
-        if ("temperature_2m" in forecast_data and
-            "relative_humidity_2m" in forecast_data and
-            "wind_speed_10m" in forecast_data):
-            forecast_data["feels_like_temperature"] = [
+        if ((fields is None or "feels_like_temperature" in fields) and
+            "temperature_2m" in hourly and
+            "relative_humidity_2m" in hourly and
+            "wind_speed_10m" in hourly):
+            forecast_data.set_column("feels_like_temperature", [
                 calculate_feels_like_temperature(temp, humidity, wind)
                 for temp, humidity, wind in zip(
-                    forecast_data["temperature_2m"],
-                    forecast_data["relative_humidity_2m"],
-                    forecast_data["wind_speed_10m"]
+                    hourly.as_list("temperature_2m"),
+                    hourly.as_list("relative_humidity_2m"),
+                    hourly.as_list("wind_speed_10m")
                 )
-            ]
+            ])
 
         return forecast_data
 
@@ -160,62 +502,151 @@ def get_hourly_forecast(latitude, longitude, hours=48):
         logging.error(traceback.format_exc())
         raise
 
-def get_daily_forecast(latitude, longitude, days=7):
+def get_daily_forecast(latitude, longitude, days=7, fields=None, period='day', start=None, end=None):
     """
     Get daily forecast data for a specific location
 
+    Daily values are aggregated from the cached hourly data (see aggregation.py),
+    so they need no upstream request of their own. Sunrise, sunset and
+    daylight duration are computed for the location (see solar.py).
+
     Args:
         latitude (float): The latitude of the location
         longitude (float): The longitude of the location
-        days (int): Number of days to forecast
+        days (int): Number of days to forecast when end is not given
+        fields (list): Forecast fields to include, None for all
+        period (str): 'day', or 'week' for weekly rollups of the forecast days
+        start: First day, from today or as local ISO date; today by default
+        end: End of the window (exclusive), like start
 
     Returns:
-        dict: Daily forecast data
+        Forecast: Daily (or weekly) forecast data, serialized like a dict of lists
+
+    Raises:
+        ValueError: If fields contains an unsupported field, period is unknown or the window is invalid
     """
-    try:
-        params = {
-            "latitude": latitude,
-            "longitude": longitude,
-            "daily": [
-                "temperature_2m_max", "temperature_2m_min",
-                "apparent_temperature_max", "apparent_temperature_min",
-                "sunrise", "sunset", "uv_index_max", "precipitation_sum",
-                "rain_sum", "snowfall_sum", "precipitation_probability_max",
-                "weather_code", "wind_speed_10m_max", "wind_direction_10m_dominant"
-            ],
-            "forecast_days": days,
-            "timezone": "auto"
-        }
+    variables = list(DAILY_VARIABLES) if fields is None else resolve_fields(fields, DAILY_FIELDS)
+    if period == 'week':
+        if fields is None:
+            variables = [v for v in variables if v not in SUN_VARIABLES]
+        elif any(v in SUN_VARIABLES for v in variables):
+            raise ValueError("sunrise, sunset and daylight_duration are only available per day")
+    elif period != 'day':
+        raise ValueError(f"Unknown period: {period}")
+    aggregated = [v for v in variables if v in DAILY_AGGREGATES]
 
-        # Using basic implementation
-        response = om.get_weather(params)
-
-        # Extract and format the daily forecast data
-        daily = response.get('daily', {})
-
-        return {
-            "time": daily.get('time', [])[:days],
-            "temperature_2m_max": daily.get('temperature_2m_max', [])[:days],
-            "temperature_2m_min": daily.get('temperature_2m_min', [])[:days],
-            "apparent_temperature_max": daily.get('apparent_temperature_max', [])[:days],
-            "apparent_temperature_min": daily.get('apparent_temperature_min', [])[:days],
-            "sunrise": daily.get('sunrise', [])[:days],
-            "sunset": daily.get('sunset', [])[:days],
-            "uv_index_max": daily.get('uv_index_max', [])[:days],
-            "precipitation_sum": daily.get('precipitation_sum', [])[:days],
-            "rain_sum": daily.get('rain_sum', [])[:days],
-            "snowfall_sum": daily.get('snowfall_sum', [])[:days],
-            "precipitation_probability_max": daily.get('precipitation_probability_max', [])[:days],
-            "weather_code": daily.get('weather_code', [])[:days],
-            "wind_speed_10m_max": daily.get('wind_speed_10m_max', [])[:days],
-            "wind_direction_10m_dominant": daily.get('wind_direction_10m_dominant', [])[:days],
-            "latitude": response.get('latitude'),
-            "longitude": response.get('longitude'),
-            "elevation": response.get('elevation'),
-            "timezone": response.get('timezone')
-        }
+    try:
+        params = hourly_params(latitude, longitude, source_variables(aggregated))
+        data = cached_fetch('hourly', params, om.get_weather_raw)
+        response = LazyWeatherResponse(data)
+
+        # The window in days is cut from the hourly axis at the local midnights of the timezone,
+        # which move by an hour after a daylight saving change
+        metadata = response.metadata()
+        hourly = response.arrays('hourly', params["hourly"]) or {'time': np.array([], dtype=np.int64)}
+        hour_days = local_days(hourly['time'], response.utc_offset, metadata['timezone'])
+        first, stop = 0, 0
+        if len(hour_days):
+            axis = (int(hour_days[0]) * 86400 - response.utc_offset,
+                    (int(hour_days[-1]) + 1) * 86400 - response.utc_offset, 86400)
+            window = resolve_window(axis, response.utc_offset, start, end, days, 86400)
+            first, stop = np.searchsorted(hour_days, hour_days[0] + np.array(window))
+        hourly = {name: values[first:stop] for name, values in hourly.items()}
+        labels, daily = aggregate_arrays(hourly, response.utc_offset, aggregated, period, metadata['timezone'])
+
+        # The time axis holds the bucket starts as unix seconds
+        starts = labels.astype('datetime64[s]').astype(np.int64) - response.utc_offset
+        forecast_data = Forecast(starts, {}, response.utc_offset,
+                                 {name: metadata[name] for name in LOCATION_FIELDS}, time_unit='D')
+        sun = solar.sun_times(starts, latitude, longitude) if period == 'day' else {}
+        for variable in variables:
+            if variable in SUN_VARIABLES:
+                forecast_data.set_column(variable, sun[variable])
+            else:
+                forecast_data.set_column(variable, np.round(daily.get(variable, np.full(len(starts), np.nan)), 2))
+        return forecast_data
 
     except Exception as e:
         logging.error(f"Error getting daily forecast: {str(e)}")
         logging.error(traceback.format_exc())
-        raise
\ No newline at end of file
+        raise
+
+
+def get_historical_weather(latitude, longitude, start_date, end_date):
+    """
+    Get daily historical weather for a date range
+
+    Args:
+        latitude (float): The latitude of the location
+        longitude (float): The longitude of the location
+        start_date (date): First day
+        end_date (date): Last day, inclusive
+
+    Returns:
+        dict: Daily values with their dates in "time"
+    """
+    params = {
+        "latitude": latitude,
+        "longitude": longitude,
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "daily": HISTORICAL_VARIABLES,
+        "timezone": "auto"
+    }
+    try:
+        data = cached_fetch('archive', params, om.get_archive_raw, section='daily')
+        response = decode_response(data, daily=params["daily"])
+        daily = response.pop('daily', {})
+        response["time"] = daily.get('time', [])
+        for variable in HISTORICAL_VARIABLES:
+            response[variable] = daily.get(variable, [])
+        return response
+
+    except Exception as e:
+        logging.error(f"Error getting historical weather: {str(e)}")
+        logging.error(traceback.format_exc())
+        raise
+
+def get_weather_alerts(locations, hours=48):
+    """
+    Evaluate weather alerts for many locations at once
+
+    Hourly data comes from the same cache entries as the hourly and daily
+    forecasts. The upcoming hours of every location are stacked into
+    (locations, hours) arrays and all rules are evaluated in one pass
+    (see alerts.py).
+
+    Args:
+        locations (list): (latitude, longitude) pairs
+        hours (int): Number of upcoming hours to check
+
+    Returns:
+        list: One list of alerts per location, in the order of locations
+    """
+    hours = max(1, min(hours, FORECAST_DAYS * 24))
+    variables = alerts.source_variables()
+    now = int(time.time()) // 3600 * 3600
+    stacked = {name: np.full((len(locations), hours), np.nan, dtype=np.float32) for name in variables}
+    local_times = np.full((len(locations), hours), '', dtype=object)
+
+    try:
+        for row, (latitude, longitude) in enumerate(locations):
+            params = hourly_params(latitude, longitude, variables)
+            response = LazyWeatherResponse(cached_fetch('hourly', params, om.get_weather_raw))
+            hourly = response.arrays('hourly', variables)
+            if not hourly:
+                continue
+            start = int(np.searchsorted(hourly['time'], now))
+            times = hourly['time'][start:start + hours]
+            local = (times + response.utc_offset).astype('datetime64[s]')
+            local_times[row, :len(times)] = np.datetime_as_string(local, unit='m')
+            for name in variables:
+                if name in hourly:
+                    stacked[name][row, :len(times)] = hourly[name][start:start + hours]
+
+        return alerts.evaluate_alerts(stacked, local_times)
+
+    except Exception as e:
+        logging.error(f"Error evaluating weather alerts: {str(e)}")
+        logging.error(traceback.format_exc())
+        raise
@@ -14,7 +14,7 @@ import OfflineIndicator from './components/ui/OfflineIndicator';
 import ErrorBoundary from './components/ErrorBoundary';
 import { ThemeProvider, useTheme } from './contexts/ThemeContext';
 import { SettingsProvider, useSettings } from './contexts/SettingsContext';
-import { fetchHourlyForecast } from './services/weatherService';
+import { fetchHourlyForecast, reverseGeocode } from './services/weatherService';
 import { HourlyForecastData } from './types/weatherTypes';
 import LoadingState from './components/ui/LoadingState';
 import ErrorState from './components/ui/ErrorState';
@@ -248,19 +248,29 @@ const AppContent: React.FC = () => {
                     });
 
                     try {
-                        // Use OpenStreetMap Nominatim for reverse geocoding
-                        const response = await fetch(
-                            `https://nominatim.openstreetmap.org/reverse?lat=${position.coords.latitude}&lon=${position.coords.longitude}&format=json`
-                        );
+                        let locationName: string;
+                        let country: string;
+                        try {
+                            // Nearest place from the backend gazetteer
+                            const place = await reverseGeocode(position.coords.latitude, position.coords.longitude);
+                            locationName = place.name;
+                            country = place.country;
+                        } catch (gazetteerError) {
+                            // Fall back to OpenStreetMap Nominatim if the backend has no gazetteer or no nearby place
+                            await logger.warn('Backend reverse geocoding failed, trying Nominatim', { error: gazetteerError });
+                            const response = await fetch(
+                                `https://nominatim.openstreetmap.org/reverse?lat=${position.coords.latitude}&lon=${position.coords.longitude}&format=json`
+                            );
+
+                            if (!response.ok) {
+                                throw new Error('Failed to get location details');
+                            }
 
-                        if (!response.ok) {
-                            throw new Error('Failed to get location details');
+                            const data = await response.json();
+                            locationName = data.address.city || data.address.town || data.address.village || data.address.suburb || 'Unknown Location';
+                            country = data.address.country || 'Unknown Country';
                         }
 
-                        const data = await response.json();
-                        const locationName = data.address.city || data.address.town || data.address.village || data.address.suburb || 'Unknown Location';
-                        const country = data.address.country || 'Unknown Country';
-
                         const newLocation: Location = {
                             name: locationName,
                             country: country,
@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from 'react';
-import { fetchCurrentWeather } from '../services/weatherService';
+import { fetchCurrentWeather, subscribeCurrentWeather } from '../services/weatherService';
 import { CurrentWeatherData } from '../types/weatherTypes';
 import GlassCard from './ui/GlassCard';
 import LoadingState from './ui/LoadingState';
@@ -38,12 +38,28 @@ const CurrentWeatherDisplay: React.FC<CurrentWeatherDisplayProps> = ({ latitude,
         fetchData();
     }, [latitude, longitude]);
 
-    // Set up auto-refresh interval
+    // Receive updates pushed by the backend; poll on an interval only if streaming is unavailable
     useEffect(() => {
-        const intervalId = setInterval(fetchData, refreshInterval * 60 * 1000); // Convert minutes to milliseconds
-
-        // Cleanup interval on unmount or when refresh interval changes
-        return () => clearInterval(intervalId);
+        let intervalId: ReturnType<typeof setInterval> | undefined;
+
+        const unsubscribe = subscribeCurrentWeather(
+            latitude,
+            longitude,
+            (data) => {
+                setWeatherData(data);
+                setError(null);
+                setLoading(false);
+            },
+            () => {
+                intervalId = setInterval(fetchData, refreshInterval * 60 * 1000); // Convert minutes to milliseconds
+            }
+        );
+
+        // Close the stream and any polling interval on unmount or when the location changes
+        return () => {
+            unsubscribe();
+            if (intervalId) clearInterval(intervalId);
+        };
     }, [refreshInterval, latitude, longitude]);
 
     // Determine if it's currently daytime based on weather data
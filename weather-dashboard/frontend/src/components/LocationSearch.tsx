@@ -1,5 +1,6 @@
 import React, { useState, useRef, useEffect } from 'react';
 import GlassCard from './ui/GlassCard';
+import { searchPlaces } from '../services/weatherService';
 
 export interface Location {
     name: string;
@@ -29,31 +30,10 @@ const LocationSearch: React.FC<LocationSearchProps> = ({
     const resultsRef = useRef<HTMLDivElement>(null);
     const searchTimeout = useRef<NodeJS.Timeout | null>(null);
 
-    // Mock function for geocoding API call (to be replaced with real API)
+    // Search the backend gazetteer by name prefix
     const searchLocations = async (query: string): Promise<Location[]> => {
-        // Simulate network delay
-        await new Promise(resolve => setTimeout(resolve, 800));
-
-        // Return empty array for very short queries
-        if (query.length < 3) return [];
-
-        // Mock data for demonstration
-        const mockResults: Location[] = [
-            { name: 'London', country: 'United Kingdom', latitude: 51.5074, longitude: -0.1278 },
-            { name: 'Los Angeles', country: 'United States', state: 'California', latitude: 34.0522, longitude: -118.2437 },
-            { name: 'Paris', country: 'France', latitude: 48.8566, longitude: 2.3522 },
-            { name: 'Tokyo', country: 'Japan', latitude: 35.6762, longitude: 139.6503 },
-            { name: 'Sydney', country: 'Australia', latitude: -33.8688, longitude: 151.2093 },
-            { name: 'New York', country: 'United States', state: 'New York', latitude: 40.7128, longitude: -74.0060 },
-            { name: 'Berlin', country: 'Germany', latitude: 52.5200, longitude: 13.4050 },
-        ];
-
-        // Filter based on search term
-        return mockResults.filter(location =>
-            location.name.toLowerCase().includes(query.toLowerCase()) ||
-            location.country.toLowerCase().includes(query.toLowerCase()) ||
-            (location.state && location.state.toLowerCase().includes(query.toLowerCase()))
-        );
+        const places = await searchPlaces(query.trim());
+        return places.map(({ name, country, state, latitude, longitude }) => ({ name, country, state, latitude, longitude }));
     };
 
     // Handle search input changes
@@ -73,7 +53,7 @@ const LocationSearch: React.FC<LocationSearchProps> = ({
             return;
         }
 
-        // Debounce the search by 500ms
+        // Debounce the search by 150ms; the backend answers from a local index
         searchTimeout.current = setTimeout(async () => {
             try {
                 setIsSearching(true);
@@ -87,7 +67,7 @@ const LocationSearch: React.FC<LocationSearchProps> = ({
             } finally {
                 setIsSearching(false);
             }
-        }, 500);
+        }, 150);
     };
 
     // Handle location selection
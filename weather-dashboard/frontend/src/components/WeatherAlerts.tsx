@@ -1,15 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import GlassCard from './ui/GlassCard';
-
-interface WeatherAlert {
-    id: string;
-    title: string;
-    description: string;
-    severity: 'minor' | 'moderate' | 'severe' | 'extreme';
-    start: string; // ISO datetime string
-    end: string;   // ISO datetime string
-    source: string;
-}
+import { fetchWeatherAlerts } from '../services/weatherService';
+import { WeatherAlertData as WeatherAlert } from '../types/weatherTypes';
 
 interface WeatherAlertsProps {
     latitude: number;
@@ -81,45 +73,7 @@ const WeatherAlerts: React.FC<WeatherAlertsProps> = ({
             try {
                 setLoading(true);
 
-                // In a real implementation, this would call the backend API
-                // For now, we'll simulate with mock data
-                await new Promise(resolve => setTimeout(resolve, 1000)); // Simulate network delay
-
-                // Randomly determine if we should show mock alerts (for demo purposes)
-                const showMockAlerts = Math.random() > 0.5;
-
-                if (showMockAlerts) {
-                    const now = new Date();
-                    const tomorrow = new Date(now);
-                    tomorrow.setDate(tomorrow.getDate() + 1);
-
-                    const mockAlerts: WeatherAlert[] = [
-                        {
-                            id: 'alert-1',
-                            title: 'Severe Thunderstorm Warning',
-                            description: 'The National Weather Service has issued a severe thunderstorm warning for your area. Strong winds, heavy rain, and hail are possible. Seek shelter indoors and stay away from windows.',
-                            severity: 'severe',
-                            start: now.toISOString(),
-                            end: tomorrow.toISOString(),
-                            source: 'National Weather Service'
-                        },
-                        {
-                            id: 'alert-2',
-                            title: 'Flood Watch',
-                            description: 'A flood watch is in effect for your region. Heavy rainfall may cause flooding in low-lying areas. Monitor local weather reports and be prepared to move to higher ground if necessary.',
-                            severity: 'moderate',
-                            start: now.toISOString(),
-                            end: tomorrow.toISOString(),
-                            source: 'Local Weather Authority'
-                        }
-                    ];
-
-                    setAlerts(mockAlerts);
-                } else {
-                    // No alerts
-                    setAlerts([]);
-                }
-
+                setAlerts(await fetchWeatherAlerts(latitude, longitude));
                 setError(null);
             } catch (err) {
                 console.error('Error fetching weather alerts:', err);
@@ -2,7 +2,7 @@ import React, { useEffect, useState } from 'react';
 import { useMap } from 'react-leaflet';
 import L from 'leaflet';
 import { useSettings } from '../contexts/SettingsContext';
-import { fetchCurrentWeather } from '../services/weatherService';
+import { fetchWeatherTile } from '../services/weatherService';
 import 'leaflet/dist/leaflet.css';
 
 interface WeatherMapLayerProps {
@@ -47,116 +47,59 @@ const WeatherMapLayer: React.FC<WeatherMapLayerProps> = ({ type }) => {
         return colors[Math.max(0, index)];
     };
 
+    // Parse a '#RRGGBB' color into its components
+    const toRgb = (color: string): [number, number, number] => [
+        parseInt(color.slice(1, 3), 16),
+        parseInt(color.slice(3, 5), 16),
+        parseInt(color.slice(5, 7), 16)
+    ];
+
     useEffect(() => {
-        let layer: L.CircleMarker[] = [];
-        const bounds = map.getBounds();
         const scale = scales[type];
-        const zoom = map.getZoom();
-
-        // Create a grid of points
-        const createGrid = async () => {
-            // Calculate grid density based on viewport size
-            const viewportWidth = map.getSize().x;
-            const viewportHeight = map.getSize().y;
-
-            // Aim for roughly 20-30 points across the viewport
-            const targetPoints = 25;
-            const boundsWidth = bounds.getEast() - bounds.getWest();
-            const boundsHeight = bounds.getNorth() - bounds.getSouth();
-
-            const latStep = boundsHeight / targetPoints;
-            const lonStep = boundsWidth / targetPoints;
-
-            const points: [number, number][] = [];
-
-            // Create grid with proper spacing
-            for (let lat = bounds.getSouth(); lat <= bounds.getNorth(); lat += latStep) {
-                for (let lon = bounds.getWest(); lon <= bounds.getEast(); lon += lonStep) {
-                    points.push([lat, lon]);
-                }
-            }
 
-            console.log(`Creating grid with ${points.length} points at zoom level ${zoom}`);
-
-            try {
-                // Fetch data for each point in smaller batches to avoid overwhelming the API
-                const batchSize = 10;
-                const batches = [];
-                for (let i = 0; i < points.length; i += batchSize) {
-                    const batch = points.slice(i, i + batchSize);
-                    const batchPromises = batch.map(([lat, lon]) => fetchCurrentWeather(lat, lon));
-                    batches.push(Promise.all(batchPromises));
-                }
-
-                const batchResults = await Promise.all(batches);
-                const results = batchResults.flat();
-
-                // Log sample values for debugging
-                console.log('Sample weather values:', results.slice(0, 5).map((data, i) => {
-                    const [lat, lon] = points[i];
-                    return {
-                        location: [lat.toFixed(2), lon.toFixed(2)],
-                        value: type === 'temperature' ? data.temperature_2m :
-                            type === 'precipitation' ? data.precipitation :
-                                type === 'wind' ? data.wind_speed_10m :
-                                    data.cloud_cover
-                    };
-                }));
-
-                // Create circle markers for each point
-                results.forEach((data, index) => {
-                    const [lat, lon] = points[index];
-                    let value: number;
-
-                    switch (type) {
-                        case 'temperature':
-                            value = data.temperature_2m;
-                            break;
-                        case 'precipitation':
-                            value = data.precipitation;
-                            break;
-                        case 'wind':
-                            value = data.wind_speed_10m;
-                            break;
-                        case 'clouds':
-                            value = data.cloud_cover;
-                            break;
-                        default:
+        // Each tile is one request for a grid of values, prebuilt and cached by the backend
+        const WeatherGridLayer = L.GridLayer.extend({
+            createTile(coords: L.Coords, done: L.DoneCallback) {
+                const tile = document.createElement('canvas');
+                const tileSize = this.getTileSize();
+                tile.width = tileSize.x;
+                tile.height = tileSize.y;
+
+                fetchWeatherTile(type, coords.z, coords.x, coords.y)
+                    .then(({ size, values }) => {
+                        // Color the value grid at its own resolution, then let the canvas smooth it up to the tile size
+                        const grid = document.createElement('canvas');
+                        grid.width = size;
+                        grid.height = size;
+                        const gridContext = grid.getContext('2d');
+                        const tileContext = tile.getContext('2d');
+                        if (!gridContext || !tileContext) {
+                            done(undefined, tile);
                             return;
-                    }
-
-                    // Create circle with size based on viewport
-                    const baseRadius = Math.min(viewportWidth, viewportHeight) / (targetPoints * 2);
-                    const circle = L.circleMarker([lat, lon], {
-                        radius: baseRadius,
-                        fillColor: getColor(value, scale),
-                        color: 'transparent',
-                        fillOpacity: 0.7,
-                        className: 'weather-point'
-                    }).bindPopup(`${type}: ${value.toFixed(1)}${scale.unit}<br>Location: ${lat.toFixed(2)}°N, ${lon.toFixed(2)}°E`);
-
-                    circle.addTo(map);
-                    layer.push(circle);
-                });
-
-                // Add CSS for hover effect
-                const style = document.createElement('style');
-                style.textContent = `
-                    .weather-point {
-                        transition: all 0.3s ease;
-                        filter: blur(8px);
-                    }
-                    .weather-point:hover {
-                        transform: scale(1.1);
-                        z-index: 1000 !important;
-                        filter: blur(2px);
-                    }
-                `;
-                document.head.appendChild(style);
-            } catch (error) {
-                console.error('Error fetching weather data:', error);
+                        }
+                        const image = gridContext.createImageData(size, size);
+                        values.forEach((value, index) => {
+                            if (Number.isNaN(value)) return;
+                            const [r, g, b] = toRgb(getColor(value, scale));
+                            image.data.set([r, g, b, 255], index * 4);
+                        });
+                        gridContext.putImageData(image, 0, 0);
+                        tileContext.imageSmoothingEnabled = true;
+                        tileContext.drawImage(grid, 0, 0, tile.width, tile.height);
+                        done(undefined, tile);
+                    })
+                    .catch((error: Error) => {
+                        console.error('Error fetching weather tile:', error);
+                        done(error, tile);
+                    });
+
+                return tile;
             }
-        };
+        });
+
+        // Zooms beyond the backend's maximum scale up its tiles instead of requesting new ones
+        const layer: L.GridLayer = new WeatherGridLayer({ opacity: 0.6, maxNativeZoom: 8, className: 'weather-grid' });
+        layer.addTo(map);
 
         // Create a custom legend control
         const legend = new L.Control({ position: 'bottomright' });
@@ -190,27 +133,10 @@ const WeatherMapLayer: React.FC<WeatherMapLayerProps> = ({ type }) => {
         // Add the legend to the map
         legend.addTo(map);
 
-        // Create the initial grid
-        createGrid();
-
-        // Update grid when map moves or zooms
-        const updateLayer = () => {
-            // Remove old markers
-            layer.forEach(marker => marker.remove());
-            layer = [];
-            // Create new grid
-            createGrid();
-        };
-
-        map.on('moveend', updateLayer);
-        map.on('zoomend', updateLayer);
-
         // Cleanup function
         return () => {
-            layer.forEach(marker => marker.remove());
+            layer.remove();
             legend.remove();
-            map.off('moveend', updateLayer);
-            map.off('zoomend', updateLayer);
         };
     }, [map, type, temperatureUnit]);
 
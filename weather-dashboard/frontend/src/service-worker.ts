@@ -46,7 +46,8 @@ registerRoute(
 
 // Cache weather API responses
 registerRoute(
-    ({ url }) => url.pathname.startsWith('/weather/'),
+    // Event streams never complete, so they must bypass the cache
+    ({ url }) => url.pathname.startsWith('/weather/') && url.pathname !== '/weather/stream',
     new NetworkFirst({
         cacheName: 'weather-api-cache',
         plugins: [
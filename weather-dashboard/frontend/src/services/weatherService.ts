@@ -5,7 +5,7 @@
 
 import { logger } from '../utils/logger';
 import { STORAGE_KEYS, saveToStorage, loadFromStorage, isOffline } from '../utils/storageUtils';
-import { CurrentWeatherData, HourlyForecastData, DailyForecastData } from '../types/weatherTypes';
+import { CurrentWeatherData, HourlyForecastData, DailyForecastData, WeatherAlertData } from '../types/weatherTypes';
 
 const API_BASE_URL = process.env.REACT_APP_API_BASE_URL || 'http://localhost:5001';
 
@@ -78,6 +78,49 @@ export const fetchCurrentWeather = async (latitude: number, longitude: number):
     }
 };
 
+/**
+ * Subscribe to current weather pushed by the backend as Server-Sent Events
+ * The first event is a full snapshot, later events carry only the fields that changed.
+ * @param latitude Location latitude
+ * @param longitude Location longitude
+ * @param onData Called with the merged current weather data after every event
+ * @param onUnavailable Called once if streaming is not possible, so the caller can poll instead
+ * @returns Function that closes the subscription
+ */
+export const subscribeCurrentWeather = (
+    latitude: number,
+    longitude: number,
+    onData: (data: CurrentWeatherData) => void,
+    onUnavailable: () => void
+): (() => void) => {
+    if (typeof EventSource === 'undefined') {
+        onUnavailable();
+        return () => undefined;
+    }
+
+    const source = new EventSource(`${API_BASE_URL}/weather/stream?lat=${latitude}&lon=${longitude}`);
+    let current: CurrentWeatherData | null = null;
+
+    const handle = (event: MessageEvent) => {
+        const changes = JSON.parse(event.data);
+        current = event.type === 'snapshot' ? changes : { ...current, ...changes } as CurrentWeatherData;
+        saveToStorage(STORAGE_KEYS.CURRENT_WEATHER, current, latitude, longitude);
+        onData(current as CurrentWeatherData);
+    };
+    source.addEventListener('snapshot', handle as EventListener);
+    source.addEventListener('update', handle as EventListener);
+
+    source.onerror = () => {
+        // EventSource reconnects by itself; give up only when the server refused the stream
+        if (source.readyState === EventSource.CLOSED) {
+            logger.warn('Current weather stream unavailable, falling back to polling', { latitude, longitude });
+            onUnavailable();
+        }
+    };
+
+    return () => source.close();
+};
+
 /**
  * Fetch hourly forecast data for a specific location
  * @param latitude Location latitude
@@ -247,6 +290,95 @@ export const mapWeatherCodeToCondition = (weatherCode: number): 'clear' | 'cloud
     return 'cloudy';
 };
 
+/**
+ * Fetch weather alerts for a specific location
+ * @param latitude Location latitude
+ * @param longitude Location longitude
+ * @param hours Number of upcoming hours to check (default: 48)
+ * @returns Promise with the active and upcoming alerts
+ */
+export const fetchWeatherAlerts = async (latitude: number, longitude: number, hours: number = 48): Promise<WeatherAlertData[]> => {
+    await logger.info('Fetching weather alerts', { latitude, longitude, hours });
+
+    const response = await fetch(
+        `${API_BASE_URL}/weather/alerts?lat=${latitude}&lon=${longitude}&hours=${hours}`
+    );
+
+    if (!response.ok) {
+        const errorData = await response.json() as ApiErrorResponse;
+        throw new Error(errorData.message || 'Failed to fetch weather alerts');
+    }
+
+    const data = await response.json() as { alerts: WeatherAlertData[] };
+    return data.alerts;
+};
+
+/**
+ * Fetch a map tile of current weather values
+ * @param layer Map layer: temperature, precipitation, wind or clouds
+ * @param z Zoom level (the backend serves up to zoom 8)
+ * @param x Tile column
+ * @param y Tile row
+ * @returns Promise with the grid values, row by row from the north-west corner, NaN where missing
+ */
+export const fetchWeatherTile = async (layer: string, z: number, x: number, y: number): Promise<{ size: number; values: Float32Array }> => {
+    const response = await fetch(`${API_BASE_URL}/weather/tiles/${z}/${x}/${y}?layer=${layer}`);
+
+    if (!response.ok) {
+        throw new Error(`Failed to fetch weather tile ${z}/${x}/${y}`);
+    }
+
+    const values = new Float32Array(await response.arrayBuffer());
+    return { size: Math.round(Math.sqrt(values.length)), values };
+};
+
+/**
+ * A place from the backend gazetteer
+ */
+export interface GeocodedPlace {
+    name: string;
+    country: string;
+    state?: string;
+    latitude: number;
+    longitude: number;
+    population: number;
+    distance_km?: number;
+}
+
+/**
+ * Search places by name prefix, most populous first
+ * @param query Beginning of the place name
+ * @param limit Maximum number of places (default: 10)
+ * @returns Promise with the matching places
+ */
+export const searchPlaces = async (query: string, limit: number = 10): Promise<GeocodedPlace[]> => {
+    const response = await fetch(`${API_BASE_URL}/geocode/search?q=${encodeURIComponent(query)}&limit=${limit}`);
+
+    if (!response.ok) {
+        const errorData = await response.json() as ApiErrorResponse;
+        throw new Error(errorData.message || 'Failed to search places');
+    }
+
+    return await response.json() as GeocodedPlace[];
+};
+
+/**
+ * Find the nearest known place to a coordinate
+ * @param latitude Location latitude
+ * @param longitude Location longitude
+ * @returns Promise with the nearest place
+ */
+export const reverseGeocode = async (latitude: number, longitude: number): Promise<GeocodedPlace> => {
+    const response = await fetch(`${API_BASE_URL}/geocode/reverse?lat=${latitude}&lon=${longitude}`);
+
+    if (!response.ok) {
+        const errorData = await response.json() as ApiErrorResponse;
+        throw new Error(errorData.message || 'Failed to get location details');
+    }
+
+    return await response.json() as GeocodedPlace;
+};
+
 /**
  * Fetch weather codes and their descriptions
  * @returns Map of weather codes to descriptions
@@ -137,6 +137,17 @@ export interface DailyForecastData {
     wind_speed_10m_max: number[];
 }
 
+// Weather alert evaluated by the backend from the hourly forecast
+export interface WeatherAlertData {
+    id: string;
+    title: string;
+    description: string;
+    severity: 'minor' | 'moderate' | 'severe' | 'extreme';
+    start: string; // Local ISO datetime string
+    end: string;   // Local ISO datetime string
+    source: string;
+}
+
 // Location data
 export interface LocationData {
     id: string;